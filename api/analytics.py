@@ -0,0 +1,130 @@
+# api/analytics.py
+"""
+Materialized conversation analytics: funnel, paths, end reasons, NLU usage,
+escalations and repairs.
+
+Each logged turn bumps a handful of (metric, key) counters in the same write
+transaction as the turn, so `GET /v1/analytics` reads a table whose size
+depends on the number of distinct phases / paths / NLU modes, never on the
+number of turns. Phase transitions and escalations are detected against the
+session's previous phase and path in session_summary, so `record_turn` must
+run before `session_summary.record_turn`.
+
+Session-level counters (sessions started, the funnel, end reasons,
+escalations) count each session once: `analytics_reached` remembers what a
+session has already reached, so a session that goes back to a phase, or is
+reset and runs again, is not counted twice. Phase transitions count every
+transition. Resets keep a session's `analytics_reached` rows; retention
+deletes them with the session.
+
+Counters are cumulative: resetting or archiving a session does not take its
+turns back out. The tables are created by api/migrations.py: migration 6
+backfills turns, paths, phase transitions, NLU usage and escalations from
+existing rows (end reasons of older sessions are counted as "unknown" and
+their repairs are not recovered), and migration 8 seeds `analytics_reached`
+from existing turns and leaves the counters as they were.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+from soficca_core.chat_state import PHASE_END, PHASES
+from soficca_core.rules import PATH_ESCALATE_HUMAN
+from soficca_core.state_codec import StateCodecError, coerce_state
+
+START = "START"  # pseudo-phase before a session's first turn
+NONE = "none"
+
+# analytics_reached marks besides phase names.
+_STARTED = "started"
+_ESCALATED = "escalated"
+
+
+def _bump(conn: sqlite3.Connection, counts: List[Tuple[str, str, int]]) -> None:
+    conn.executemany(
+        "INSERT INTO analytics_counters(metric, key, n) VALUES (?, ?, ?) ON CONFLICT(metric, key) DO UPDATE SET n = n + excluded.n",
+        counts,
+    )
+
+
+def _first(conn: sqlite3.Connection, session_id: str, mark: str) -> bool:
+    """True the first time `session_id` reaches `mark`."""
+    cur = conn.execute("INSERT OR IGNORE INTO analytics_reached(session_id, mark) VALUES (?, ?)", (session_id, mark))
+    return cur.rowcount == 1
+
+
+def repair_counts(state: Any) -> Dict[str, int]:
+    """A copy of state.meta.repair_counts (state as dict or token; {} if absent or undecodable)."""
+    try:
+        state = coerce_state(state)
+    except StateCodecError:
+        return {}
+    meta = state.get("meta") if isinstance(state, dict) else None
+    rc = meta.get("repair_counts") if isinstance(meta, dict) else None
+    return {q: n for q, n in rc.items() if isinstance(n, int)} if isinstance(rc, dict) else {}
+
+
+def repair_delta(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    """Repair questions asked in one turn, per question id, from repair_counts before and after."""
+    return {q: n - before.get(q, 0) for q, n in after.items() if n > before.get(q, 0)}
+
+
+def record_turn(
+    conn: sqlite3.Connection,
+    session_id: str,
+    *,
+    phase: Optional[str],
+    path: Optional[str],
+    nlu_used: Any,
+    end_reason: Optional[str],
+    repairs: Dict[str, int],
+) -> None:
+    prev = conn.execute("SELECT last_phase, last_path FROM session_summary WHERE session_id = ?", (session_id,)).fetchone()
+    prev_phase, prev_path = (prev[0], prev[1]) if prev is not None else (None, None)
+
+    counts = [("turns", "all", 1), ("path", path or NONE, 1), ("nlu_used", str(nlu_used) if nlu_used else NONE, 1)]
+    if prev_phase is None and _first(conn, session_id, _STARTED):
+        counts.append(("sessions", "started", 1))
+    if phase != prev_phase:
+        counts.append(("transition", f"{prev_phase or START}>{phase or NONE}", 1))
+        if _first(conn, session_id, phase or NONE):
+            counts.append(("funnel", phase or NONE, 1))
+            if phase == PHASE_END:
+                counts.append(("end_reason", end_reason or "unknown", 1))
+    if path == PATH_ESCALATE_HUMAN and prev_path != PATH_ESCALATE_HUMAN and _first(conn, session_id, _ESCALATED):
+        counts.append(("escalation", "sessions", 1))
+    counts += [("repair", question_id, n) for question_id, n in repairs.items()]
+    _bump(conn, counts)
+
+
+def delete_session(conn: sqlite3.Connection, session_id: str) -> None:
+    conn.execute("DELETE FROM analytics_reached WHERE session_id = ?", (session_id,))
+
+
+def _rate(n: int, d: int) -> Optional[float]:
+    return round(n / d, 4) if d else None
+
+
+def summary(conn: sqlite3.Connection) -> Dict[str, Any]:
+    by_metric: Dict[str, Dict[str, int]] = {}
+    for metric, key, n in conn.execute("SELECT metric, key, n FROM analytics_counters"):
+        by_metric.setdefault(metric, {})[key] = n
+
+    started = by_metric.get("sessions", {}).get("started", 0)
+    reached = by_metric.get("funnel", {})
+    funnel = [{"phase": p, "sessions": reached.get(p, 0), "rate": _rate(reached.get(p, 0), started)} for p in PHASES]
+    escalations = by_metric.get("escalation", {}).get("sessions", 0)
+    repairs = by_metric.get("repair", {})
+    return {
+        "turns": by_metric.get("turns", {}).get("all", 0),
+        "sessions_started": started,
+        "funnel": funnel,
+        "phase_transitions": by_metric.get("transition", {}),
+        "paths": by_metric.get("path", {}),
+        "end_reasons": by_metric.get("end_reason", {}),
+        "nlu_used": by_metric.get("nlu_used", {}),
+        "escalation": {"sessions": escalations, "rate": _rate(escalations, started)},
+        "repairs": {"total": sum(repairs.values()), "by_question": repairs},
+    }
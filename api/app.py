@@ -8,69 +8,95 @@ print("OPENAI KEY LOADED:", bool(os.getenv("OPENAI_API_KEY")))
 print("NLU MODE:", os.getenv("SOFICCA_NLU_MODE"))
 print("NLU ENABLED:", os.getenv("SOFICCA_OPENAI_NLU_ENABLED"))
 
-import io
-import csv
-from fastapi import HTTPException
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi import Header, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.responses import HTMLResponse
 from pathlib import Path
 from fastapi import FastAPI
 from pydantic import BaseModel, Field
 from typing import Any, Dict, List, Optional
-import sqlite3
+from contextlib import asynccontextmanager
 import uuid
 import json
 from datetime import datetime, timezone
 
 from soficca_core.engine import generate_report
+from soficca_core.state_codec import coerce_state, encode_state_token
+from soficca_core.state_delta import apply_patch
 
-app = FastAPI(title="Soficca Core API", version="0.1.0")
+from api import analytics, chat_actors, dataset_export, event_log, exports, idempotency, json_blobs, metrics, migrations, responses, search, session_summary
+from api.db import DB_PATH, ConnectionManager
+from api.session_store import SessionStore
+from api.turn_writer import TurnWriter
 
-DB_PATH = Path(__file__).with_name("soficca_demo.sqlite")
+db = ConnectionManager(DB_PATH)
+# Turn logging is write-behind: /v1/report queues the rows and returns; see
+# api/turn_writer.py for batching, queue policy and shutdown flushing.
+turn_writer = TurnWriter(db)
+
+
+def _flush_turns() -> None:
+    """Readers see the turns queued before them, or get a 503 while the writer is behind."""
+    if not turn_writer.flush():
+        raise HTTPException(status_code=503, detail="turn log is behind, retry shortly")
+
+
+def _load_session_state(session_id: str):
+    _flush_turns()  # an evicted session may still have queued turns
+    try:
+        with db.read() as conn:
+            return event_log.reconstruct(conn, session_id)[1]
+    except KeyError:
+        return None
+
+
+# Latest chat state per session, so clients can send just session_id + chat_text.
+sessions = SessionStore(_load_session_state)
+
+# Partitioned dataset exports started via /v1/export/dataset.
+dataset_jobs = dataset_export.ExportJobs(DB_PATH)
+
+# Responses replayed to retries of a turn that carry the same Idempotency-Key.
+replies = idempotency.ResponseCache()
+
+# Sessions connected over WebSocket /v1/chat, each with its state pinned in `sessions`.
+chat = chat_actors.ChatActors(sessions, lambda request, key: _reply(request, key))
+
+# Prometheus metrics at /metrics, including the engine's stage timings.
+metrics.install(turn_writer=turn_writer, sessions=sessions, db=db, replies=replies, chat=chat)
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    yield
+    turn_writer.close()
+    db.close_all()
+
+
+app = FastAPI(title="Soficca Core API", version="0.1.0", lifespan=_lifespan)
+app.add_middleware(metrics.RequestMetrics)
+
+# How stored chat states (state snapshots, legacy turns.state_json) are
+# encoded: "json" (default) or "binary" (compact token, see
+# soficca_core.state_codec). Readers accept both.
+STATE_STORAGE = os.getenv("SOFICCA_STATE_STORAGE", "json").lower()
 
 
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+def _state_for_storage(state) -> str:
+    # The client may have asked for a binary state; store per STATE_STORAGE either way.
+    if STATE_STORAGE == "binary":
+        return state if isinstance(state, str) else encode_state_token(state)
+    return json.dumps(coerce_state(state), default=str)
 
 
 def _init_db():
-    conn = _db()
-    cur = conn.cursor()
-
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS sessions (
-        session_id TEXT PRIMARY KEY,
-        created_at TEXT NOT NULL,
-        user_json TEXT NOT NULL
-    );
-    """)
-
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS turns (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        session_id TEXT NOT NULL,
-        created_at TEXT NOT NULL,
-        user_text TEXT NOT NULL,
-        assistant_text TEXT NOT NULL,
-        phase TEXT,
-        path TEXT,
-        flags_json TEXT,
-        reasons_json TEXT,
-        recommendations_json TEXT,
-        trace_json TEXT,
-        state_json TEXT,
-        FOREIGN KEY(session_id) REFERENCES sessions(session_id)
-    );
-    """)
-
-    conn.commit()
-    conn.close()
+    with db.write() as conn:
+        migrations.migrate(conn)
 
 
 _init_db()
@@ -90,22 +116,41 @@ class SessionResetRequest(BaseModel):
     session_id: str
 
 
+class DatasetExportRequest(BaseModel):
+    name: str
+    format: str = "ndjson"
+    partition: str = "day"
+    rows_per_partition: int = dataset_export.DEFAULT_ROWS_PER_PARTITION
+    since: Optional[str] = None
+    until: Optional[str] = None
+    path: Optional[str] = None
+    phase: Optional[str] = None
+
+
 @app.post("/v1/session", response_model=SessionCreateResponse)
 def create_session(payload: CoreRequest):
     """
     Creates a new anonymous session_id for demo usage (no login).
     Stores the initial user profile snapshot.
     """
+    return {"session_id": _create_session(payload.user)}
+
+
+def _create_session(user: Dict[str, Any]) -> str:
     session_id = str(uuid.uuid4())
-    conn = _db()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO sessions(session_id, created_at, user_json) VALUES (?, ?, ?)",
-        (session_id, _utc_now_iso(), json.dumps(payload.user or {})),
-    )
-    conn.commit()
-    conn.close()
-    return {"session_id": session_id}
+    created_at = _utc_now_iso()
+    with db.write() as conn:
+        conn.execute(
+            "INSERT INTO sessions(session_id, created_at, user_json) VALUES (?, ?, ?)",
+            (session_id, created_at, json.dumps(user or {})),
+        )
+        session_summary.record_session(conn, session_id, created_at)
+    return session_id
+
+
+def _session_exists(session_id: str) -> bool:
+    with db.read() as conn:
+        return conn.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone() is not None
 
 
 @app.post("/v1/session/reset")
@@ -113,186 +158,412 @@ def reset_session(payload: SessionResetRequest):
     """
     Clears all turns for a session. Keeps the session record.
     """
-    conn = _db()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM turns WHERE session_id = ?", (payload.session_id,))
-    conn.commit()
-    conn.close()
+    with sessions.lock(payload.session_id):
+        _flush_turns()
+        with db.write() as conn:
+            json_blobs.release(conn, "session_id = ?", (payload.session_id,))
+            conn.execute("DELETE FROM turns WHERE session_id = ?", (payload.session_id,))
+            event_log.delete_session(conn, payload.session_id)
+            session_summary.reset_session(conn, payload.session_id, _utc_now_iso())
+        sessions.discard(payload.session_id)
     return {"ok": True, "session_id": payload.session_id}
 
 
 @app.post("/v1/report")
-def v1_report(payload: CoreRequest):
+def v1_report(
+    payload: CoreRequest,
+    profile: Optional[str] = None,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER),
+    accept_encoding: Optional[str] = Header(None),
+):
     """
     Standard report endpoint, now with session logging.
     Expects: context.session_id (optional but recommended for demo).
+
+    With a session_id the turn continues from the state the server holds for
+    the session; context.restart starts the conversation over. Such turns
+    may not carry a context.chat_state (422): the session's state is the
+    server's, not the client's.
+
+    `profile` (minimal | chat | full) selects how much of the envelope is
+    returned; large bodies are gzipped for clients that accept it. See
+    api/responses.py.
+
+    A retry sent with the same Idempotency-Key header (or
+    context.idempotency_key) gets the original response, marked with an
+    Idempotent-Replayed header, instead of running the turn again; see
+    api/idempotency.py.
     """
-    session_id = (payload.context or {}).get("session_id")
+    try:
+        profile = responses.check_profile(profile)
+        key = idempotency.request_key(idempotency_key, payload.context)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    try:
+        result, replayed = _reply(payload.model_dump(), key)
+    except idempotency.KeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    headers = {idempotency.REPLAYED_HEADER: "true"} if replayed else None
+    return responses.render(result, profile, accept_encoding, headers)
+
+
+def _reply(request: Dict[str, Any], key: Optional[str]):
+    """(result, replayed): the turn's result, or the original's for a retry under `key`."""
+    if key is None:
+        return _report(request), False
+    scope = str(request["context"].get("session_id") or "")
+    result, outcome = replies.run(scope, key, idempotency.fingerprint(request), lambda: _report(request))
+    return result, outcome != "miss"
+
+
+# Engine inputs that only the event log's replay may set (api/event_log.py):
+# a client-supplied nlu_results would make the engine take its NLU results
+# as recorded and log them as the turn's.
+_INTERNAL_CONTEXT_KEYS = ("nlu_results", "nlu_record")
+
+
+def _report(request: Dict[str, Any]):
+    for k in _INTERNAL_CONTEXT_KEYS:
+        request["context"].pop(k, None)
+    session_id = request["context"].get("session_id")
+    if not session_id:
+        # If no session_id, we still run but won't log
+        result = generate_report(request)
+        result.setdefault("meta", {})
+        return result
+
+    with sessions.lock(session_id):
+        return _session_turn(request, session_id)
+
 
-    # If no session_id, we still run but won't log
-    result = generate_report(payload.model_dump())
+def _next_state(chat: Dict[str, Any], base: Any):
+    if "state_patch" in chat:
+        return apply_patch(coerce_state(base) or {}, chat["state_patch"], verify=False)
+    return coerce_state(chat.get("state"))
+
+
+def _session_turn(request: Dict[str, Any], session_id: str):
+    user_text = request["context"].get("chat_text") or ""
+    # The event log stores the NLU results the turn used, for replay.
+    request["context"]["nlu_record"] = True
+    if "chat_state" in request["context"]:
+        raise HTTPException(
+            status_code=422, detail="the server holds the state of a session; send context.restart to start it over"
+        )
+    if request["context"].pop("restart", False):
+        request["context"]["chat_state"] = None
+    else:
+        try:
+            request["context"]["chat_state"] = sessions.get(session_id)
+        except event_log.ReplayError as e:
+            raise HTTPException(status_code=409, detail=f"cannot restore session state: {e}")
+    repairs_before = analytics.repair_counts(request["context"].get("chat_state"))
+
+    result = generate_report(request)
 
     # Attach session_id back to client so UI can persist it
     try:
         result.setdefault("meta", {})
-        if session_id:
-            result["meta"]["session_id"] = session_id
+        result["meta"]["session_id"] = session_id
     except Exception:
         pass
 
-    if not session_id:
-        return result
-
     report = (result or {}).get("report") or {}
     chat = report.get("chat") or {}
+    next_state = None
+    if result.get("ok"):
+        next_state = _next_state(chat, request["context"].get("chat_state"))
 
-    user_text = (payload.context or {}).get("chat_text") or ""
     assistant_text = chat.get("assistant_message") or ""
 
-    conn = _db()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO turns(
-            session_id, created_at, user_text, assistant_text,
-            phase, path,
-            flags_json, reasons_json, recommendations_json, trace_json,
-            state_json
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            session_id,
-            _utc_now_iso(),
-            user_text,
-            assistant_text,
-            chat.get("phase"),
-            report.get("path"),
-            json.dumps(report.get("flags", [])),
-            json.dumps(report.get("reasons", [])),
-            json.dumps(report.get("recommendations", [])),
-            json.dumps(report.get("trace", {}), default=str),
-            json.dumps(chat.get("state", {}), default=str),
-        ),
+    row = (
+        session_id,
+        _utc_now_iso(),
+        user_text,
+        assistant_text,
+        chat.get("phase"),
+        report.get("path"),
+        json.dumps(report.get("trace", {}), default=str),
     )
-    conn.commit()
-    conn.close()
+    # flags / reasons / recommendations are stored once per distinct value (json_blobs).
+    shared = {
+        "flags": json.dumps(report.get("flags", [])),
+        "reasons": json.dumps(report.get("reasons", [])),
+        "recommendations": json.dumps(report.get("recommendations", [])),
+    }
+    counted = {
+        "phase": chat.get("phase"),
+        "path": report.get("path"),
+        "nlu_used": (report.get("trace") or {}).get("nlu_used"),
+        "end_reason": (next_state or {}).get("end_reason"),
+        "repairs": analytics.repair_delta(repairs_before, analytics.repair_counts(next_state)),
+    }
+    # The job runs later on the writer thread: give it its own view of the
+    # result, since nlu_results is popped from `chat` below.
+    logged = {"ok": result.get("ok"), "report": {**report, "chat": dict(chat)}}
+
+    def write_turn(conn):
+        refs = json_blobs.put_columns(conn, shared)
+        cur = conn.execute(
+            """
+            INSERT INTO turns(
+                session_id, created_at, user_text, assistant_text,
+                phase, path, trace_json,
+                flags_ref, reasons_ref, recommendations_ref,
+                state_json
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)
+            """,
+            row + (refs["flags_ref"], refs["reasons_ref"], refs["recommendations_ref"]),
+        )
+        analytics.record_turn(conn, session_id, **counted)  # reads the previous summary row
+        session_summary.record_turn(conn, session_id, cur.lastrowid, row[1], row[4], row[5])
+        event_log.append_event(conn, session_id, request, logged, turn_id=cur.lastrowid, encode_state=_state_for_storage)
+
+    if not turn_writer.submit(write_turn) and turn_writer.policy == "block":
+        raise HTTPException(status_code=503, detail="turn log is saturated, retry shortly")
+    # Only a turn that was accepted advances the session (a rejected one is retried from the same state).
+    if result.get("ok"):
+        sessions.put(session_id, next_state)
+
+    chat.pop("nlu_results", None)
 
     return result
 
 
+@app.websocket("/v1/chat")
+async def chat_socket(websocket: WebSocket, session_id: Optional[str] = None, profile: Optional[str] = None):
+    """
+    One session per connection: each text frame is a turn's context fields
+    ({"chat_text": ...}), each reply the /v1/report envelope for `profile`.
+    Without a session_id a new session is created; replies carry it in
+    meta.session_id. An unknown session_id closes the socket (1008). See
+    api/chat_actors.py.
+    """
+    try:
+        profile = responses.check_profile(profile)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    if session_id and not await run_in_threadpool(_session_exists, session_id):
+        await websocket.close(code=1008, reason="session_id not found")
+        return
+    await websocket.accept()
+    if not session_id:
+        session_id = await run_in_threadpool(_create_session, {})
+
+    with chat.connect(session_id, profile) as actor:
+        while True:
+            try:
+                frame = await websocket.receive_text()
+            except WebSocketDisconnect:
+                return
+            # Turns block on the engine and the session lock: keep them off the event loop.
+            await websocket.send_text((await run_in_threadpool(actor.handle, frame)).decode("utf-8"))
+
+
 @app.get("/")
 def root():
     return {
         "ok": True,
         "service": "Soficca Core API",
         "version": "0.1.0",
-        "endpoints": ["/docs", "/v1/session", "/v1/report", "/demo"],
+        "endpoints": ["/docs", "/v1/session", "/v1/report", "/v1/session/{session_id}/state", "/v1/sessions", "/v1/search", "/v1/analytics", "/v1/export/turns.ndjson", "/v1/export/dataset", "/v1/metrics/turn-writer", "/v1/metrics/session-store", "/v1/metrics/idempotency", "/v1/metrics/chat", "/v1/chat", "/metrics", "/demo"],
     }
 
 
+@app.get("/v1/sessions")
+def list_sessions(limit: int = 50, offset: int = 0):
+    """Sessions by most recent activity, from session_summary (no scan of turns)."""
+    if not 1 <= limit <= 500 or offset < 0:
+        raise HTTPException(status_code=422, detail="limit must be 1..500 and offset >= 0")
+    _flush_turns()
+    with db.read() as conn:
+        sessions = session_summary.list_sessions(conn, limit=limit, offset=offset)
+    return {"sessions": sessions, "limit": limit, "offset": offset}
+
+
+@app.get("/v1/metrics/turn-writer")
+def turn_writer_metrics():
+    """Write-behind queue depth, batch sizes, flush latency and drop counters."""
+    return turn_writer.stats()
+
+
+@app.get("/v1/metrics/session-store")
+def session_store_metrics():
+    """In-memory session state cache: hits, misses, evictions and reload latency."""
+    return sessions.stats()
+
+
+@app.get("/v1/metrics/idempotency")
+def idempotency_metrics():
+    """Idempotency-Key replays: computed, replayed and coalesced turns, key reuse."""
+    return replies.stats()
+
+
+@app.get("/v1/metrics/chat")
+def chat_metrics():
+    """WebSocket chat: connected sessions, connections and turns since start."""
+    return chat.stats()
+
+
+@app.get("/v1/search")
+def search_turns(
+    q: str,
+    field: str = "all",
+    path: Optional[str] = None,
+    flag: Optional[str] = None,
+    without_flag: Optional[str] = None,
+    before_id: Optional[int] = None,
+    limit: int = 50,
+):
+    """
+    Full-text search over user and assistant text (FTS5 syntax: "a phrase",
+    prefix*, AND / OR / NOT), newest first. Pass `next_before_id` back as
+    `before_id` for the next page.
+    """
+    _flush_turns()
+    try:
+        with db.read() as conn:
+            return search.search(
+                conn, q, field=field, path=path, flag=flag, without_flag=without_flag, before_id=before_id, limit=limit
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/v1/analytics")
+def analytics_summary():
+    """Funnel, path, end-reason, NLU-usage, escalation and repair counters, maintained per logged turn."""
+    _flush_turns()
+    with db.read() as conn:
+        return analytics.summary(conn)
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus text exposition: request, engine stage, NLU, DB write, cache and session metrics."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/demo", response_class=HTMLResponse)
 def demo():
     html_path = Path(__file__).with_name("demo.html")
     return html_path.read_text(encoding="utf-8")
 
+def _session_row(session_id: str):
+    _flush_turns()
+    with db.read() as conn:
+        s = conn.execute("SELECT session_id, created_at, user_json FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+    if not s:
+        raise HTTPException(status_code=404, detail="session_id not found")
+    return dict(s)
+
+
 @app.get("/v1/session/{session_id}/export.json")
 def export_session_json(session_id: str):
-    conn = _db()
-    cur = conn.cursor()
+    # Streamed from one snapshot; memory does not grow with the session length.
+    return StreamingResponse(exports.session_json(db, _session_row(session_id)), media_type="application/json")
 
-    cur.execute("SELECT session_id, created_at, user_json FROM sessions WHERE session_id = ?", (session_id,))
-    s = cur.fetchone()
-    if not s:
-        conn.close()
-        raise HTTPException(status_code=404, detail="session_id not found")
 
-    cur.execute("""
-        SELECT
-            id, created_at, user_text, assistant_text,
-            phase, path,
-            flags_json, reasons_json, recommendations_json, trace_json,
-            state_json
-        FROM turns
-        WHERE session_id = ?
-        ORDER BY id ASC
-    """, (session_id,))
-    rows = cur.fetchall()
-    conn.close()
-
-    turns = []
-    for r in rows:
-        turns.append({
-            "id": r["id"],
-            "created_at": r["created_at"],
-            "user_text": r["user_text"],
-            "assistant_text": r["assistant_text"],
-            "phase": r["phase"],
-            "path": r["path"],
-            "flags": json.loads(r["flags_json"] or "[]"),
-            "reasons": json.loads(r["reasons_json"] or "[]"),
-            "recommendations": json.loads(r["recommendations_json"] or "[]"),
-            "trace": json.loads(r["trace_json"] or "{}"),
-            "state": json.loads(r["state_json"] or "{}"),
-        })
-
-    payload = {
-        "session_id": s["session_id"],
-        "created_at": s["created_at"],
-        "user": json.loads(s["user_json"] or "{}"),
-        "turns": turns,
-        "turn_count": len(turns),
-    }
-    return JSONResponse(payload)
+@app.get("/v1/session/{session_id}/export.ndjson")
+def export_session_ndjson(session_id: str):
+    _session_row(session_id)
+    return StreamingResponse(exports.session_ndjson(db, session_id), media_type="application/x-ndjson")
 
 
-@app.get("/v1/session/{session_id}/export.csv")
-def export_session_csv(session_id: str):
-    conn = _db()
-    cur = conn.cursor()
+@app.get("/v1/session/{session_id}/state")
+def session_state(session_id: str, turn: Optional[int] = None):
+    """
+    Chat state after logged turn `turn` (1-based, default: the latest),
+    rebuilt from the nearest snapshot by replaying the event log.
+    """
+    _flush_turns()
+    try:
+        with db.read() as conn:
+            turn, state, replayed = event_log.reconstruct(conn, session_id, turn)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="no such session turn")
+    except event_log.ReplayError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"session_id": session_id, "turn": turn, "state": state, "replayed_events": replayed}
 
-    cur.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,))
-    if not cur.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="session_id not found")
 
-    cur.execute("""
-        SELECT
-            id, created_at, user_text, assistant_text,
-            phase, path,
-            flags_json, reasons_json, recommendations_json, trace_json
-        FROM turns
-        WHERE session_id = ?
-        ORDER BY id ASC
-    """, (session_id,))
-    rows = cur.fetchall()
-    conn.close()
-
-    buf = io.StringIO()
-    writer = csv.writer(buf)
-    writer.writerow([
-        "id", "created_at", "user_text", "assistant_text",
-        "phase", "path", "flags", "reasons", "recommendations", "trace"
-    ])
-
-    for r in rows:
-        writer.writerow([
-            r["id"],
-            r["created_at"],
-            r["user_text"],
-            r["assistant_text"],
-            r["phase"],
-            r["path"],
-            r["flags_json"] or "[]",
-            r["reasons_json"] or "[]",
-            r["recommendations_json"] or "[]",
-            r["trace_json"] or "{}",
-        ])
-
-    buf.seek(0)
+@app.get("/v1/session/{session_id}/export.csv")
+def export_session_csv(session_id: str):
+    _session_row(session_id)
     filename = f"pen2_session_{session_id}.csv"
     return StreamingResponse(
-        iter([buf.getvalue()]),
+        exports.session_csv(db, session_id),
         media_type="text/csv",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
 
+
+def _turn_filters(since: Optional[str], until: Optional[str]) -> Dict[str, Any]:
+    try:
+        return {"since": exports.parse_time_bound(since), "until": exports.parse_time_bound(until)}
+    except ValueError:
+        raise HTTPException(status_code=422, detail="since/until must be ISO dates or datetimes")
+
+
+@app.get("/v1/export/turns.ndjson")
+def export_turns_ndjson(since: Optional[str] = None, until: Optional[str] = None):
+    """Turns of all sessions with since <= created_at < until, one JSON object per line."""
+    filters = _turn_filters(since, until)
+    _flush_turns()
+    return StreamingResponse(exports.turns_ndjson(db, **filters), media_type="application/x-ndjson")
+
+
+@app.get("/v1/export/turns.csv")
+def export_turns_csv(since: Optional[str] = None, until: Optional[str] = None):
+    filters = _turn_filters(since, until)
+    _flush_turns()
+    return StreamingResponse(
+        exports.turns_csv(db, **filters),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="pen2_turns.csv"'}
+    )
+
+
+@app.post("/v1/export/dataset", status_code=202)
+def start_dataset_export(payload: DatasetExportRequest):
+    """
+    Starts (or resumes) a partitioned, gzip-compressed export of all turns
+    into SOFICCA_EXPORT_DIR/<name>; see api/dataset_export.py.
+    """
+    try:
+        params = dataset_export.export_params(
+            fmt=payload.format,
+            partition=payload.partition,
+            rows_per_partition=payload.rows_per_partition,
+            since=payload.since,
+            until=payload.until,
+            path=payload.path,
+            phase=payload.phase,
+        )
+        _flush_turns()
+        dataset_jobs.start(payload.name, params)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except dataset_export.ExportError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return dataset_jobs.status(payload.name)
+
+
+@app.get("/v1/export/dataset/{name}")
+def dataset_export_status(name: str):
+    try:
+        status = dataset_jobs.status(name)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if status is None:
+        raise HTTPException(status_code=404, detail="no such export")
+    return status
+
+
+@app.get("/v1/export/dataset/{name}/{file}")
+def dataset_export_file(name: str, file: str):
+    status = dataset_export_status(name)
+    if file not in {c["file"] for c in status["completed"]}:
+        raise HTTPException(status_code=404, detail="no such partition")
+    return FileResponse(dataset_jobs.out_dir(name) / file, media_type="application/gzip", filename=file)
@@ -0,0 +1,121 @@
+# api/chat_actors.py
+"""
+Chat over one WebSocket per session (WebSocket /v1/chat).
+
+Over REST every turn is a new request: HTTP parsing, body validation,
+response encoding and a fresh look-up of the session's state. A socket keeps
+the session open instead. Its `ChatActor` runs the session's turns one at a
+time, in the order they arrive, and keeps the session's state resident: the
+session is pinned in the SessionStore for as long as it is connected, so
+no turn reloads it from the event log, however many other sessions pass
+through the cache.
+
+Each frame from the client is one turn: a JSON object of the context fields
+in FRAME_FIELDS, e.g. {"chat_text": "hi"}; the session_id is the
+connection's, and anything else (chat_state, delta-mode fields, ...) is
+rejected. Each reply is the /v1/report envelope for the connection's
+`profile` (api/responses.py). A frame that cannot be run gets an envelope
+with ok=false and the connection stays open. A connection for a session_id
+the server does not know is closed (1008) before any frame.
+
+Turns are logged exactly as /v1/report logs them: queued to the turn writer
+(api/turn_writer.py), whose write-behind commits and the event log's
+periodic snapshots are the session's checkpoints, so nothing on a turn's
+path waits for SQLite. Turns of a session are serialized with REST turns of
+the same session through the SessionStore's lock.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from fastapi import HTTPException
+
+from api import idempotency, responses
+from api.session_store import SessionStore
+
+# Context fields a frame may carry.
+FRAME_FIELDS = frozenset({"chat_text", "locale", "flow", "debug", "restart", "idempotency_key"})
+
+# (request, idempotency key) -> (result, replayed); the API's turn path.
+Runner = Callable[[Dict[str, Any], Optional[str]], Tuple[Dict[str, Any], bool]]
+
+
+def _error(code: str, message: str, **meta: Any) -> Dict[str, Any]:
+    return {"ok": False, "errors": [{"code": code, "message": message, "path": "$", "meta": meta}]}
+
+
+class ChatActor:
+    """One connected session."""
+
+    def __init__(self, session_id: str, profile: str, run: Runner):
+        self.session_id = session_id
+        self.profile = profile
+        self.turns = 0
+        self._run = run
+
+    def handle(self, frame: str) -> bytes:
+        """Runs the turn in `frame` and returns the encoded reply."""
+        try:
+            context = json.loads(frame)
+        except ValueError:
+            return responses.dumps(_error("INVALID_FRAME", "frame is not valid JSON"))
+        if not isinstance(context, dict):
+            return responses.dumps(_error("INVALID_FRAME", "frame must be a JSON object of context fields"))
+        unknown = sorted(set(context) - FRAME_FIELDS)
+        if unknown:
+            return responses.dumps(_error("INVALID_FRAME", "frame has fields a turn may not set", fields=unknown))
+
+        context["session_id"] = self.session_id
+        try:
+            key = idempotency.request_key(None, context)
+        except ValueError as e:
+            return responses.dumps(_error("INVALID_IDEMPOTENCY_KEY", str(e)))
+        try:
+            result, replayed = self._run({"user": {}, "measurements": [], "context": context}, key)
+        except idempotency.KeyReused as e:
+            return responses.dumps(_error("INVALID_IDEMPOTENCY_KEY", str(e)))
+        except HTTPException as e:
+            return responses.dumps(_error("TURN_REJECTED", str(e.detail), status=e.status_code))
+        self.turns += 1
+
+        out = responses.shape(result, self.profile)
+        if replayed:
+            out = {**out, "meta": {**(out.get("meta") or {}), "idempotent_replayed": True}}
+        return responses.dumps(out)
+
+
+class ChatActors:
+    """The connected sessions of this process."""
+
+    def __init__(self, sessions: SessionStore, run: Runner):
+        self._sessions = sessions
+        self._run = run
+        self._actors: Dict[int, ChatActor] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"connections": 0, "turns": 0}
+
+    @contextmanager
+    def connect(self, session_id: str, profile: str) -> Iterator[ChatActor]:
+        actor = ChatActor(session_id, profile, self._run)
+        self._sessions.pin(session_id)
+        with self._lock:
+            self._actors[id(actor)] = actor
+            self._stats["connections"] += 1
+        try:
+            yield actor
+        finally:
+            with self._lock:
+                del self._actors[id(actor)]
+                self._stats["turns"] += actor.turns
+            self._sessions.unpin(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["connected"] = len(self._actors)
+            out["turns"] += sum(a.turns for a in self._actors.values())
+        return out
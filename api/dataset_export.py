@@ -0,0 +1,361 @@
+# api/dataset_export.py
+"""
+Bulk dataset export of every logged turn.
+
+Writes the `turns` table (optionally filtered by time, path or phase) as
+gzip-compressed NDJSON or CSV partitions, one per UTC day or per N turns:
+
+    python -m api.dataset_export OUT_DIR --format ndjson --partition day
+    python -m api.dataset_export OUT_DIR --format csv --partition rows --rows 100000 --since 2026-01-01
+
+Partitions are planned up front (day boundaries, or id ranges of N turns)
+and written by a process pool; each worker reads its partition from its own
+read-only connection and writes `<file>.tmp`, renamed into place when done.
+OUT_DIR/_manifest.json records the parameters, the plan and every completed
+partition, and is rewritten after each one. Running the same export again
+skips completed partitions, so an interrupted job resumes where it stopped;
+turns logged after the plan was made are left for the next export.
+
+Rows are encoded like the bulk exports (api/exports.py): with session_id,
+without chat state. Gzip members are written with mtime 0, so re-exporting
+unchanged data gives identical files.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from api import exports
+from api.db import DB_PATH
+
+FORMATS = ("ndjson", "csv")
+PARTITIONINGS = ("day", "rows")
+DEFAULT_ROWS_PER_PARTITION = 100_000
+GZIP_LEVEL = int(os.getenv("SOFICCA_EXPORT_GZIP_LEVEL", "6"))
+MANIFEST = "_manifest.json"
+# Where API-triggered exports are written (one subdirectory per export name).
+EXPORT_DIR = Path(os.getenv("SOFICCA_EXPORT_DIR") or Path(__file__).with_name("dataset_exports"))
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+
+class ExportError(RuntimeError):
+    pass
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _connect_ro(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# -----------------------------
+# Planning
+# -----------------------------
+def _filter_sql(params: Dict[str, Any]) -> tuple:
+    where, args = [], []
+    for clause, key in (("created_at >= ?", "since"), ("created_at < ?", "until"), ("path = ?", "path"), ("phase = ?", "phase")):
+        if params.get(key):
+            where.append(clause)
+            args.append(params[key])
+    return (" WHERE " + " AND ".join(where)) if where else "", args
+
+
+def plan_partitions(conn: sqlite3.Connection, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    where, args = _filter_sql(params)
+    # Turns logged after planning are left out, also of partitions written later.
+    last = conn.execute(f"SELECT MAX(id) FROM turns{where}", args).fetchone()[0]
+    if params["partition"] == "day":
+        rows = conn.execute(
+            f"SELECT substr(created_at, 1, 10) AS day, COUNT(*) FROM turns{where} GROUP BY day ORDER BY day", args
+        ).fetchall()
+        plan = []
+        for day, count in rows:
+            start = date.fromisoformat(day)
+            plan.append(
+                {
+                    "name": day,
+                    "since": f"{start.isoformat()}T00:00:00+00:00",
+                    "until": f"{(start + timedelta(days=1)).isoformat()}T00:00:00+00:00",
+                    "max_id": last,
+                    "planned_rows": count,
+                }
+            )
+        return plan
+
+    n = params["rows_per_partition"]
+    # The first id of every n-th turn; each partition runs to the next one.
+    starts = [
+        r[0]
+        for r in conn.execute(
+            f"SELECT id FROM (SELECT id, ROW_NUMBER() OVER (ORDER BY id) AS rn FROM turns{where}) WHERE (rn - 1) % ? = 0 ORDER BY id",
+            args + [n],
+        )
+    ]
+    plan = []
+    for i, first in enumerate(starts):
+        end = starts[i + 1] - 1 if i + 1 < len(starts) else last
+        plan.append({"name": f"{first:012d}", "min_id": first, "max_id": end, "planned_rows": n if i + 1 < len(starts) else None})
+    return plan
+
+
+# -----------------------------
+# Worker side
+# -----------------------------
+_worker_db_path: Optional[Path] = None
+
+
+def _init_worker(db_path: Path) -> None:
+    global _worker_db_path
+    _worker_db_path = db_path
+
+
+def _write_partition(out_dir: str, params: Dict[str, Any], part: Dict[str, Any]) -> Dict[str, Any]:
+    assert _worker_db_path is not None
+    filters = {
+        "path": params.get("path"),
+        "phase": params.get("phase"),
+        "since": params.get("since"),
+        "until": params.get("until"),
+        "min_id": part.get("min_id"),
+        "max_id": part.get("max_id"),
+    }
+    if "since" in part:
+        # Intersect the day with the export's own time range (same ISO format, so string order works).
+        filters["since"] = max(filter(None, (filters["since"], part["since"])))
+        filters["until"] = min(filter(None, (filters["until"], part["until"])))
+
+    fmt = params["format"]
+    target = Path(out_dir) / f"turns-{part['name']}.{fmt}.gz"
+    tmp = target.with_name(target.name + ".tmp")
+    rows = 0
+
+    def counted(it):
+        nonlocal rows
+        for row in it:
+            rows += 1
+            yield row
+
+    conn = _connect_ro(_worker_db_path)
+    try:
+        conn.execute("BEGIN")
+        turns = counted(exports.all_turns(conn, **filters))
+        chunks = exports.ndjson_rows(turns) if fmt == "ndjson" else exports.csv_rows(turns, with_session=True)
+        with open(tmp, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) as gz:
+            for chunk in chunks:
+                gz.write(chunk.encode("utf-8"))
+    finally:
+        conn.close()
+    os.replace(tmp, target)
+    return {"name": part["name"], "file": target.name, "rows": rows, "bytes": target.stat().st_size}
+
+
+# -----------------------------
+# Driver
+# -----------------------------
+def _write_manifest(out_dir: Path, manifest: Dict[str, Any]) -> None:
+    tmp = out_dir / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, out_dir / MANIFEST)
+
+
+def read_manifest(out_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((Path(out_dir) / MANIFEST).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def export_params(
+    *,
+    fmt: str = "ndjson",
+    partition: str = "day",
+    rows_per_partition: int = DEFAULT_ROWS_PER_PARTITION,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    path: Optional[str] = None,
+    phase: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Validated, normalized export parameters (ValueError on bad input)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    if partition not in PARTITIONINGS:
+        raise ValueError(f"partition must be one of {PARTITIONINGS}")
+    if rows_per_partition < 1:
+        raise ValueError("rows_per_partition must be >= 1")
+    return {
+        "format": fmt,
+        "partition": partition,
+        "rows_per_partition": rows_per_partition if partition == "rows" else None,
+        "since": exports.parse_time_bound(since),
+        "until": exports.parse_time_bound(until),
+        "path": path or None,
+        "phase": phase or None,
+    }
+
+
+def run_export(
+    db_path: Path,
+    out_dir: Path,
+    params: Dict[str, Any],
+    *,
+    workers: Optional[int] = None,
+    on_partition: Callable[[Dict[str, Any]], None] = lambda done: None,
+) -> Dict[str, Any]:
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = read_manifest(out_dir)
+    if manifest is not None and manifest.get("params") != params:
+        raise ExportError(f"{out_dir} holds an export with other parameters; use another directory")
+    if manifest is None:
+        conn = _connect_ro(db_path)
+        try:
+            plan = plan_partitions(conn, params)
+        finally:
+            conn.close()
+        manifest = {"params": params, "partitions": plan, "completed": {}, "complete": False, "started_at": _utc_now_iso()}
+        _write_manifest(out_dir, manifest)
+
+    completed = manifest["completed"]
+    todo = [p for p in manifest["partitions"] if not (p["name"] in completed and (out_dir / completed[p["name"]]["file"]).exists())]
+    for stale in out_dir.glob("*.tmp"):
+        stale.unlink()
+
+    if todo:
+        workers = workers or min(len(todo), os.cpu_count() or 1)
+        # spawn, not fork: the API server calls this with live threads (turn writer, pool).
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(db_path,)) as pool:
+            futures = [pool.submit(_write_partition, str(out_dir), params, part) for part in todo]
+            for fut in as_completed(futures):
+                done = fut.result()
+                completed[done["name"]] = done
+                _write_manifest(out_dir, manifest)
+                on_partition(done)
+
+    manifest["complete"] = True
+    manifest["finished_at"] = _utc_now_iso()
+    manifest["rows"] = sum(c["rows"] for c in completed.values())
+    manifest["bytes"] = sum(c["bytes"] for c in completed.values())
+    _write_manifest(out_dir, manifest)
+    return manifest
+
+
+# -----------------------------
+# Background jobs (API)
+# -----------------------------
+class ExportJobs:
+    """Exports started from the API, run on background threads; one per name under `root`."""
+
+    def __init__(self, db_path: Path, root: Path = EXPORT_DIR):
+        self.db_path = Path(db_path)
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._threads: Dict[str, threading.Thread] = {}
+        self._errors: Dict[str, str] = {}
+
+    def out_dir(self, name: str) -> Path:
+        if not _NAME_RE.match(name or ""):
+            raise ValueError("export name must be 1-64 of [A-Za-z0-9_.-], starting alphanumeric")
+        return self.root / name
+
+    def start(self, name: str, params: Dict[str, Any], *, workers: Optional[int] = None) -> bool:
+        """Start (or resume) export `name`. False if it is already running; ExportError on a parameter clash."""
+        out_dir = self.out_dir(name)
+        manifest = read_manifest(out_dir)
+        if manifest is not None and manifest.get("params") != params:
+            raise ExportError(f"export {name!r} exists with other parameters")
+        with self._lock:
+            running = self._threads.get(name)
+            if running is not None and running.is_alive():
+                return False
+            self._errors.pop(name, None)
+            thread = threading.Thread(target=self._run, args=(name, out_dir, params, workers), name=f"export-{name}", daemon=True)
+            self._threads[name] = thread
+        thread.start()
+        return True
+
+    def _run(self, name: str, out_dir: Path, params: Dict[str, Any], workers: Optional[int]) -> None:
+        try:
+            run_export(self.db_path, out_dir, params, workers=workers)
+        except Exception as e:  # surfaced through status()
+            with self._lock:
+                self._errors[name] = f"{type(e).__name__}: {e}"
+
+    def status(self, name: str) -> Optional[Dict[str, Any]]:
+        manifest = read_manifest(self.out_dir(name))
+        with self._lock:
+            thread = self._threads.get(name)
+            error = self._errors.get(name)
+        if manifest is None and thread is None:
+            return None
+        manifest = manifest or {}
+        return {
+            "name": name,
+            "running": bool(thread and thread.is_alive()),
+            "error": error,
+            "complete": bool(manifest.get("complete")),
+            "params": manifest.get("params"),
+            "partitions": len(manifest.get("partitions") or []),
+            "completed": sorted((manifest.get("completed") or {}).values(), key=lambda c: c["name"]),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export all logged turns as gzip-compressed NDJSON/CSV partitions.")
+    parser.add_argument("out_dir", help="Output directory (re-run with the same arguments to resume).")
+    parser.add_argument("--db", default=str(DB_PATH), help="Path to the API SQLite database.")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--partition", choices=PARTITIONINGS, default="day", help="One partition per UTC day, or per --rows turns.")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS_PER_PARTITION, help="Turns per partition with --partition rows.")
+    parser.add_argument("--since", default=None, help="Only turns at or after this ISO date/datetime (UTC).")
+    parser.add_argument("--until", default=None, help="Only turns before this ISO date/datetime (UTC).")
+    parser.add_argument("--path", default=None, help="Only turns with this decision path.")
+    parser.add_argument("--phase", default=None, help="Only turns in this chat phase.")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count).")
+    args = parser.parse_args(argv)
+
+    try:
+        params = export_params(
+            fmt=args.format,
+            partition=args.partition,
+            rows_per_partition=args.rows,
+            since=args.since,
+            until=args.until,
+            path=args.path,
+            phase=args.phase,
+        )
+        manifest = run_export(
+            Path(args.db),
+            Path(args.out_dir),
+            params,
+            workers=args.workers,
+            on_partition=lambda done: print(f"{done['file']}: {done['rows']} turns, {done['bytes']} bytes", file=sys.stderr),
+        )
+    except (ValueError, ExportError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    print(json.dumps({k: manifest[k] for k in ("rows", "bytes", "started_at", "finished_at")}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
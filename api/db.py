@@ -0,0 +1,117 @@
+# api/db.py
+"""
+SQLite connection management for the API.
+
+One long-lived connection per thread (FastAPI runs sync endpoints on a
+bounded thread pool), opened with:
+
+- WAL journal mode: readers never block the writer and vice versa
+- synchronous=NORMAL: fsync at checkpoints, not on every commit (safe
+  against application crashes; the last commits may be lost on power loss)
+- a per-connection prepared-statement cache
+- a busy timeout, so concurrent writers queue instead of failing
+- incremental auto-vacuum on new databases, so api.retention can return
+  freed pages in small steps
+
+Writes run in `BEGIN IMMEDIATE` transactions (`with db.write() as conn`);
+reads run in one deferred transaction (`with db.read() as conn`), which in
+WAL mode is a consistent snapshot for its whole duration.
+
+Configuration:
+    SOFICCA_DB_PATH                database file (default api/soficca_demo.sqlite)
+    SOFICCA_DB_BUSY_TIMEOUT_MS     busy timeout (default 5000)
+    SOFICCA_DB_STATEMENT_CACHE     cached statements per connection (default 128)
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Union
+
+DB_PATH = Path(os.getenv("SOFICCA_DB_PATH") or Path(__file__).with_name("soficca_demo.sqlite"))
+BUSY_TIMEOUT_MS = int(os.getenv("SOFICCA_DB_BUSY_TIMEOUT_MS", "5000"))
+STATEMENT_CACHE = int(os.getenv("SOFICCA_DB_STATEMENT_CACHE", "128"))
+
+
+class ConnectionManager:
+    def __init__(self, path: Union[str, Path] = DB_PATH):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: List[sqlite3.Connection] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,  # transactions are explicit, see write()/read()
+            check_same_thread=False,  # only so close_all() can run from another thread
+            cached_statements=STATEMENT_CACHE,
+        )
+        conn.row_factory = sqlite3.Row
+        # Only takes effect on a new database (existing ones: api.retention --enable-incremental-vacuum).
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        conn = self.connection()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """
+        A read transaction on a dedicated connection. For generators that may be
+        resumed on other threads (streaming responses), where the calling
+        thread's connection could be in use by another request meanwhile.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+            with self._lock:
+                if conn in self._all:
+                    self._all.remove(conn)
+            conn.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
@@ -0,0 +1,237 @@
+# api/event_log.py
+"""
+Event-sourced session log.
+
+Each turn is stored as an append-only event: the request inputs (minus the
+chat state) and the NLU results the engine actually used. The chat state is
+not stored per turn; it is a deterministic function of the events:
+
+    state after event k = generate_report(inputs_k, chat_state=input state of k,
+                                          nlu_results=nlu_k).chat.state
+
+Snapshots of the *input* state of an event are kept
+
+- every SNAPSHOT_EVERY events (seq 1, N+1, 2N+1, ...), and
+- whenever a turn's input state is not the previous event's output (the
+  chain diverged, e.g. a restart, or a turn the writer dropped).
+
+Reconstructing any turn therefore replays at most SNAPSHOT_EVERY events from
+the nearest snapshot. Every replayed state is checked against the checksum
+logged with its event, and a replay that needs an NLU result the event did
+not record fails rather than asking the NLU again: either way the replay
+raises ReplayError instead of returning a state the session never had.
+
+Replays pin the ruleset version the turn ran with. The artefact of every
+version a logged turn used is stored once in `ruleset_artefacts`, and a
+replay registers it from there when the ruleset registry does not know the
+version (hot-swapped out before a restart, or never registered), so a
+ruleset bump does not strand the sessions that started before it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from soficca_core.engine import generate_report
+from soficca_core.ruleset_registry import REGISTRY, UnknownRuleset
+from soficca_core.state_codec import coerce_state, loads_state
+from soficca_core.state_delta import state_checksum
+
+SNAPSHOT_EVERY = max(1, int(os.getenv("SOFICCA_SNAPSHOT_EVERY", "10")))
+
+# Context keys that describe transport, not the turn itself.
+_TRANSPORT_KEYS = {"chat_state", "state_format", "state_delta", "state_checksum", "nlu_record", "nlu_results", "session_id"}
+
+
+class ReplayError(RuntimeError):
+    pass
+
+
+def _store_ruleset(conn: sqlite3.Connection, version: Optional[str]) -> None:
+    if not version or conn.execute("SELECT 1 FROM ruleset_artefacts WHERE version = ?", (version,)).fetchone():
+        return
+    try:
+        definition = REGISTRY.get(version).definition
+    except UnknownRuleset:
+        return
+    if definition is not None:
+        conn.execute(
+            "INSERT OR IGNORE INTO ruleset_artefacts(version, definition_json) VALUES (?, ?)",
+            (version, json.dumps(definition, separators=(",", ":"))),
+        )
+
+
+def _ensure_ruleset(conn: sqlite3.Connection, version: Optional[str]) -> None:
+    """Registers a stored artefact for `version` if the registry cannot resolve it."""
+    if not version:
+        return
+    try:
+        REGISTRY.get(version)
+        return
+    except UnknownRuleset:
+        pass
+    try:
+        row = conn.execute("SELECT definition_json FROM ruleset_artefacts WHERE version = ?", (version,)).fetchone()
+    except sqlite3.Error:  # a database from before the table existed
+        row = None
+    if row is None:
+        raise ReplayError(f"ruleset {version} is neither registered nor stored in the event log")
+    REGISTRY.register(version, json.loads(row[0]))
+
+
+def _output_checksum(chat: Dict[str, Any]) -> Optional[str]:
+    patch = chat.get("state_patch")
+    if patch is not None:
+        return patch.get("checksum")
+    return state_checksum(coerce_state(chat.get("state")) or {})
+
+
+# -----------------------------
+# Writing
+# -----------------------------
+def append_event(
+    conn: sqlite3.Connection,
+    session_id: str,
+    payload: Dict[str, Any],
+    result: Dict[str, Any],
+    *,
+    turn_id: Optional[int] = None,
+    encode_state: Callable[[Any], str] = lambda s: json.dumps(s, default=str),
+) -> Optional[int]:
+    """
+    Log one turn. `payload` is the request as sent (with context.nlu_record
+    set), `result` the engine output. Failed turns change no state and are
+    not logged. Returns the event seq.
+    """
+    report = (result or {}).get("report") or {}
+    chat = report.get("chat") or {}
+    if not result.get("ok") or "nlu_results" not in chat:
+        return None
+
+    context = payload.get("context") or {}
+    incoming = coerce_state(context.get("chat_state")) or None
+
+    last = conn.execute(
+        "SELECT seq, state_checksum FROM turn_events WHERE session_id = ? ORDER BY seq DESC LIMIT 1",
+        (session_id,),
+    ).fetchone()
+    seq = (last[0] + 1) if last else 1
+    if last:
+        diverged = state_checksum(incoming or {}) != last[1]
+    else:
+        diverged = incoming is not None
+
+    if diverged or (seq - 1) % SNAPSHOT_EVERY == 0:
+        conn.execute(
+            "INSERT OR REPLACE INTO state_snapshots(session_id, seq, state_json) VALUES (?, ?, ?)",
+            (session_id, seq, encode_state(incoming) if incoming is not None else None),
+        )
+
+    turn_context = {k: v for k, v in context.items() if k not in _TRANSPORT_KEYS}
+    turn_context["ruleset_version"] = report.get("ruleset_version")
+    _store_ruleset(conn, turn_context["ruleset_version"])
+    inputs = {"user": payload.get("user") or {}, "measurements": payload.get("measurements") or [], "context": turn_context}
+
+    conn.execute(
+        """
+        INSERT INTO turn_events(session_id, seq, turn_id, created_at, input_json, nlu_json, state_checksum)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            session_id,
+            seq,
+            turn_id,
+            datetime.now(timezone.utc).isoformat(),
+            json.dumps(inputs, separators=(",", ":"), default=str),
+            json.dumps(chat["nlu_results"], separators=(",", ":"), default=str),
+            _output_checksum(chat),
+        ),
+    )
+    return seq
+
+
+def delete_session(conn: sqlite3.Connection, session_id: str) -> None:
+    conn.execute("DELETE FROM turn_events WHERE session_id = ?", (session_id,))
+    conn.execute("DELETE FROM state_snapshots WHERE session_id = ?", (session_id,))
+
+
+# -----------------------------
+# Reconstruction
+# -----------------------------
+def replay_event(inputs: Dict[str, Any], nlu_results: List[Dict[str, Any]], state: Any) -> Dict[str, Any]:
+    context = dict(inputs.get("context") or {})
+    context.update({"chat_state": state, "nlu_results": nlu_results})
+    res = generate_report({"user": inputs.get("user") or {}, "measurements": inputs.get("measurements") or [], "context": context})
+    if not res.get("ok"):
+        raise ReplayError(f"replay failed: {res.get('errors')}")
+    return res["report"]["chat"]["state"]
+
+
+def _replay(
+    conn: sqlite3.Connection, session_id: str, start: int, end: Optional[int]
+) -> Iterator[Tuple[int, Optional[int], Dict[str, Any]]]:
+    end = end if end is not None else 2**62
+    snapshots = dict(
+        conn.execute(
+            "SELECT seq, state_json FROM state_snapshots WHERE session_id = ? AND seq >= ? AND seq <= ?",
+            (session_id, start, end),
+        ).fetchall()
+    )
+    cur = conn.execute(
+        """
+        SELECT seq, turn_id, input_json, nlu_json, state_checksum FROM turn_events
+        WHERE session_id = ? AND seq >= ? AND seq <= ?
+        ORDER BY seq ASC
+        """,
+        (session_id, start, end),
+    )
+    state = None
+    versions = set()
+    for seq, turn_id, input_json, nlu_json, checksum in cur:
+        if seq in snapshots:
+            raw = snapshots[seq]
+            state = loads_state(raw) if raw is not None else None
+        inputs = json.loads(input_json)
+        version = (inputs.get("context") or {}).get("ruleset_version")
+        if version not in versions:
+            _ensure_ruleset(conn, version)
+            versions.add(version)
+        state = replay_event(inputs, json.loads(nlu_json), state)
+        if checksum is not None and state_checksum(coerce_state(state) or {}) != checksum:
+            raise ReplayError(f"replayed state of event {seq} does not match its logged checksum")
+        yield seq, turn_id, state
+
+
+def iter_states(conn: sqlite3.Connection, session_id: str) -> Iterator[Tuple[int, Optional[int], Dict[str, Any]]]:
+    """(seq, turn_id, state after the event) for every event of a session, in one pass."""
+    return _replay(conn, session_id, 1, None)
+
+
+def reconstruct(conn: sqlite3.Connection, session_id: str, seq: Optional[int] = None) -> Tuple[int, Dict[str, Any], int]:
+    """
+    (seq, state after event `seq`, number of events replayed to get it);
+    `seq` defaults to the last event. KeyError if the session has no such event.
+    """
+    if seq is None:
+        row = conn.execute("SELECT MAX(seq) FROM turn_events WHERE session_id = ?", (session_id,)).fetchone()
+        seq = row[0] if row else None
+    if not seq or seq < 1:
+        raise KeyError(session_id)
+
+    row = conn.execute(
+        "SELECT MAX(seq) FROM state_snapshots WHERE session_id = ? AND seq <= ?",
+        (session_id, seq),
+    ).fetchone()
+    start = row[0] if row and row[0] else 1
+
+    state = None
+    replayed = 0
+    for event_seq, _, state in _replay(conn, session_id, start, seq):
+        replayed += 1
+    if replayed == 0 or event_seq != seq:
+        raise KeyError(session_id)
+    return seq, state, replayed
@@ -0,0 +1,271 @@
+# api/exports.py
+"""
+Streaming turn exports.
+
+Every export is a generator of text chunks fed to a StreamingResponse, so
+memory stays flat however many turns are exported:
+
+- rows are read with cursor.fetchmany (SOFICCA_EXPORT_BATCH rows at a time)
+  inside one snapshot transaction on a dedicated connection (db.snapshot)
+- the stored *_json columns are spliced into the output as-is instead of
+  being parsed and re-serialized
+- per-turn chat states are rebuilt by a single lazy replay of the event log,
+  advanced in step with the turn cursor; if the replay fails, the remaining
+  turns are exported with `"state":null` and the error in `"state_error"`,
+  so the document stays valid
+- output is buffered into chunks of about CHUNK_BYTES
+
+Formats: one JSON document per session (same shape as before), NDJSON (one
+turn per line) and CSV. The bulk exports cover all sessions, filtered by
+turn time, and do not include chat state.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from api import event_log, json_blobs
+from api.db import ConnectionManager
+from soficca_core.state_codec import loads_state
+
+EXPORT_BATCH = int(os.getenv("SOFICCA_EXPORT_BATCH", "500"))
+CHUNK_BYTES = 64 * 1024
+
+CSV_HEADER = ["id", "created_at", "user_text", "assistant_text", "phase", "path", "flags", "reasons", "recommendations", "trace"]
+
+# Deduplicated JSON columns are resolved through json_blobs (same *_json names).
+_TURN_SELECT = f"""
+    SELECT
+        turns.id, turns.session_id, turns.created_at, turns.user_text, turns.assistant_text,
+        turns.phase, turns.path,
+        {json_blobs.TURN_JSON_COLUMNS}, turns.trace_json,
+        turns.state_json
+    FROM {json_blobs.TURN_JSON_JOIN}
+"""
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def parse_time_bound(value: Optional[str]) -> Optional[str]:
+    """ISO date/datetime -> the UTC isoformat turns.created_at is stored in (naive = UTC)."""
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+# -----------------------------
+# Row iteration
+# -----------------------------
+def iter_rows(conn: sqlite3.Connection, sql: str, params: Iterable[Any] = (), batch_size: int = EXPORT_BATCH) -> Iterator[sqlite3.Row]:
+    cur = conn.execute(sql, tuple(params))
+    try:
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        cur.close()
+
+
+def session_turns(conn: sqlite3.Connection, session_id: str) -> Iterator[sqlite3.Row]:
+    return iter_rows(conn, f"{_TURN_SELECT} WHERE turns.session_id = ? ORDER BY turns.id ASC", (session_id,))
+
+
+def all_turns(
+    conn: sqlite3.Connection,
+    *,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    path: Optional[str] = None,
+    phase: Optional[str] = None,
+    min_id: Optional[int] = None,
+    max_id: Optional[int] = None,
+) -> Iterator[sqlite3.Row]:
+    """Turns of every session with since <= created_at < until (and the given path/phase/id range), in time order."""
+    where, params = [], []
+    filters = (
+        ("turns.created_at >= ?", since),
+        ("turns.created_at < ?", until),
+        ("turns.path = ?", path),
+        ("turns.phase = ?", phase),
+        ("turns.id >= ?", min_id),
+        ("turns.id <= ?", max_id),
+    )
+    for clause, value in filters:
+        if value is not None and value != "":
+            where.append(clause)
+            params.append(value)
+    sql = _TURN_SELECT
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return iter_rows(conn, sql + " ORDER BY turns.created_at, turns.id", params)
+
+
+def with_states(
+    conn: sqlite3.Connection, session_id: str, rows: Iterable[sqlite3.Row]
+) -> Iterator[Tuple[sqlite3.Row, str, Optional[str]]]:
+    """
+    (row, state as JSON text, replay error). The event log is only replayed if
+    a row has no stored state; once the replay fails, such rows get "null" and
+    the error instead.
+    """
+    events = None
+    pending = None
+    error = None
+    try:
+        for row in rows:
+            raw = row["state_json"]
+            if raw is not None:
+                # JSON-stored states are spliced as-is; binary tokens are decoded.
+                yield row, raw if raw.startswith("{") else _dumps(loads_state(raw)), None
+                continue
+            if error is None:
+                try:
+                    if events is None:
+                        events = event_log.iter_states(conn, session_id)
+                        pending = next(events, None)
+                    # Events and turns are both in write order; skip events of deleted turns.
+                    while pending is not None and (pending[1] is None or pending[1] < row["id"]):
+                        pending = next(events, None)
+                except event_log.ReplayError as e:
+                    error = str(e)
+            if error is not None:
+                yield row, "null", error
+            elif pending is not None and pending[1] == row["id"]:
+                yield row, _dumps(pending[2]), None
+            else:
+                yield row, "{}", None
+    finally:
+        if events is not None:
+            events.close()
+
+
+# -----------------------------
+# Encoding
+# -----------------------------
+def turn_json(row: sqlite3.Row, state: Optional[str] = None, *, with_session: bool = False, state_error: Optional[str] = None) -> str:
+    out = f'{{"id":{row["id"]},'
+    if with_session:
+        out += f'"session_id":{_dumps(row["session_id"])},'
+    out += (
+        f'"created_at":{_dumps(row["created_at"])},'
+        f'"user_text":{_dumps(row["user_text"])},'
+        f'"assistant_text":{_dumps(row["assistant_text"])},'
+        f'"phase":{_dumps(row["phase"])},'
+        f'"path":{_dumps(row["path"])},'
+        f'"flags":{row["flags_json"] or "[]"},'
+        f'"reasons":{row["reasons_json"] or "[]"},'
+        f'"recommendations":{row["recommendations_json"] or "[]"},'
+        f'"trace":{row["trace_json"] or "{}"}'
+    )
+    if state is not None:
+        out += f',"state":{state}'
+    if state_error is not None:
+        out += f',"state_error":{_dumps(state_error)}'
+    return out + "}"
+
+
+def _chunked(parts: Iterable[str], size: int = CHUNK_BYTES) -> Iterator[str]:
+    buf, n = [], 0
+    for part in parts:
+        buf.append(part)
+        n += len(part)
+        if n >= size:
+            yield "".join(buf)
+            buf, n = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+def ndjson_rows(rows: Iterable[sqlite3.Row]) -> Iterator[str]:
+    """Bulk NDJSON (turns with session_id, no state); one chunk per CHUNK_BYTES."""
+    return _chunked(turn_json(row, with_session=True) + "\n" for row in rows)
+
+
+def csv_rows(rows: Iterable[sqlite3.Row], *, with_session: bool = False) -> Iterator[str]:
+    """CSV text, header first; one chunk per CHUNK_BYTES."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["session_id"] + CSV_HEADER if with_session else CSV_HEADER)
+    for r in rows:
+        writer.writerow(
+            ([r["session_id"]] if with_session else [])
+            + [
+                r["id"],
+                r["created_at"],
+                r["user_text"],
+                r["assistant_text"],
+                r["phase"],
+                r["path"],
+                r["flags_json"] or "[]",
+                r["reasons_json"] or "[]",
+                r["recommendations_json"] or "[]",
+                r["trace_json"] or "{}",
+            ]
+        )
+        if buf.tell() >= CHUNK_BYTES:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+# -----------------------------
+# Streams
+# -----------------------------
+def session_json(db: ConnectionManager, session: Dict[str, Any]) -> Iterator[str]:
+    """{"session_id", "created_at", "user", "turns": [...], "turn_count"} for one session row."""
+    session_id = session["session_id"]
+
+    def parts():
+        yield (
+            f'{{"session_id":{_dumps(session_id)},"created_at":{_dumps(session["created_at"])},'
+            f'"user":{session["user_json"] or "{}"},"turns":['
+        )
+        n = 0
+        # Cursors are closed before the snapshot's connection, even if the client goes away.
+        with db.snapshot() as conn, closing(session_turns(conn, session_id)) as rows:
+            for row, state, error in with_states(conn, session_id, rows):
+                yield ("," if n else "") + turn_json(row, state, state_error=error)
+                n += 1
+        yield f'],"turn_count":{n}}}'
+
+    return _chunked(parts())
+
+
+def session_ndjson(db: ConnectionManager, session_id: str) -> Iterator[str]:
+    def parts():
+        with db.snapshot() as conn, closing(session_turns(conn, session_id)) as rows:
+            for row, state, error in with_states(conn, session_id, rows):
+                yield turn_json(row, state, state_error=error) + "\n"
+
+    return _chunked(parts())
+
+
+def session_csv(db: ConnectionManager, session_id: str) -> Iterator[str]:
+    with db.snapshot() as conn, closing(session_turns(conn, session_id)) as rows:
+        yield from csv_rows(rows)
+
+
+def turns_ndjson(db: ConnectionManager, **filters: Any) -> Iterator[str]:
+    with db.snapshot() as conn, closing(all_turns(conn, **filters)) as rows:
+        yield from ndjson_rows(rows)
+
+
+def turns_csv(db: ConnectionManager, **filters: Any) -> Iterator[str]:
+    with db.snapshot() as conn, closing(all_turns(conn, **filters)) as rows:
+        yield from csv_rows(rows, with_session=True)
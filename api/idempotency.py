@@ -0,0 +1,178 @@
+# api/idempotency.py
+"""
+Idempotency keys for /v1/report.
+
+Mobile clients retry a turn when the response is lost. Without a key each
+retry runs generate_report again (including paid NLU calls), logs another
+row in `turns` and advances the session a second time. A client that sends
+an `Idempotency-Key` header (or `context.idempotency_key`) with a turn gets
+the first response back for every retry of it:
+
+- completed: the stored result is returned as is, nothing is recomputed
+- in flight: the retry waits for the original and returns its result
+  (concurrent duplicates are coalesced into one computation)
+- failed (an exception, e.g. 409 / 503): nothing is stored; a waiting or
+  later retry runs the turn itself
+
+Keys are scoped by session_id, so clients only need them unique per session.
+Reusing a key for a different request is a client bug and raises KeyReused
+(422) rather than returning a response for something else. Responses are
+kept in memory for SOFICCA_IDEMPOTENCY_TTL_S after they complete, per
+process: a retry that arrives later, or at another worker, runs the turn
+again. Turns still in flight are never expired or evicted, so a duplicate
+always finds its original while it runs.
+
+Configuration:
+    SOFICCA_IDEMPOTENCY_TTL_S           how long a response is replayed (default 600)
+    SOFICCA_IDEMPOTENCY_MAX_ENTRIES     responses kept, oldest dropped first (default 2048)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+TTL_S = float(os.getenv("SOFICCA_IDEMPOTENCY_TTL_S", "600"))
+MAX_ENTRIES = int(os.getenv("SOFICCA_IDEMPOTENCY_MAX_ENTRIES", "2048"))
+MAX_KEY_LENGTH = 255
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class KeyReused(ValueError):
+    """The key was already used for a request with a different body."""
+
+
+def fingerprint(request: Dict[str, Any]) -> str:
+    """Stable digest of a request body, to tell a retry from a different request under the same key."""
+    body = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def check_key(key: Any) -> str:
+    if not isinstance(key, str) or not key or len(key) > MAX_KEY_LENGTH:
+        raise ValueError(f"idempotency key must be a non-empty string of at most {MAX_KEY_LENGTH} characters")
+    return key
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "done", "failed", "result", "expires")
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.failed = False
+        self.result: Any = None
+        self.expires = float("inf")  # until completed
+
+    @property
+    def pending(self) -> bool:
+        return self.expires == float("inf")
+
+
+class ResponseCache:
+    def __init__(self, ttl_s: float = TTL_S, capacity: int = MAX_ENTRIES):
+        self.ttl_s = ttl_s
+        self.capacity = max(1, capacity)
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"misses": 0, "hits": 0, "coalesced": 0, "mismatches": 0, "failures": 0, "evictions": 0}
+
+    def run(self, scope: str, key: str, fingerprint: str, compute: Callable[[], Any]) -> Tuple[Any, str]:
+        """
+        Result of `compute()` for (scope, key), computed at most once while cached.
+        Returns (result, outcome) with outcome "miss" (computed here), "hit" or
+        "coalesced" (waited for a concurrent duplicate).
+        """
+        k = (scope, key)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                entry = self._entries.get(k)
+                if entry is not None and entry.expires <= now:
+                    del self._entries[k]
+                    entry = None
+                if entry is None:
+                    entry = self._entries[k] = _Entry(fingerprint)
+                    leader = True
+                elif entry.fingerprint != fingerprint:
+                    self._stats["mismatches"] += 1
+                    raise KeyReused("idempotency key was already used for a different request")
+                elif entry.done.is_set():
+                    self._stats["hits"] += 1
+                    return entry.result, "hit"
+                else:
+                    leader = False
+
+            if leader:
+                return self._compute(k, entry, compute), "miss"
+
+            entry.done.wait()
+            if not entry.failed:
+                with self._lock:
+                    self._stats["coalesced"] += 1
+                return entry.result, "coalesced"
+            # The original failed and stored nothing: go again (one waiter becomes the leader).
+
+    def _compute(self, k: Tuple[str, str], entry: _Entry, compute: Callable[[], Any]) -> Any:
+        try:
+            result = compute()
+        except BaseException:
+            with self._lock:
+                if self._entries.get(k) is entry:
+                    del self._entries[k]
+                self._stats["failures"] += 1
+            entry.failed = True
+            entry.done.set()
+            raise
+        with self._lock:
+            entry.result = result
+            entry.expires = time.monotonic() + self.ttl_s
+            self._stats["misses"] += 1
+            if self._entries.get(k) is entry:
+                # Completed entries are kept in completion order (= expiry order) behind the pending ones.
+                self._entries.move_to_end(k)
+            self._evict()
+        entry.done.set()
+        return result
+
+    def _completed(self) -> Iterator[Tuple[Tuple[str, str], _Entry]]:
+        """Completed entries, oldest first (skipping those in flight)."""
+        return ((k, e) for k, e in self._entries.items() if not e.pending)
+
+    def _evict(self) -> None:
+        excess = len(self._entries) - self.capacity
+        if excess > 0:
+            for k, _ in list(itertools.islice(self._completed(), excess)):
+                del self._entries[k]
+                self._stats["evictions"] += 1
+
+    def _expire(self, now: float) -> None:
+        expired = list(itertools.takewhile(lambda item: item[1].expires <= now, self._completed()))
+        for k, _ in expired:
+            del self._entries[k]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["size"] = len(self._entries)
+        out["capacity"] = self.capacity
+        out["ttl_s"] = self.ttl_s
+        requests = out["misses"] + out["hits"] + out["coalesced"]
+        out["dedup_rate"] = (out["hits"] + out["coalesced"]) / requests if requests else 0.0
+        return out
+
+
+def request_key(header: Optional[str], context: Dict[str, Any]) -> Optional[str]:
+    """The turn's key from the header, else context.idempotency_key (removed from the context either way)."""
+    in_body = context.pop("idempotency_key", None)
+    key = header if header is not None else in_body
+    return None if key is None else check_key(key)
@@ -0,0 +1,82 @@
+# api/json_blobs.py
+"""
+Content-addressed storage for repeated per-turn JSON.
+
+Most turns carry one of a handful of flags / reasons / recommendations
+lists, so the text is stored once in `json_blobs` (keyed by its hash, with a
+reference count) and `turns.<column>_ref` points at it; `turns.<column>_json`
+is then NULL. Turns written before this existed keep their inline JSON until
+`api.retention` compacts them.
+
+Readers select through TURN_JSON_JOIN, which yields the familiar
+`<column>_json` names whichever way a row is stored. Reference counts move
+in the same transaction as the turns: `put` on insert, `release` before
+deleting turns; blobs nobody references are dropped.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+DEDUP_COLUMNS = ("flags", "reasons", "recommendations")
+
+# Column list and FROM clause for reading turns (alias `turns`).
+TURN_JSON_COLUMNS = ", ".join(f"COALESCE(turns.{c}_json, {c}_blob.body) AS {c}_json" for c in DEDUP_COLUMNS)
+TURN_JSON_JOIN = "turns " + " ".join(f"LEFT JOIN json_blobs AS {c}_blob ON {c}_blob.hash = turns.{c}_ref" for c in DEDUP_COLUMNS)
+
+
+def blob_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def put(conn: sqlite3.Connection, text: Optional[str]) -> Optional[str]:
+    """Store `text` (or add a reference to it) and return its hash."""
+    if text is None:
+        return None
+    h = blob_hash(text)
+    conn.execute(
+        "INSERT INTO json_blobs(hash, body, refs) VALUES (?, ?, 1) ON CONFLICT(hash) DO UPDATE SET refs = refs + 1",
+        (h, text),
+    )
+    return h
+
+
+def put_columns(conn: sqlite3.Connection, values: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+    """{"flags": json text, ...} -> {"flags_ref": hash, ...} for DEDUP_COLUMNS."""
+    return {f"{c}_ref": put(conn, values.get(c)) for c in DEDUP_COLUMNS}
+
+
+def release(conn: sqlite3.Connection, where: str, params: Sequence[Any] = ()) -> None:
+    """Drop the references held by the turns matching `where` (call before deleting them)."""
+    for c in DEDUP_COLUMNS:
+        conn.execute(
+            f"""
+            UPDATE json_blobs SET refs = refs - gone.n
+            FROM (SELECT {c}_ref AS hash, COUNT(*) AS n FROM turns WHERE ({where}) AND {c}_ref IS NOT NULL GROUP BY {c}_ref) AS gone
+            WHERE json_blobs.hash = gone.hash
+            """,
+            tuple(params),
+        )
+    conn.execute("DELETE FROM json_blobs WHERE refs <= 0")
+
+
+def compact(conn: sqlite3.Connection, ids: Iterable[int]) -> int:
+    """Move the inline JSON of turns `ids` into json_blobs. Returns the number of turns changed."""
+    changed = 0
+    for turn_id in ids:
+        row = conn.execute(
+            f"SELECT {', '.join(f'{c}_json' for c in DEDUP_COLUMNS)} FROM turns WHERE id = ?", (turn_id,)
+        ).fetchone()
+        if row is None:
+            continue
+        sets, args = [], []
+        for c, text in zip(DEDUP_COLUMNS, row):
+            if text is not None:
+                sets.append(f"{c}_ref = ?, {c}_json = NULL")
+                args.append(put(conn, text))
+        if sets:
+            conn.execute(f"UPDATE turns SET {', '.join(sets)} WHERE id = ?", args + [turn_id])
+            changed += 1
+    return changed
@@ -0,0 +1,390 @@
+# api/metrics.py
+"""
+Prometheus metrics for the API and the engine, served at GET /metrics.
+
+No client library. Counters and histograms keep per-thread shards: each
+worker thread adds to its own array, so recording takes no lock, and a
+scrape sums the arrays. A shard outlives its thread, so nothing is lost when
+a pool thread is replaced; a scrape may see an observation's count before
+its sum, which Prometheus tolerates.
+
+Sources:
+- RequestMetrics (ASGI middleware): latency per method, route template and status
+- soficca_core.telemetry (engine hooks, routed here by `install`): stage
+  durations, OpenAI NLU call latency / errors and model escalations per model
+- api.turn_writer: DB write (batch commit) latency and queue wait
+- scrape-time callbacks over state that already exists elsewhere: turn writer
+  stats, session-state and ruleset cache hits, state limit counters, active
+  sessions (session_summary), idempotent replays of /v1/report, WebSocket
+  chat connections and turns
+
+Configuration:
+    SOFICCA_ACTIVE_SESSION_WINDOW_S   a session counts as active this long after its last turn (default 900)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from bisect import bisect_left
+from operator import itemgetter
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from soficca_core import telemetry
+
+ACTIVE_SESSION_WINDOW_S = float(os.getenv("SOFICCA_ACTIVE_SESSION_WINDOW_S", "900"))
+
+# Seconds. Engine stages are sub-millisecond to a few ms; NLU calls are network round trips.
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+NLU_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0)
+
+
+# -----------------------------
+# Primitives
+# -----------------------------
+class _Shards:
+    """One float array per thread; only the owning thread writes to it."""
+
+    __slots__ = ("size", "_local", "_arrays", "_lock")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._arrays: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def mine(self) -> List[float]:
+        arr = getattr(self._local, "arr", None)
+        if arr is None:
+            arr = self._local.arr = [0.0] * self.size
+            with self._lock:
+                self._arrays.append(arr)
+        return arr
+
+    def total(self) -> List[float]:
+        with self._lock:
+            arrays = list(self._arrays)
+        out = [0.0] * self.size
+        for arr in arrays:
+            for i, v in enumerate(arr):
+                out[i] += v
+        return out
+
+
+class _Family:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], size: int):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._size = size
+        # Children are keyed by the raw label values: building a tuple of
+        # strings per observation would cost more than the observation.
+        self._key = itemgetter(*self.labelnames) if self.labelnames else (lambda labels: ())
+        self._children: Dict[Any, _Shards] = {}
+        self._labels: Dict[Any, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _child(self, labels: Dict[str, Any]) -> _Shards:
+        try:
+            key = self._key(labels)
+        except KeyError:
+            key = self._key({n: labels.get(n, "") for n in self.labelnames})
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    self._labels[key] = {n: str(labels.get(n, "")) for n in self.labelnames}
+                    child = self._children[key] = _Shards(self._size)
+        return child
+
+    def _totals(self) -> List[Tuple[Dict[str, str], List[float]]]:
+        with self._lock:
+            children = list(self._children.items())
+        return [(self._labels[key], child.total()) for key, child in children]
+
+
+class Counter(_Family):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames, 1)
+
+    def inc(self, n: float = 1, **labels: Any) -> None:
+        self.inc_labels(n, labels)
+
+    def inc_labels(self, n: float, labels: Dict[str, Any]) -> None:
+        self._child(labels).mine()[0] += n
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        for labels, values in self._totals():
+            yield self.name, labels, values[0]
+
+
+class Histogram(_Family):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = FAST_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # [bucket counts..., +Inf count, sum, count]
+        super().__init__(name, help, labelnames, len(self.buckets) + 3)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        self.observe_labels(value, labels)
+
+    def observe_labels(self, value: float, labels: Dict[str, Any]) -> None:
+        arr = self._child(labels).mine()
+        arr[bisect_left(self.buckets, value)] += 1
+        arr[-2] += value
+        arr[-1] += 1
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        for labels, values in self._totals():
+            cumulative = 0.0
+            for bound, n in zip(self.buckets + (float("inf"),), values):
+                cumulative += n
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, values[-2]
+            yield f"{self.name}_count", labels, values[-1]
+
+
+class Callback:
+    """A counter or gauge read at scrape time: fn() -> number or [(labels, number), ...]."""
+
+    def __init__(self, name: str, help: str, type: str, fn: Callable[[], Any]):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.fn = fn
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        value = self.fn()
+        if isinstance(value, (int, float)):
+            yield self.name, {}, value
+            return
+        for labels, v in value:
+            yield self.name, labels, v
+
+
+_registry: Dict[str, Any] = {}
+_registry_lock = threading.Lock()
+
+
+def _register(metric):
+    with _registry_lock:
+        return _registry.setdefault(metric.name, metric)
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return _register(Counter(name, help, labelnames))
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = FAST_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help, labelnames, buckets))
+
+
+def callback(name: str, help: str, type: str, fn: Callable[[], Any]) -> Callback:
+    """Register (or replace) a scrape-time metric."""
+    metric = Callback(name, help, type, fn)
+    with _registry_lock:
+        _registry[name] = metric
+    return metric
+
+
+# -----------------------------
+# Exposition (text format 0.0.4)
+# -----------------------------
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render() -> str:
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+    lines: List[str] = []
+    for metric in metrics:
+        try:
+            samples = list(metric.samples())
+        except Exception:
+            continue  # a failing callback must not break the scrape
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for name, labels, value in samples:
+            if labels:
+                label_text = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------
+# Metrics recorded in this process
+# -----------------------------
+HTTP_REQUEST_SECONDS = histogram(
+    "soficca_http_request_duration_seconds", "HTTP request latency by method, route template and status.",
+    ("method", "route", "status"), REQUEST_BUCKETS,
+)
+ENGINE_STAGE_SECONDS = histogram(
+    "soficca_engine_stage_duration_seconds", "generate_report stage durations (total = whole turn).", ("stage",)
+)
+NLU_CALL_SECONDS = histogram(
+    "soficca_nlu_call_duration_seconds", "OpenAI NLU request latency by model and outcome (ok, error).",
+    ("model", "outcome"), NLU_BUCKETS,
+)
+NLU_ESCALATIONS = counter(
+    "soficca_nlu_escalations_total", "NLU answers below the confidence threshold retried on the larger model.", ("model",)
+)
+DB_WRITE_SECONDS = histogram(
+    "soficca_db_write_duration_seconds", "Write transaction latency (turn_batch = one turn writer commit).", ("kind",)
+)
+TURN_QUEUE_WAIT_SECONDS = histogram(
+    "soficca_turn_queue_wait_seconds", "Time the oldest turn of a batch waited in the write-behind queue."
+)
+
+_ENGINE_HISTOGRAMS = {"stage_seconds": ENGINE_STAGE_SECONDS, "nlu_call_seconds": NLU_CALL_SECONDS}
+_ENGINE_COUNTERS = {"nlu_escalations": NLU_ESCALATIONS}
+
+
+class _EngineObserver:
+    """soficca_core.telemetry observer: engine events -> the families above."""
+
+    def observe(self, name: str, value: float, labels: Dict[str, Any]) -> None:
+        family = _ENGINE_HISTOGRAMS.get(name)
+        if family is not None:
+            family.observe_labels(value, labels)
+
+    def count(self, name: str, n: int, labels: Dict[str, Any]) -> None:
+        family = _ENGINE_COUNTERS.get(name)
+        if family is not None:
+            family.inc_labels(n, labels)
+
+
+class RequestMetrics:
+    """ASGI middleware timing each HTTP request until its last body chunk is sent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        t0 = perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The route template, not the raw path, keeps label cardinality bounded.
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe_labels(
+                perf_counter() - t0, {"method": scope["method"], "route": route, "status": str(status[0])}
+            )
+
+
+# -----------------------------
+# Wiring
+# -----------------------------
+def install(*, turn_writer=None, sessions=None, db=None, replies=None, chat=None) -> None:
+    """Route engine telemetry here and register scrape-time metrics for the API's objects."""
+    telemetry.set_observer(_EngineObserver())
+
+    from soficca_core.ruleset_registry import REGISTRY as rulesets
+    from soficca_core.state_limits import limit_counters
+
+    callback(
+        "soficca_state_limit_events_total", "Chat state bound violations (see soficca_core.state_limits).", "counter",
+        lambda: [({"limit": k}, v) for k, v in sorted(limit_counters().items())],
+    )
+
+    def cache_requests():
+        stats = {"ruleset": rulesets.stats}
+        if sessions is not None:
+            stats["session_state"] = sessions.stats()
+        return [
+            ({"cache": cache, "result": result}, s[f"{result}s" if result == "hit" else "misses"])
+            for cache, s in stats.items()
+            for result in ("hit", "miss")
+        ]
+
+    def cache_hit_ratio():
+        by_cache: Dict[str, Dict[str, float]] = {}
+        for labels, v in cache_requests():
+            by_cache.setdefault(labels["cache"], {})[labels["result"]] = v
+        return [({"cache": c}, r["hit"] / (r["hit"] + r["miss"])) for c, r in by_cache.items() if r["hit"] + r["miss"]]
+
+    def cache_evictions():
+        out = [({"cache": "ruleset"}, rulesets.stats["evictions"])]
+        if sessions is not None:
+            out.append(({"cache": "session_state"}, sessions.stats()["evictions"]))
+        return out
+
+    callback("soficca_cache_requests_total", "Cache lookups by cache and result (hit, miss).", "counter", cache_requests)
+    callback("soficca_cache_hit_ratio", "Cache hits / lookups since start.", "gauge", cache_hit_ratio)
+    callback("soficca_cache_evictions_total", "Entries evicted by cache.", "counter", cache_evictions)
+
+    if sessions is not None:
+        callback("soficca_sessions_in_memory", "Sessions whose chat state is held in memory.", "gauge", lambda: sessions.stats()["size"])
+
+    if turn_writer is not None:
+        callback(
+            "soficca_turn_writer_jobs_total", "Turn log jobs by outcome.", "counter",
+            lambda: [({"outcome": k}, v) for k, v in _pick(turn_writer.stats(), "written", "errors", "dropped", "rejected", "inline")],
+        )
+        callback(
+            "soficca_turn_writer_transactions_total", "Turn log transactions retried, and given up on after the last retry.", "counter",
+            lambda: [({"outcome": outcome}, turn_writer.stats()[k]) for outcome, k in (("retried", "retries"), ("failed", "failed_batches"))],
+        )
+        callback("soficca_turn_writer_queue_depth", "Turn log jobs waiting to be written.", "gauge", lambda: turn_writer.stats()["queue_depth"])
+
+    if replies is not None:
+        callback(
+            "soficca_idempotent_requests_total",
+            "/v1/report calls with an Idempotency-Key by outcome (miss: computed; hit, coalesced: deduplicated).",
+            "counter",
+            lambda: [
+                ({"outcome": outcome}, replies.stats()[k])
+                for outcome, k in (("miss", "misses"), ("hit", "hits"), ("coalesced", "coalesced"), ("key_reused", "mismatches"), ("failed", "failures"))
+            ],
+        )
+
+    if chat is not None:
+        callback("soficca_chat_connected", "Sessions connected over WebSocket /v1/chat.", "gauge", lambda: chat.stats()["connected"])
+        callback("soficca_chat_turns_total", "Turns run over WebSocket /v1/chat.", "counter", lambda: chat.stats()["turns"])
+
+    if db is not None:
+
+        def active_sessions():
+            since = (datetime.now(timezone.utc) - timedelta(seconds=ACTIVE_SESSION_WINDOW_S)).isoformat()
+            with db.read() as conn:
+                return conn.execute("SELECT COUNT(*) FROM session_summary WHERE last_activity >= ?", (since,)).fetchone()[0]
+
+        callback(
+            "soficca_active_sessions", f"Sessions with a turn in the last {ACTIVE_SESSION_WINDOW_S:g} s.", "gauge", active_sessions
+        )
+
+
+def _pick(stats: Dict[str, Any], *keys: str) -> List[Tuple[str, Any]]:
+    return [(k, stats[k]) for k in keys]
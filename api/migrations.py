@@ -0,0 +1,290 @@
+# api/migrations.py
+"""
+Schema migrations for the API database.
+
+The schema version is SQLite's `PRAGMA user_version`. `migrate(conn)` applies
+every migration above it, in order, inside the caller's transaction, so a
+failed migration leaves the database at its previous version. Migrations are
+append-only: never edit one that has shipped, add the next number instead.
+Each one spells out its DDL and backfill as they were when it shipped rather
+than calling the modules that use the tables, so later changes to those
+modules cannot change what an old migration does.
+
+Migration 1 is the schema as it existed before versioning (all statements are
+IF NOT EXISTS), so databases created by older builds upgrade in place.
+
+    python -m api.migrations [--db path]    # migrate and print the version
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+from api.db import DB_PATH, ConnectionManager
+
+
+def _m001_base(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        created_at TEXT NOT NULL,
+        user_json TEXT NOT NULL
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS turns (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        user_text TEXT NOT NULL,
+        assistant_text TEXT NOT NULL,
+        phase TEXT,
+        path TEXT,
+        flags_json TEXT,
+        reasons_json TEXT,
+        recommendations_json TEXT,
+        trace_json TEXT,
+        state_json TEXT,
+        FOREIGN KEY(session_id) REFERENCES sessions(session_id)
+    );
+    """)
+    # Chat state lives in the event log (api/event_log.py); turns.state_json
+    # is only set on rows written before it existed.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS turn_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        turn_id INTEGER,
+        created_at TEXT NOT NULL,
+        input_json TEXT NOT NULL,
+        nlu_json TEXT NOT NULL,
+        state_checksum TEXT,
+        UNIQUE(session_id, seq)
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS state_snapshots (
+        session_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        state_json TEXT,
+        PRIMARY KEY(session_id, seq)
+    );
+    """)
+
+
+def _m002_turn_indexes(conn: sqlite3.Connection) -> None:
+    # Exports and resets filter on session_id and read in id order; the
+    # composite index serves both without a sort.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_turns_session_id ON turns(session_id, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON sessions(created_at)")
+
+
+def _m003_session_summary(conn: sqlite3.Connection) -> None:
+    # One row per session, maintained in the same transaction as each turn
+    # write (see api/session_summary.py).
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS session_summary (
+        session_id TEXT PRIMARY KEY,
+        created_at TEXT NOT NULL,
+        turn_count INTEGER NOT NULL DEFAULT 0,
+        last_turn_id INTEGER,
+        last_phase TEXT,
+        last_path TEXT,
+        last_activity TEXT NOT NULL
+    );
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_session_summary_activity ON session_summary(last_activity, session_id)")
+
+    # Backfill. Turns may exist for session ids that were never created via
+    # /v1/session, so both sources are folded in.
+    conn.execute("""
+    INSERT OR IGNORE INTO session_summary(session_id, created_at, turn_count, last_activity)
+    SELECT session_id, created_at, 0, created_at FROM sessions
+    """)
+    conn.execute("""
+    INSERT INTO session_summary(session_id, created_at, turn_count, last_turn_id, last_activity)
+    SELECT session_id, MIN(created_at), COUNT(*), MAX(id), MAX(created_at)
+    FROM turns WHERE true GROUP BY session_id
+    ON CONFLICT(session_id) DO UPDATE SET
+        turn_count = excluded.turn_count,
+        last_turn_id = excluded.last_turn_id,
+        last_activity = MAX(session_summary.last_activity, excluded.last_activity)
+    """)
+    conn.execute("""
+    UPDATE session_summary SET
+        last_phase = (SELECT phase FROM turns WHERE turns.id = session_summary.last_turn_id),
+        last_path = (SELECT path FROM turns WHERE turns.id = session_summary.last_turn_id)
+    WHERE last_turn_id IS NOT NULL
+    """)
+
+
+def _m004_turn_time_index(conn: sqlite3.Connection) -> None:
+    # Bulk exports filter and order turns by time.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_turns_created_at ON turns(created_at)")
+
+
+def _m005_json_blobs(conn: sqlite3.Connection) -> None:
+    # Repeated flags/reasons/recommendations lists are stored once; existing
+    # rows keep their inline JSON until api.retention compacts them
+    # (api/json_blobs.py).
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS json_blobs (
+        hash TEXT PRIMARY KEY,
+        body TEXT NOT NULL,
+        refs INTEGER NOT NULL DEFAULT 0
+    );
+    """)
+    for column in ("flags", "reasons", "recommendations"):
+        conn.execute(f"ALTER TABLE turns ADD COLUMN {column}_ref TEXT")
+
+
+def _m006_analytics(conn: sqlite3.Connection) -> None:
+    # Counters maintained per turn by api/analytics.py, backfilled from
+    # existing turns (end reasons unknown, repairs not recoverable).
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS analytics_counters (
+        metric TEXT NOT NULL,
+        key TEXT NOT NULL,
+        n INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY(metric, key)
+    ) WITHOUT ROWID;
+    """)
+    conn.execute("DELETE FROM analytics_counters")
+    rows = conn.execute(
+        """
+        SELECT phase, path, json_extract(trace_json, '$.nlu_used') AS nlu_used,
+               LAG(phase) OVER w AS prev_phase, LAG(path) OVER w AS prev_path,
+               ROW_NUMBER() OVER w AS n
+        FROM turns
+        WINDOW w AS (PARTITION BY session_id ORDER BY id)
+        """
+    )
+    totals: Dict[Tuple[str, str], int] = {}
+    for phase, path, nlu_used, prev_phase, prev_path, n in rows:
+        keys = [("turns", "all"), ("path", path or "none"), ("nlu_used", str(nlu_used) if nlu_used else "none")]
+        if n == 1:
+            keys.append(("sessions", "started"))
+        if n == 1 or phase != prev_phase:
+            keys.append(("transition", f"{(prev_phase if n > 1 else None) or 'START'}>{phase or 'none'}"))
+            keys.append(("funnel", phase or "none"))
+            if phase == "END":
+                keys.append(("end_reason", "unknown"))
+        if path == "PATH_ESCALATE_HUMAN" and (n == 1 or prev_path != "PATH_ESCALATE_HUMAN"):
+            keys.append(("escalation", "sessions"))
+        for key in keys:
+            totals[key] = totals.get(key, 0) + 1
+    conn.executemany(
+        "INSERT INTO analytics_counters(metric, key, n) VALUES (?, ?, ?)",
+        [(metric, key, n) for (metric, key), n in totals.items()],
+    )
+
+
+def _m007_turn_search(conn: sqlite3.Connection) -> None:
+    # External-content FTS5 index over turn text, kept in sync by triggers
+    # (api/search.py); 'rebuild' indexes the existing turns.
+    conn.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(
+        user_text, assistant_text,
+        content='turns', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    );
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS turns_fts_insert AFTER INSERT ON turns BEGIN
+        INSERT INTO turns_fts(rowid, user_text, assistant_text) VALUES (new.id, new.user_text, new.assistant_text);
+    END;
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS turns_fts_delete AFTER DELETE ON turns BEGIN
+        INSERT INTO turns_fts(turns_fts, rowid, user_text, assistant_text) VALUES ('delete', old.id, old.user_text, old.assistant_text);
+    END;
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS turns_fts_update AFTER UPDATE OF user_text, assistant_text ON turns BEGIN
+        INSERT INTO turns_fts(turns_fts, rowid, user_text, assistant_text) VALUES ('delete', old.id, old.user_text, old.assistant_text);
+        INSERT INTO turns_fts(rowid, user_text, assistant_text) VALUES (new.id, new.user_text, new.assistant_text);
+    END;
+    """)
+    conn.execute("INSERT INTO turns_fts(turns_fts) VALUES ('rebuild')")
+
+
+def _m008_analytics_reached(conn: sqlite3.Connection) -> None:
+    # What each session has reached, so api/analytics.py counts session-level
+    # events once; seeded from existing turns, counters left as they were.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS analytics_reached (
+        session_id TEXT NOT NULL,
+        mark TEXT NOT NULL,
+        PRIMARY KEY(session_id, mark)
+    ) WITHOUT ROWID;
+    """)
+    conn.execute("""
+    INSERT OR IGNORE INTO analytics_reached(session_id, mark)
+    SELECT DISTINCT session_id, 'started' FROM turns
+    UNION SELECT DISTINCT session_id, COALESCE(phase, 'none') FROM turns
+    UNION SELECT DISTINCT session_id, 'escalated' FROM turns WHERE path = 'PATH_ESCALATE_HUMAN'
+    """)
+
+
+def _m009_ruleset_artefacts(conn: sqlite3.Connection) -> None:
+    # Artefacts of the ruleset versions logged turns used, for replay after a version is retired.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ruleset_artefacts (
+        version TEXT PRIMARY KEY,
+        definition_json TEXT NOT NULL
+    );
+    """)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "base schema", _m001_base),
+    (2, "turn indexes", _m002_turn_indexes),
+    (3, "session summary", _m003_session_summary),
+    (4, "turn time index", _m004_turn_time_index),
+    (5, "json blobs", _m005_json_blobs),
+    (6, "analytics counters", _m006_analytics),
+    (7, "turn full-text search", _m007_turn_search),
+    (8, "analytics per-session marks", _m008_analytics_reached),
+    (9, "ruleset artefacts", _m009_ruleset_artefacts),
+]
+
+LATEST = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations (call inside a write transaction). Returns the new version."""
+    version = schema_version(conn)
+    if version > LATEST:
+        raise RuntimeError(f"database schema version {version} is newer than this build ({LATEST})")
+    for number, _, apply in MIGRATIONS:
+        if number > version:
+            apply(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            version = number
+    return version
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Migrate the API database to the latest schema version.")
+    parser.add_argument("--db", default=str(DB_PATH), help="Path to the API SQLite database.")
+    args = parser.parse_args(argv)
+
+    db = ConnectionManager(args.db)
+    with db.write() as conn:
+        before = schema_version(conn)
+        after = migrate(conn)
+    db.close_all()
+    print(f"{db.path}: schema version {before} -> {after}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,104 @@
+# api/responses.py
+"""
+Response shaping and encoding for /v1/report.
+
+The engine's envelope echoes the request back (`normalized_input`, chat
+state included), carries the full decision `trace` and the chat state, and
+FastAPI's generic encoder (jsonable_encoder, then json.dumps) walks all of
+it on every turn. Most clients need a fraction of that, so /v1/report takes
+a `profile`:
+
+    full      the envelope as the engine returns it (default)
+    chat      ok, errors, meta, and report.{ruleset_version, path, flags,
+              recommendations, chat}; no normalized_input, trace, scores or reasons
+    minimal   ok, errors, meta, report.path and report.chat.{phase,
+              assistant_message, last_question_id, done}; no chat state, for
+              clients whose session state is held by the server (session_id)
+
+`shape` picks the keys into new dicts without copying values, so a shared
+result (e.g. one replayed by api/idempotency.py) is never modified. `render`
+encodes the shaped result directly to bytes, with orjson when it is
+installed and the stdlib encoder otherwise, and gzips it when the client
+accepts gzip and the body reaches SOFICCA_GZIP_MIN_BYTES.
+
+Configuration:
+    SOFICCA_RESPONSE_PROFILE   profile when the request names none (default full)
+    SOFICCA_GZIP_MIN_BYTES     smallest body that is compressed (default 1024)
+    SOFICCA_GZIP_LEVEL         compression level; 1 is within a few percent of 9 on turn JSON (default 1)
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore
+
+PROFILES = ("minimal", "chat", "full")
+DEFAULT_PROFILE = os.getenv("SOFICCA_RESPONSE_PROFILE", "full").lower()
+GZIP_MIN_BYTES = int(os.getenv("SOFICCA_GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("SOFICCA_GZIP_LEVEL", "1"))
+
+_CHAT_REPORT_KEYS = ("ruleset_version", "path", "flags", "recommendations", "chat")
+_MINIMAL_CHAT_KEYS = ("phase", "assistant_message", "last_question_id", "done")
+
+
+def check_profile(profile: Optional[str]) -> str:
+    profile = (profile or DEFAULT_PROFILE).lower()
+    if profile not in PROFILES:
+        raise ValueError(f"profile must be one of {', '.join(PROFILES)}")
+    return profile
+
+
+def _pick(d: Dict[str, Any], keys) -> Dict[str, Any]:
+    return {k: d[k] for k in keys if k in d}
+
+
+def shape(result: Dict[str, Any], profile: str) -> Dict[str, Any]:
+    """`result` reduced to `profile`; the values are shared with `result`, not copied."""
+    if profile == "full":
+        return result
+    out = _pick(result, ("ok", "errors", "meta"))
+    report = result.get("report") or {}
+    if profile == "chat":
+        out["report"] = _pick(report, _CHAT_REPORT_KEYS)
+    else:
+        out["report"] = {"path": report.get("path"), "chat": _pick(report.get("chat") or {}, _MINIMAL_CHAT_KEYS)}
+    return out
+
+
+def _dumps_stdlib(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _dumps_orjson(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+dumps: Callable[[Any], bytes] = _dumps_orjson if orjson is not None else _dumps_stdlib
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "").lower() not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def render(result: Dict[str, Any], profile: str, accept_encoding: Optional[str] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+    body = dumps(shape(result, profile))
+    headers = dict(headers or {})
+    if len(body) >= GZIP_MIN_BYTES:
+        headers["Vary"] = "Accept-Encoding"
+        if accepts_gzip(accept_encoding):
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+            headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,297 @@
+# api/retention.py
+"""
+Retention, archiving and compaction for the API database.
+
+    python -m api.retention                      # archive idle sessions, compact, vacuum
+    python -m api.retention --days 90 --archive-dir /backups/soficca
+    python -m api.retention --enable-incremental-vacuum   # once, on an old database
+
+Archiving works on whole sessions, not single turns: a session whose last
+activity (session_summary) is older than the retention age is written to a
+gzip NDJSON archive file, one line per session, holding its session row,
+summary, turns (JSON columns resolved) and event log (events and state
+snapshots, so any turn state can still be rebuilt). Archiving turn by turn
+would cut event-log replay chains.
+
+Compaction moves the inline flags / reasons / recommendations JSON of turns
+written before json_blobs existed into the content-addressed table.
+
+The hot path is protected by working in small batches: each batch is one
+short read snapshot and one short write transaction, then
+`PRAGMA incremental_vacuum` returns a bounded number of freed pages, then a
+pause. An archive file is fsynced and renamed into place before its sessions
+are deleted, so an interruption never loses data (at worst a session is
+archived twice; readers keep the last copy).
+
+Configuration:
+    SOFICCA_RETENTION_DAYS        retention age in days (default 30)
+    SOFICCA_ARCHIVE_DIR           archive directory (default api/archive)
+    SOFICCA_RETENTION_BATCH       sessions per archive batch (default 25)
+    SOFICCA_COMPACT_BATCH         turns per compaction batch (default 500)
+    SOFICCA_RETENTION_PAUSE_MS    pause between batches (default 20)
+    SOFICCA_VACUUM_PAGES          pages freed per incremental vacuum step (default 256)
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from api import analytics, event_log, exports, json_blobs
+from api.db import DB_PATH, ConnectionManager
+from soficca_core.state_codec import loads_state
+
+RETENTION_DAYS = float(os.getenv("SOFICCA_RETENTION_DAYS", "30"))
+ARCHIVE_DIR = Path(os.getenv("SOFICCA_ARCHIVE_DIR") or Path(__file__).with_name("archive"))
+ARCHIVE_BATCH = int(os.getenv("SOFICCA_RETENTION_BATCH", "25"))
+COMPACT_BATCH = int(os.getenv("SOFICCA_COMPACT_BATCH", "500"))
+PAUSE_MS = float(os.getenv("SOFICCA_RETENTION_PAUSE_MS", "20"))
+VACUUM_PAGES = int(os.getenv("SOFICCA_VACUUM_PAGES", "256"))
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _state_text(raw: Optional[str]) -> str:
+    if raw is None:
+        return "null"
+    return raw if raw.startswith("{") else _dumps(loads_state(raw))
+
+
+def _pause(pause_ms: float) -> None:
+    if pause_ms > 0:
+        time.sleep(pause_ms / 1000)
+
+
+def vacuum_step(db: ConnectionManager, pages: int = VACUUM_PAGES) -> int:
+    """Return up to `pages` free pages to the file system (incremental auto-vacuum only)."""
+    conn = db.connection()
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    # executescript steps the pragma to completion; execute() would free one page.
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def enable_incremental_vacuum(db: ConnectionManager) -> bool:
+    """Switch an existing database to incremental auto-vacuum. Runs a full VACUUM: do it offline."""
+    conn = db.connection()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+# -----------------------------
+# Archiving
+# -----------------------------
+def _session_line(conn, session_id: str) -> str:
+    session = conn.execute("SELECT session_id, created_at, user_json FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+    summary = conn.execute("SELECT * FROM session_summary WHERE session_id = ?", (session_id,)).fetchone()
+
+    turns = [
+        exports.turn_json(r, _state_text(r["state_json"]) if r["state_json"] is not None else None)
+        for r in exports.session_turns(conn, session_id)
+    ]
+    events = [
+        f'{{"seq":{r[0]},"turn_id":{_dumps(r[1])},"created_at":{_dumps(r[2])},"input":{r[3]},"nlu":{r[4]},"state_checksum":{_dumps(r[5])}}}'
+        for r in conn.execute(
+            "SELECT seq, turn_id, created_at, input_json, nlu_json, state_checksum FROM turn_events WHERE session_id = ? ORDER BY seq",
+            (session_id,),
+        )
+    ]
+    snapshots = [
+        f'{{"seq":{r[0]},"state":{_state_text(r[1])}}}'
+        for r in conn.execute("SELECT seq, state_json FROM state_snapshots WHERE session_id = ? ORDER BY seq", (session_id,))
+    ]
+    session_text = "null"
+    if session is not None:
+        session_text = f'{{"created_at":{_dumps(session["created_at"])},"user":{session["user_json"] or "{}"}}}'
+    return (
+        f'{{"session_id":{_dumps(session_id)},"session":{session_text},'
+        f'"summary":{_dumps(dict(summary)) if summary is not None else "null"},'
+        f'"turns":[{",".join(turns)}],"events":[{",".join(events)}],"snapshots":[{",".join(snapshots)}]}}\n'
+    )
+
+
+def _write_archive(path: Path, lines: List[str]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+            for line in lines:
+                gz.write(line.encode("utf-8"))
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp, path)
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def _delete_sessions(conn, session_ids: List[str], cutoff: str) -> List[str]:
+    marks = ",".join("?" * len(session_ids))
+    # A session that became active again since it was read stays; its archived copy is superseded later.
+    still_idle = [
+        r[0]
+        for r in conn.execute(
+            f"SELECT session_id FROM session_summary WHERE session_id IN ({marks}) AND last_activity < ?", session_ids + [cutoff]
+        )
+    ]
+    if not still_idle:
+        return []
+    marks = ",".join("?" * len(still_idle))
+    json_blobs.release(conn, f"session_id IN ({marks})", still_idle)
+    conn.execute(f"DELETE FROM turns WHERE session_id IN ({marks})", still_idle)
+    for session_id in still_idle:
+        event_log.delete_session(conn, session_id)
+        analytics.delete_session(conn, session_id)
+    conn.execute(f"DELETE FROM session_summary WHERE session_id IN ({marks})", still_idle)
+    conn.execute(f"DELETE FROM sessions WHERE session_id IN ({marks})", still_idle)
+    return still_idle
+
+
+def archive_sessions(
+    db: ConnectionManager,
+    archive_dir: Path,
+    cutoff: str,
+    *,
+    batch_size: int = ARCHIVE_BATCH,
+    pause_ms: float = PAUSE_MS,
+) -> Dict[str, int]:
+    """Archive and delete sessions idle since before `cutoff` (UTC isoformat)."""
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    stats = {"sessions_archived": 0, "turns_archived": 0, "archive_files": 0, "pages_freed": 0}
+
+    skip: List[str] = []  # reactivated while being archived; not retried this run
+    while True:
+        with db.read() as conn:
+            marks = ",".join("?" * len(skip))
+            not_skipped = f" AND session_id NOT IN ({marks})" if skip else ""
+            rows = conn.execute(
+                f"SELECT session_id, turn_count FROM session_summary WHERE last_activity < ?{not_skipped} ORDER BY last_activity LIMIT ?",
+                [cutoff] + skip + [batch_size],
+            ).fetchall()
+            if not rows:
+                break
+            session_ids = [r[0] for r in rows]
+            lines = [_session_line(conn, sid) for sid in session_ids]
+
+        path = archive_dir / f"sessions-{stamp}-{stats['archive_files']:05d}.ndjson.gz"
+        _write_archive(path, lines)
+        stats["archive_files"] += 1
+
+        with db.write() as conn:
+            deleted = set(_delete_sessions(conn, session_ids, cutoff))
+        skip += [sid for sid in session_ids if sid not in deleted]
+        stats["sessions_archived"] += len(deleted)
+        stats["turns_archived"] += sum(r[1] for r in rows if r[0] in deleted)
+        stats["pages_freed"] += vacuum_step(db)
+        _pause(pause_ms)
+    return stats
+
+
+def iter_archive(archive_dir: Path) -> Iterator[Dict[str, Any]]:
+    """Archived sessions, oldest file first (a session archived twice appears twice; the last copy wins)."""
+    for path in sorted(Path(archive_dir).glob("sessions-*.ndjson.gz")):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+# -----------------------------
+# Compaction
+# -----------------------------
+def compact_turns(db: ConnectionManager, *, batch_size: int = COMPACT_BATCH, pause_ms: float = PAUSE_MS) -> Dict[str, int]:
+    """Move inline flags/reasons/recommendations JSON of older turns into json_blobs."""
+    inline = " OR ".join(f"{c}_json IS NOT NULL" for c in json_blobs.DEDUP_COLUMNS)
+    stats = {"turns_compacted": 0, "pages_freed": 0}
+    last_id = 0
+    while True:
+        with db.read() as conn:
+            ids = [r[0] for r in conn.execute(f"SELECT id FROM turns WHERE id > ? AND ({inline}) ORDER BY id LIMIT ?", (last_id, batch_size))]
+        if not ids:
+            break
+        with db.write() as conn:
+            stats["turns_compacted"] += json_blobs.compact(conn, ids)
+        last_id = ids[-1]
+        stats["pages_freed"] += vacuum_step(db)
+        _pause(pause_ms)
+    return stats
+
+
+# -----------------------------
+# Driver
+# -----------------------------
+def run_retention(
+    db: ConnectionManager,
+    *,
+    days: float = RETENTION_DAYS,
+    archive_dir: Path = ARCHIVE_DIR,
+    compact: bool = True,
+    pause_ms: float = PAUSE_MS,
+) -> Dict[str, Any]:
+    size_before = db.path.stat().st_size
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    stats: Dict[str, Any] = {"cutoff": cutoff}
+    stats.update(archive_sessions(db, archive_dir, cutoff, pause_ms=pause_ms))
+    if compact:
+        compacted = compact_turns(db, pause_ms=pause_ms)
+        stats["turns_compacted"] = compacted["turns_compacted"]
+        stats["pages_freed"] += compacted["pages_freed"]
+    # Whatever the per-batch steps left over, still in bounded steps.
+    while True:
+        freed = vacuum_step(db)
+        if not freed:
+            break
+        stats["pages_freed"] += freed
+        _pause(pause_ms)
+    # Fold the WAL back so the file size below is meaningful.
+    db.connection().execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    stats["db_bytes_before"] = size_before
+    stats["db_bytes_after"] = db.path.stat().st_size
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Archive idle sessions, compact turn JSON and vacuum the API database.")
+    parser.add_argument("--db", default=str(DB_PATH), help="Path to the API SQLite database.")
+    parser.add_argument("--days", type=float, default=RETENTION_DAYS, help="Archive sessions idle for longer than this.")
+    parser.add_argument("--archive-dir", default=str(ARCHIVE_DIR), help="Where archive files are written.")
+    parser.add_argument("--no-compact", action="store_true", help="Skip compaction of inline turn JSON.")
+    parser.add_argument("--pause-ms", type=float, default=PAUSE_MS, help="Pause between batches.")
+    parser.add_argument(
+        "--enable-incremental-vacuum", action="store_true", help="Convert an existing database (full VACUUM; run offline) and exit."
+    )
+    args = parser.parse_args(argv)
+
+    from api import migrations
+
+    db = ConnectionManager(args.db)
+    try:
+        if args.enable_incremental_vacuum:
+            changed = enable_incremental_vacuum(db)
+            print("incremental auto-vacuum enabled" if changed else "incremental auto-vacuum already enabled")
+            return 0
+        with db.write() as conn:
+            migrations.migrate(conn)
+        stats = run_retention(db, days=args.days, archive_dir=Path(args.archive_dir), compact=not args.no_compact, pause_ms=args.pause_ms)
+    finally:
+        db.close_all()
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+# api/ruleset_impact.py
+"""
+Ruleset impact analysis.
+
+Replays the final slot state of every stored session against the current
+ruleset and a candidate ruleset, and reports which sessions would change
+`path` or flags.
+
+    python -m api.ruleset_impact --candidate path/to/candidate.json
+    python -m api.ruleset_impact --candidate my_pkg.rules --changes changes.ndjson
+
+A candidate is either a declarative ruleset artefact (.json, see
+soficca_core/rulesets/default.json) or a module (dotted name or .py file)
+exposing `apply_rules`, and optionally `normalize` and `RULESET_VERSION`.
+
+Per-session changes are written as NDJSON; the diff summary is printed as
+JSON when the run finishes (on stderr if the changes go to stdout).
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from api.db import DB_PATH
+from soficca_core.state_codec import loads_state
+
+DEFAULT_DB_PATH = DB_PATH
+
+DEFAULT_BATCH_SIZE = 500
+
+# Only the last turn of each session carries the final slot state. Grouping on
+# (session_id, id) keeps the sort small; the wide state_json column is then
+# fetched by rowid one row at a time.
+_FINAL_TURNS_SQL = """
+    SELECT t.session_id, t.state_json, last.turn_count
+    FROM (
+        SELECT session_id, MAX(id) AS last_id, COUNT(*) AS turn_count
+        FROM turns
+        GROUP BY session_id
+    ) AS last
+    JOIN turns AS t ON t.id = last.last_id
+"""
+
+
+# -----------------------------
+# Ruleset loading
+# -----------------------------
+def load_ruleset(spec: Optional[str]) -> Dict[str, Any]:
+    """Load a ruleset. `None` means the engine's active ruleset."""
+    from soficca_core import ruleset as ruleset_mod
+
+    if not spec:
+        compiled = ruleset_mod.active_ruleset()
+    elif spec.endswith(".json"):
+        compiled = ruleset_mod.load_ruleset(spec)
+    else:
+        compiled = None
+
+    if compiled is not None:
+        return {
+            "version": compiled.version,
+            "normalize": compiled.normalize,
+            "apply_rules": compiled.apply,
+        }
+
+    if spec.endswith(".py"):
+        path = Path(spec)
+        module_spec = importlib.util.spec_from_file_location("soficca_candidate_ruleset", path)
+        if module_spec is None or module_spec.loader is None:
+            raise ValueError(f"cannot load ruleset from {spec}")
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(spec)
+
+    apply_rules = getattr(module, "apply_rules", None)
+    if not callable(apply_rules):
+        raise ValueError(f"ruleset {spec} does not define apply_rules(signals)")
+
+    current = ruleset_mod.active_ruleset()
+    return {
+        "version": getattr(module, "RULESET_VERSION", spec),
+        "normalize": getattr(module, "normalize", current.normalize),
+        "apply_rules": apply_rules,
+    }
+
+
+# -----------------------------
+# Worker side
+# -----------------------------
+_worker_rulesets: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None
+_worker_db_path: Optional[Path] = None
+
+
+def _init_worker(candidate_spec: str, db_path: Optional[Path] = None) -> None:
+    global _worker_rulesets, _worker_db_path
+    _worker_rulesets = (load_ruleset(None), load_ruleset(candidate_spec))
+    _worker_db_path = db_path
+
+
+def _final_state_from_log(session_id: str) -> Any:
+    # Turns logged after the event log existed carry no state blob.
+    from api import event_log
+
+    if _worker_db_path is None:
+        return None
+    conn = sqlite3.connect(f"file:{_worker_db_path}?mode=ro", uri=True)
+    try:
+        return event_log.reconstruct(conn, session_id)[1]
+    except (KeyError, event_log.ReplayError, sqlite3.Error):
+        return None
+    finally:
+        conn.close()
+
+
+def _evaluate(state: Dict[str, Any], ruleset: Dict[str, Any]) -> Tuple[Optional[str], List[str]]:
+    from soficca_core.chat_state import MODE_SAFETY_LOCK
+    from soficca_core.engine import uniq_keep_order
+
+    normalize: Callable = ruleset["normalize"]
+    apply_rules: Callable = ruleset["apply_rules"]
+
+    decision = apply_rules(normalize(state.get("slots") or {})) or {}
+    path = decision.get("path")
+    flags = uniq_keep_order(decision.get("flags") or [])
+
+    # Mirror the engine's safety gate: a locked session always escalates.
+    if state.get("mode") == MODE_SAFETY_LOCK:
+        path = "PATH_ESCALATE_HUMAN"
+        flags = uniq_keep_order(flags + list(state.get("safety_flags") or []))
+    return path, flags
+
+
+def _replay_batch(batch: List[Tuple[str, Optional[str], int]]) -> Dict[str, Any]:
+    assert _worker_rulesets is not None
+    current, candidate = _worker_rulesets
+
+    changes = []
+    skipped = 0
+    for session_id, state_json, turn_count in batch:
+        try:
+            state = loads_state(state_json) if state_json is not None else _final_state_from_log(session_id)
+        except ValueError:
+            state = None
+        if not isinstance(state, dict):
+            skipped += 1
+            continue
+
+        cur_path, cur_flags = _evaluate(state, current)
+        cand_path, cand_flags = _evaluate(state, candidate)
+
+        added = [f for f in cand_flags if f not in cur_flags]
+        removed = [f for f in cur_flags if f not in cand_flags]
+        if cur_path == cand_path and not added and not removed:
+            continue
+
+        changes.append(
+            {
+                "session_id": session_id,
+                "turn_count": turn_count,
+                "phase": state.get("phase"),
+                "path_before": cur_path,
+                "path_after": cand_path,
+                "flags_added": added,
+                "flags_removed": removed,
+            }
+        )
+
+    return {"evaluated": len(batch) - skipped, "skipped": skipped, "changes": changes}
+
+
+# -----------------------------
+# Driver
+# -----------------------------
+def iter_final_states(db_path: Path, *, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Tuple[str, Optional[str], int]]]:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cur = conn.execute(_FINAL_TURNS_SQL)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [(r[0], r[1], int(r[2])) for r in rows]
+    finally:
+        conn.close()
+
+
+def _new_summary(current_version: str, candidate_version: str) -> Dict[str, Any]:
+    return {
+        "current_ruleset_version": current_version,
+        "candidate_ruleset_version": candidate_version,
+        "sessions_evaluated": 0,
+        "sessions_skipped": 0,
+        "turns_covered": 0,
+        "sessions_changed": 0,
+        "path_changed": 0,
+        "flags_changed": 0,
+        "path_transitions": {},
+        "flags_added": {},
+        "flags_removed": {},
+    }
+
+
+def _merge(summary: Dict[str, Any], result: Dict[str, Any], write_change: Callable[[Dict[str, Any]], None]) -> None:
+    summary["sessions_evaluated"] += result["evaluated"]
+    summary["sessions_skipped"] += result["skipped"]
+
+    for change in result["changes"]:
+        summary["sessions_changed"] += 1
+        if change["path_before"] != change["path_after"]:
+            summary["path_changed"] += 1
+            key = f"{change['path_before']} -> {change['path_after']}"
+            summary["path_transitions"][key] = summary["path_transitions"].get(key, 0) + 1
+        if change["flags_added"] or change["flags_removed"]:
+            summary["flags_changed"] += 1
+        for f in change["flags_added"]:
+            summary["flags_added"][f] = summary["flags_added"].get(f, 0) + 1
+        for f in change["flags_removed"]:
+            summary["flags_removed"][f] = summary["flags_removed"].get(f, 0) + 1
+        write_change(change)
+
+
+def run_impact(
+    db_path: Path,
+    candidate_spec: str,
+    *,
+    workers: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    write_change: Callable[[Dict[str, Any]], None] = lambda change: None,
+) -> Dict[str, Any]:
+    # Fail fast in the parent if the candidate cannot be loaded.
+    current = load_ruleset(None)
+    candidate = load_ruleset(candidate_spec)
+    summary = _new_summary(str(current["version"]), str(candidate["version"]))
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(candidate_spec, db_path)) as pool:
+        # Keep a bounded window of batches in flight so memory does not grow
+        # with the size of the database.
+        max_in_flight = 2 * workers
+        pending = set()
+        for batch in iter_final_states(db_path, batch_size=batch_size):
+            summary["turns_covered"] += sum(b[2] for b in batch)
+            pending.add(pool.submit(_replay_batch, batch))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    _merge(summary, fut.result(), write_change)
+        for fut in pending:
+            _merge(summary, fut.result(), write_change)
+
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay stored sessions against a candidate ruleset.")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="Path to the API SQLite database.")
+    parser.add_argument("--candidate", required=True, help="Candidate ruleset: .json artefact, .py file or dotted module name.")
+    parser.add_argument("--changes", default=None, help="Write per-session changes as NDJSON here ('-' for stdout).")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Sessions per worker task.")
+    args = parser.parse_args(argv)
+
+    out = None
+    if args.changes == "-":
+        out = sys.stdout
+    elif args.changes:
+        out = open(args.changes, "w", encoding="utf-8")
+
+    def write_change(change: Dict[str, Any]) -> None:
+        if out is not None:
+            out.write(json.dumps(change, ensure_ascii=False) + "\n")
+
+    try:
+        summary = run_impact(
+            Path(args.db),
+            args.candidate,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            write_change=write_change,
+        )
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
+
+    # Keep stdout parseable as NDJSON when changes are streamed there.
+    summary_out = sys.stderr if out is sys.stdout else sys.stdout
+    print(json.dumps(summary, indent=2, sort_keys=True), file=summary_out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# api/search.py
+"""
+Full-text search over logged turns.
+
+`turns_fts` is an FTS5 index over `turns.user_text` and `turns.assistant_text`
+in external-content mode: it stores only the index and reads the text back
+from `turns`. Triggers keep it in sync with every insert, update and delete,
+whichever code path does the write (turn writer, session reset, retention).
+
+Queries use FTS5 syntax, so one parameter covers the common cases:
+
+    chest pain          both words, anywhere in the turn
+    "chest pain"        the phrase
+    breath*             prefix
+    chest NOT pain      boolean operators (AND / OR / NOT)
+
+Results are newest first and paginated by turn id (`before_id`), which the
+index can serve in rowid order without ranking or sorting every match; the
+path and flag filters are applied to the matching turns.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+FIELDS = {"all": None, "user": "user_text", "assistant": "assistant_text"}
+MAX_LIMIT = 200
+SNIPPET_TOKENS = 16
+
+
+def search(
+    conn: sqlite3.Connection,
+    q: str,
+    *,
+    field: str = "all",
+    path: Optional[str] = None,
+    flag: Optional[str] = None,
+    without_flag: Optional[str] = None,
+    before_id: Optional[int] = None,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """
+    Matching turns, newest first. Raises ValueError for a malformed query or
+    bad parameters. `next_before_id` continues the listing (None at the end).
+    """
+    if not q or not q.strip():
+        raise ValueError("q must not be empty")
+    if field not in FIELDS:
+        raise ValueError(f"field must be one of {sorted(FIELDS)}")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be 1..{MAX_LIMIT}")
+
+    match = q if FIELDS[field] is None else f"{FIELDS[field]} : ({q})"
+    where, params = ["turns_fts MATCH ?", "turns.id = turns_fts.rowid"], [match]
+    if before_id is not None:
+        where.append("turns_fts.rowid < ?")
+        params.append(before_id)
+    if path:
+        where.append("turns.path = ?")
+        params.append(path)
+    has_flag = "EXISTS (SELECT 1 FROM json_each(COALESCE(turns.flags_json, flags_blob.body)) WHERE value = ?)"
+    if flag:
+        where.append(has_flag)
+        params.append(flag)
+    if without_flag:
+        where.append(f"NOT {has_flag}")
+        params.append(without_flag)
+
+    sql = f"""
+        SELECT turns.id, turns.session_id, turns.created_at, turns.phase, turns.path,
+               COALESCE(turns.flags_json, flags_blob.body) AS flags_json,
+               snippet(turns_fts, 0, '[', ']', '…', {SNIPPET_TOKENS}) AS user_snippet,
+               snippet(turns_fts, 1, '[', ']', '…', {SNIPPET_TOKENS}) AS assistant_snippet
+        FROM turns_fts, turns LEFT JOIN json_blobs AS flags_blob ON flags_blob.hash = turns.flags_ref
+        WHERE {" AND ".join(where)}
+        ORDER BY turns_fts.rowid DESC
+        LIMIT ?
+    """
+    try:
+        rows = conn.execute(sql, params + [limit + 1]).fetchall()
+    except sqlite3.OperationalError as e:
+        # FTS5 reports query syntax errors (unbalanced quotes, stray operators) this way.
+        raise ValueError(f"invalid search query: {e}") from e
+
+    results: List[Dict[str, Any]] = []
+    for r in rows[:limit]:
+        results.append(
+            {
+                "id": r["id"],
+                "session_id": r["session_id"],
+                "created_at": r["created_at"],
+                "phase": r["phase"],
+                "path": r["path"],
+                "flags": json.loads(r["flags_json"] or "[]"),
+                "user_text": r["user_snippet"],
+                "assistant_text": r["assistant_snippet"],
+            }
+        )
+    return {"results": results, "next_before_id": results[-1]["id"] if len(rows) > limit else None}
@@ -0,0 +1,125 @@
+# api/session_store.py
+"""
+Server-side chat state, keyed by session_id.
+
+The authoritative state of a session is the latest state in its event log
+(api/event_log.py). `SessionStore` keeps the states of recently active
+sessions in an in-memory LRU so a turn does not have to rebuild it; on a
+miss the state is reconstructed from the log (a replay of at most
+SNAPSHOT_EVERY events) and cached.
+
+Cached states are held as soficca_core.chat_state.ChatState, the compact
+at-rest form (~1.2 KB vs ~2.9 KB per session); `get` hands out the dict
+form the engine runs on and `put` takes one.
+
+Turns of the same session must not interleave (each one starts from the
+previous one's output), so callers hold `store.lock(session_id)` across
+get -> generate_report -> put. Locks are striped: a fixed array hashed by
+session_id, so there is no per-session lock bookkeeping to evict.
+
+Sessions with an open chat socket (api/chat_actors.py) are pinned: eviction
+skips them, so a connected session never pays for a reload. With more pinned
+sessions than `capacity` the cache holds them all and evicts everything else.
+
+Configuration:
+    SOFICCA_SESSION_CACHE_SIZE   sessions kept in memory (default 1024)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Callable, Dict, Optional
+
+from soficca_core.chat_state import ChatState
+
+CACHE_SIZE = int(os.getenv("SOFICCA_SESSION_CACHE_SIZE", "1024"))
+LOCK_STRIPES = 64
+
+# Loader: session_id -> latest state, or None for a session with no turns.
+Loader = Callable[[str], Optional[Dict[str, Any]]]
+
+
+class SessionStore:
+    def __init__(self, loader: Loader, capacity: int = CACHE_SIZE):
+        self.capacity = max(1, capacity)
+        self._loader = loader
+        self._states: "OrderedDict[str, Optional[ChatState]]" = OrderedDict()
+        self._pinned: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._stats: Dict[str, float] = {"hits": 0, "misses": 0, "evictions": 0, "load_ms_total": 0.0, "load_ms_max": 0.0}
+
+    def lock(self, session_id: str) -> threading.Lock:
+        """Serializes turns of one session (shared with unrelated sessions on the same stripe)."""
+        return self._stripes[hash(session_id) % LOCK_STRIPES]
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Latest state of the session, or None if it has no turns. Loader errors propagate."""
+        with self._lock:
+            if session_id in self._states:
+                self._states.move_to_end(session_id)
+                self._stats["hits"] += 1
+                cached = self._states[session_id]
+                return None if cached is None else cached.to_dict()
+            self._stats["misses"] += 1
+
+        t0 = time.perf_counter()
+        state = self._loader(session_id)
+        load_ms = (time.perf_counter() - t0) * 1000
+        with self._lock:
+            self._stats["load_ms_total"] += load_ms
+            self._stats["load_ms_max"] = max(self._stats["load_ms_max"], load_ms)
+        self.put(session_id, state)
+        return state
+
+    def put(self, session_id: str, state: Optional[Dict[str, Any]]) -> None:
+        compact = None if state is None else ChatState.from_dict(state)
+        with self._lock:
+            self._states[session_id] = compact
+            self._states.move_to_end(session_id)
+            self._evict()
+
+    def _evict(self) -> None:
+        excess = len(self._states) - self.capacity
+        if excess <= 0:
+            return
+        if not self._pinned:
+            for _ in range(excess):
+                self._states.popitem(last=False)
+        else:
+            victims = list(islice((sid for sid in self._states if sid not in self._pinned), excess))
+            for sid in victims:
+                del self._states[sid]
+            excess = len(victims)
+        self._stats["evictions"] += excess
+
+    def pin(self, session_id: str) -> None:
+        """Keeps the session's state cached until a matching `unpin` (pins are counted)."""
+        with self._lock:
+            self._pinned[session_id] = self._pinned.get(session_id, 0) + 1
+
+    def unpin(self, session_id: str) -> None:
+        with self._lock:
+            n = self._pinned.pop(session_id, 0) - 1
+            if n > 0:
+                self._pinned[session_id] = n
+            self._evict()
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            self._states.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+            out["size"] = len(self._states)
+            out["pinned"] = len(self._pinned)
+        out["capacity"] = self.capacity
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = out["hits"] / lookups if lookups else 0.0
+        out["load_ms_avg"] = out["load_ms_total"] / out["misses"] if out["misses"] else 0.0
+        return out
@@ -0,0 +1,68 @@
+# api/session_summary.py
+"""
+Per-session summary rows (turn count, last phase/path, last activity).
+
+Every function takes the connection of an open write transaction and is
+called next to the write it summarizes, so the summary never disagrees with
+`turns`. Listings read this table instead of aggregating `turns`.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+
+def record_session(conn: sqlite3.Connection, session_id: str, created_at: str) -> None:
+    conn.execute(
+        "INSERT OR IGNORE INTO session_summary(session_id, created_at, turn_count, last_activity) VALUES (?, ?, 0, ?)",
+        (session_id, created_at, created_at),
+    )
+
+
+def record_turn(
+    conn: sqlite3.Connection,
+    session_id: str,
+    turn_id: int,
+    created_at: str,
+    phase: Optional[str],
+    path: Optional[str],
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO session_summary(session_id, created_at, turn_count, last_turn_id, last_phase, last_path, last_activity)
+        VALUES (?, ?, 1, ?, ?, ?, ?)
+        ON CONFLICT(session_id) DO UPDATE SET
+            turn_count = turn_count + 1,
+            last_turn_id = excluded.last_turn_id,
+            last_phase = excluded.last_phase,
+            last_path = excluded.last_path,
+            last_activity = excluded.last_activity
+        """,
+        (session_id, created_at, turn_id, phase, path, created_at),
+    )
+
+
+def reset_session(conn: sqlite3.Connection, session_id: str, at: str) -> None:
+    conn.execute(
+        """
+        UPDATE session_summary
+        SET turn_count = 0, last_turn_id = NULL, last_phase = NULL, last_path = NULL, last_activity = ?
+        WHERE session_id = ?
+        """,
+        (at, session_id),
+    )
+
+
+def list_sessions(conn: sqlite3.Connection, *, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+    """Most recently active sessions first."""
+    rows = conn.execute(
+        """
+        SELECT session_id, created_at, turn_count, last_phase, last_path, last_activity
+        FROM session_summary
+        ORDER BY last_activity DESC, session_id DESC
+        LIMIT ? OFFSET ?
+        """,
+        (limit, offset),
+    ).fetchall()
+    return [dict(r) for r in rows]
@@ -0,0 +1,300 @@
+# api/turn_writer.py
+"""
+Write-behind turn logging.
+
+Request handlers enqueue a write job (a callable taking a connection) and
+return without touching the disk. One background thread drains the queue
+and commits jobs in batches: up to FLUSH_SIZE jobs, or whatever arrived
+within FLUSH_INTERVAL_MS of the first one, in a single transaction. Each job
+runs under its own savepoint, so one failing row does not lose the batch.
+A transaction that fails as a whole (sqlite3.Error, e.g. SQLITE_BUSY past
+the busy timeout) is retried up to WRITE_RETRIES times with exponential
+backoff; a batch that still fails is lost and counted in `failed_batches`
+and `errors`, with the error in `last_error` (stats and /metrics).
+
+When the queue is full, POLICY decides:
+    block    wait up to QUEUE_TIMEOUT_MS for space, then reject (the caller
+             answers 503); this is backpressure on the request path
+    drop     drop the job and count it (the event log re-snapshots on the
+             next turn of that session, see event_log)
+    inline   wait until the queued jobs are committed, then run the job on
+             the caller's thread (so it cannot overtake its session's
+             earlier turns)
+
+`flush()` waits, at most SOFICCA_TURN_FLUSH_TIMEOUT_MS by default, until
+everything enqueued so far is committed; readers call it first to see their
+own writes and get False back when the writer is behind (e.g. retrying a
+busy database). `close()` flushes and stops the thread and
+is registered with atexit.
+
+Configuration:
+    SOFICCA_TURN_QUEUE_SIZE         max queued jobs (default 1000)
+    SOFICCA_TURN_FLUSH_SIZE         max jobs per transaction (default 64)
+    SOFICCA_TURN_FLUSH_INTERVAL_MS  max wait to fill a batch (default 20)
+    SOFICCA_TURN_QUEUE_POLICY       block | drop | inline (default block)
+    SOFICCA_TURN_QUEUE_TIMEOUT_MS   block policy wait (default 1000)
+    SOFICCA_TURN_WRITE_RETRIES      retries of a failed transaction (default 3)
+    SOFICCA_TURN_RETRY_BACKOFF_MS   wait before the first retry, doubled after each (default 50)
+    SOFICCA_TURN_FLUSH_TIMEOUT_MS   default flush() wait (default 10000)
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from api import metrics
+from api.db import ConnectionManager
+
+Job = Callable[[sqlite3.Connection], Any]
+
+QUEUE_SIZE = int(os.getenv("SOFICCA_TURN_QUEUE_SIZE", "1000"))
+FLUSH_SIZE = int(os.getenv("SOFICCA_TURN_FLUSH_SIZE", "64"))
+FLUSH_INTERVAL_MS = float(os.getenv("SOFICCA_TURN_FLUSH_INTERVAL_MS", "20"))
+POLICY = os.getenv("SOFICCA_TURN_QUEUE_POLICY", "block").lower()
+QUEUE_TIMEOUT_MS = float(os.getenv("SOFICCA_TURN_QUEUE_TIMEOUT_MS", "1000"))
+WRITE_RETRIES = int(os.getenv("SOFICCA_TURN_WRITE_RETRIES", "3"))
+RETRY_BACKOFF_MS = float(os.getenv("SOFICCA_TURN_RETRY_BACKOFF_MS", "50"))
+FLUSH_TIMEOUT_MS = float(os.getenv("SOFICCA_TURN_FLUSH_TIMEOUT_MS", "10000"))
+
+POLICIES = ("block", "drop", "inline")
+
+_STOP = object()
+_FLUSH = object()  # ends the batch being collected, so flush() does not wait out the interval
+
+
+class TurnWriter:
+    def __init__(
+        self,
+        db: ConnectionManager,
+        *,
+        queue_size: int = QUEUE_SIZE,
+        flush_size: int = FLUSH_SIZE,
+        flush_interval_ms: float = FLUSH_INTERVAL_MS,
+        policy: str = POLICY,
+        queue_timeout_ms: float = QUEUE_TIMEOUT_MS,
+        write_retries: int = WRITE_RETRIES,
+        retry_backoff_ms: float = RETRY_BACKOFF_MS,
+        flush_timeout_ms: float = FLUSH_TIMEOUT_MS,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown turn queue policy {policy!r} (expected one of {POLICIES})")
+        self.db = db
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self.policy = policy
+        self.queue_timeout = queue_timeout_ms / 1000
+        self.write_retries = max(0, write_retries)
+        self.retry_backoff = retry_backoff_ms / 1000
+        self.flush_timeout = flush_timeout_ms / 1000
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._done = 0
+        self._closed = False
+        self._stats: Dict[str, float] = {
+            "enqueued": 0,
+            "written": 0,
+            "errors": 0,
+            "dropped": 0,
+            "rejected": 0,
+            "inline": 0,
+            "batches": 0,
+            "retries": 0,
+            "failed_batches": 0,
+            "flush_ms_total": 0.0,
+            "flush_ms_max": 0.0,
+            "last_flush_ms": 0.0,
+            "last_batch_size": 0,
+            "queue_wait_ms_max": 0.0,
+        }
+        self._last_error: Optional[str] = None
+        self._thread = threading.Thread(target=self._run, name="turn-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # -----------------------------
+    # Producer side
+    # -----------------------------
+    def submit(self, job: Job) -> bool:
+        """Queue `job`. False if it was dropped or rejected per the queue policy."""
+        if self._closed:
+            return self._write_inline(job)
+        item = (time.perf_counter(), job)
+        with self._cond:
+            self._submitted += 1
+        try:
+            if self.policy == "block":
+                self._queue.put(item, timeout=self.queue_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            self._finish(1)
+            if self.policy == "inline":
+                # Jobs queued before this one (the session's earlier turns among them) go first;
+                # the writer's retries are bounded, so this wait is too.
+                while not self.flush():
+                    pass
+                return self._write_inline(job)
+            self._count("rejected" if self.policy == "block" else "dropped")
+            return False
+        self._count("enqueued")
+        return True
+
+    def _write_inline(self, job: Job) -> bool:
+        t0 = time.perf_counter()
+        written, errors = self._transaction([job])
+        metrics.DB_WRITE_SECONDS.observe(time.perf_counter() - t0, kind="turn_inline")
+        with self._cond:
+            self._stats["inline"] += 1
+            self._stats["written"] += written
+            self._stats["errors"] += errors
+        return written == 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every job submitted before this call is committed, for at
+        most `timeout` seconds (default flush_timeout). False on timeout.
+        """
+        with self._cond:
+            target = self._submitted
+            if self._done >= target:
+                return True
+        if not self._closed:
+            try:
+                self._queue.put_nowait(_FLUSH)
+            except queue.Full:
+                pass  # a full queue already ends the batch being collected
+        with self._cond:
+            return self._cond.wait_for(lambda: self._done >= target, timeout=self.flush_timeout if timeout is None else timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    # -----------------------------
+    # Writer thread
+    # -----------------------------
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            if first is _FLUSH:
+                continue
+            batch = [first]
+            stop = False
+            deadline = time.perf_counter() + self.flush_interval
+            while len(batch) < self.flush_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                if item is _FLUSH:
+                    break
+                batch.append(item)
+            self._write_batch(batch)
+            if stop:
+                # Drain whatever raced in before the stop marker was seen.
+                rest = []
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP and item is not _FLUSH:
+                        rest.append(item)
+                if rest:
+                    self._write_batch(rest)
+                return
+
+    def _transaction(self, jobs: List[Job]) -> Tuple[int, int]:
+        """
+        (written, errors): runs `jobs` in one transaction, each under its own
+        savepoint, retrying the transaction while it fails as a whole.
+        """
+        delay = self.retry_backoff
+        for attempt in range(self.write_retries + 1):
+            written = errors = 0
+            try:
+                with self.db.write() as conn:
+                    for job in jobs:
+                        conn.execute("SAVEPOINT turn_job")
+                        try:
+                            job(conn)
+                        except Exception:
+                            conn.execute("ROLLBACK TO turn_job")
+                            errors += 1
+                        else:
+                            written += 1
+                        conn.execute("RELEASE turn_job")
+                return written, errors
+            except sqlite3.Error as e:
+                with self._cond:
+                    self._last_error = f"{type(e).__name__}: {e}"
+                    if attempt < self.write_retries:
+                        self._stats["retries"] += 1
+                    else:
+                        self._stats["failed_batches"] += 1
+            if attempt < self.write_retries:
+                time.sleep(delay)
+                delay *= 2
+        return 0, len(jobs)
+
+    def _write_batch(self, batch: List[Any]) -> None:
+        t0 = time.perf_counter()
+        written, errors = self._transaction([job for _, job in batch])
+        t1 = time.perf_counter()
+
+        flush_ms = (t1 - t0) * 1000
+        wait_ms = (t0 - min(enqueued for enqueued, _ in batch)) * 1000
+        metrics.DB_WRITE_SECONDS.observe(t1 - t0, kind="turn_batch")
+        metrics.TURN_QUEUE_WAIT_SECONDS.observe(wait_ms / 1000)
+        with self._cond:
+            s = self._stats
+            s["written"] += written
+            s["errors"] += errors
+            s["batches"] += 1
+            s["flush_ms_total"] += flush_ms
+            s["flush_ms_max"] = max(s["flush_ms_max"], flush_ms)
+            s["last_flush_ms"] = flush_ms
+            s["last_batch_size"] = len(batch)
+            s["queue_wait_ms_max"] = max(s["queue_wait_ms_max"], wait_ms)
+        self._finish(len(batch))
+
+    def _finish(self, n: int) -> None:
+        with self._cond:
+            self._done += n
+            self._cond.notify_all()
+
+    def _count(self, name: str) -> None:
+        with self._cond:
+            self._stats[name] += 1
+
+    # -----------------------------
+    # Metrics
+    # -----------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out = dict(self._stats)
+            out["last_error"] = self._last_error
+        out["queue_depth"] = self._queue.qsize()
+        out["queue_size"] = self._queue.maxsize
+        out["policy"] = self.policy
+        out["flush_size"] = self.flush_size
+        out["flush_interval_ms"] = self.flush_interval * 1000
+        out["flush_ms_avg"] = out["flush_ms_total"] / out["batches"] if out["batches"] else 0.0
+        return out
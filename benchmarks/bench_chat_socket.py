@@ -0,0 +1,85 @@
+# benchmarks/bench_chat_socket.py
+"""
+Per-turn latency of a scripted conversation: one POST /v1/report per turn
+(server-held state, the best REST case) vs turns over one WebSocket /v1/chat
+connection (api.chat_actors), both with profile=chat; then the same with a
+session cache of one entry and a second session interleaving, where REST
+turns rebuild the state from the event log and the pinned socket session
+does not.
+
+Both run in process through TestClient, so neither pays for TCP or TLS;
+over a network the REST path also pays a request's round trip and headers
+on every turn.
+
+    PYTHONPATH=. python benchmarks/bench_chat_socket.py
+"""
+
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+TEXTS = ["", "Carlos", "erection problems", "sometimes", "yes", "no", "a lot of stress", "yes", "mexico", "meds"]
+ROUNDS = 30
+
+
+def _rest(client, sid, before_turn):
+    latencies = []
+    for text in TEXTS:
+        before_turn()
+        body = json.dumps({"context": {"session_id": sid, "chat_text": text}})
+        t0 = time.perf_counter()
+        client.post("/v1/report?profile=chat", content=body, headers={"Content-Type": "application/json"}).json()
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def _socket(client, sid, before_turn):
+    latencies = []
+    with client.websocket_connect(f"/v1/chat?session_id={sid}&profile=chat") as ws:
+        for text in TEXTS:
+            before_turn()
+            frame = json.dumps({"chat_text": text})
+            t0 = time.perf_counter()
+            ws.send_text(frame)
+            json.loads(ws.receive_text())
+            latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def _report(label, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95)]
+    print(f"{label:<22} p50 {statistics.median(latencies) * 1e3:6.2f} ms   p95 {p95 * 1e3:6.2f} ms")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SOFICCA_DB_PATH"] = str(Path(tmp) / "bench.sqlite")
+        from fastapi.testclient import TestClient
+
+        import api.app as app_mod
+
+        with TestClient(app_mod.app) as client:
+            for evicting in (False, True):
+                app_mod.sessions.capacity = 1 if evicting else 1024
+                for label, run in (("REST", _rest), ("WebSocket", _socket)):
+                    latencies = []
+                    for _ in range(ROUNDS):
+                        sid = client.post("/v1/session", json={}).json()["session_id"]
+                        other = client.post("/v1/session", json={}).json()["session_id"]
+
+                        def before_turn(other=other):
+                            # Another session's turn; with capacity 1 it evicts ours unless pinned.
+                            if evicting:
+                                client.post("/v1/report?profile=minimal", json={"context": {"session_id": other, "chat_text": "hi"}})
+
+                        latencies += run(client, sid, before_turn)
+                    _report(f"{label}{', evicting' if evicting else ''}", latencies)
+            print("chat:", json.dumps(app_mod.chat.stats()), " session store:", json.dumps(app_mod.sessions.stats()))
+
+
+if __name__ == "__main__":
+    main()
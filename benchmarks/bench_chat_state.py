@@ -0,0 +1,77 @@
+# benchmarks/bench_chat_state.py
+"""
+Dict chat state vs ChatState: memory per in-memory session and per-turn
+serialization cost of the public state.
+
+    python benchmarks/bench_chat_state.py
+"""
+
+import json
+import time
+import tracemalloc
+
+from soficca_core.chat_state import ChatState, new_state
+from soficca_core.engine import _chat_state_public
+
+SESSIONS = 10_000
+TURNS = 20_000
+
+
+def _sample_state():
+    state = new_state()
+    state["slots"].update(
+        {
+            "name": "Carlos",
+            "gender_identity": "male",
+            "country": "Colombia",
+            "reason": "I want help with my sexual performance.",
+            "main_issue": "duration",
+            "frequency": "sometimes",
+        }
+    )
+    state["phase"] = "SYMPTOMS"
+    state["last_question_id"] = "desire"
+    state["turn"] = 7
+    state["meta"]["repair_counts"] = {"frequency": 1}
+    return json.dumps(_chat_state_public(state))
+
+
+def _measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    held = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    return held, size / SESSIONS
+
+
+def _timeit(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    raw = _sample_state()
+
+    _, dict_bytes = _measure(lambda: [json.loads(raw) for _ in range(SESSIONS)])
+    _, compact_bytes = _measure(lambda: [ChatState(json.loads(raw)) for _ in range(SESSIONS)])
+
+    state = json.loads(raw)
+    compact = ChatState(state)
+    assert compact.to_dict() == state
+
+    dict_us = _timeit(lambda: json.dumps(_chat_state_public(state)), TURNS)
+    compact_us = _timeit(lambda: json.dumps(compact.to_public_dict()), TURNS)
+    decode_us = _timeit(lambda: ChatState(json.loads(raw)), TURNS)
+    json_decode_us = _timeit(lambda: json.loads(raw), TURNS)
+
+    print(f"memory / session     dict: {dict_bytes:8.0f} B   ChatState: {compact_bytes:8.0f} B")
+    print(f"public dump / turn   dict: {dict_us:8.2f} us  ChatState: {compact_us:8.2f} us")
+    print(f"load / turn          dict: {json_decode_us:8.2f} us  ChatState: {decode_us:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_dataset_export.py
+"""
+Partitioned dataset export throughput (api.dataset_export) by worker count
+and format, over a synthetic log of TURNS turns spread across DAYS days.
+
+    PYTHONPATH=. python benchmarks/bench_dataset_export.py
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from api import dataset_export, migrations
+from api.db import ConnectionManager
+
+TURNS = 200_000
+DAYS = 8
+WORKERS = (1, 2, 4)
+
+_ASSISTANT = "Thanks for sharing that. " * 12
+_TRACE = '{"stage": "question", "rules": ["r1", "r2"], "signals": {"a": 1}}'
+
+
+def _populate(path):
+    db = ConnectionManager(path)
+    with db.write() as conn:
+        migrations.migrate(conn)
+        conn.executemany(
+            "INSERT INTO turns(session_id, created_at, user_text, assistant_text, phase, path, flags_json,"
+            " reasons_json, recommendations_json, trace_json) VALUES (?, ?, ?, ?, 'INTRO', 'P', '[]', '[\"R\"]', '[]', ?)",
+            (
+                (f"s{i % 5000}", f"2026-03-{1 + i % DAYS:02d}T{i % 24:02d}:00:00.{i:06d}+00:00", f"message {i}", _ASSISTANT, _TRACE)
+                for i in range(TURNS)
+            ),
+        )
+    db.close_all()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "turns.sqlite"
+        _populate(db_path)
+        for fmt in dataset_export.FORMATS:
+            params = dataset_export.export_params(fmt=fmt, partition="day")
+            for workers in WORKERS:
+                out = Path(tmp) / f"{fmt}-{workers}"
+                t0 = time.perf_counter()
+                manifest = dataset_export.run_export(db_path, out, params, workers=workers)
+                elapsed = time.perf_counter() - t0
+                print(
+                    f"{fmt:<6} {workers} workers  {TURNS / elapsed:>9,.0f} turns/s"
+                    f"  {manifest['bytes'] / 1e6:6.1f} MB gzip in {len(manifest['partitions'])} partitions"
+                )
+
+
+if __name__ == "__main__":
+    main()
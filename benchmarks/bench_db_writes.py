@@ -0,0 +1,103 @@
+# benchmarks/bench_db_writes.py
+"""
+Turn-log write throughput under concurrent load: the previous
+connect / insert / commit / close per request (rollback journal,
+synchronous=FULL) vs api.db.ConnectionManager (per-thread connection, WAL,
+synchronous=NORMAL, cached statements). One extra thread keeps reading a
+session export the whole time.
+
+    PYTHONPATH=. python benchmarks/bench_db_writes.py
+"""
+
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from api.db import ConnectionManager
+
+WRITES_PER_THREAD = 300
+THREADS = (1, 4, 8)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    user_text TEXT NOT NULL,
+    assistant_text TEXT NOT NULL,
+    trace_json TEXT
+)
+"""
+_INSERT = "INSERT INTO turns(session_id, created_at, user_text, assistant_text, trace_json) VALUES (?, ?, ?, ?, ?)"
+_EXPORT = "SELECT * FROM turns WHERE session_id = ? ORDER BY id"
+_ROW = ("2026-01-01T00:00:00+00:00", "I want help with performance", "Tell me, Carlos.\n\n" + "x" * 400, '{"stage": "question"}')
+
+
+def _legacy_write(path, session_id):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute(_INSERT, (session_id,) + _ROW)
+    conn.commit()
+    conn.close()
+
+
+def _legacy_read(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute(_EXPORT, ("s0",)).fetchall()
+    conn.close()
+
+
+def _run(label, threads, write, read):
+    done = threading.Event()
+    reads = [0]
+
+    def reader():
+        while not done.is_set():
+            read()
+            reads[0] += 1
+
+    def writer(i):
+        for _ in range(WRITES_PER_THREAD):
+            write(f"s{i}")
+
+    rt = threading.Thread(target=reader)
+    rt.start()
+    workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - t0
+    done.set()
+    rt.join()
+    print(f"{label:<20} {threads:>3} threads {threads * WRITES_PER_THREAD / elapsed:>9,.0f} writes/s {reads[0] / elapsed:>8,.0f} exports/s")
+
+
+def main():
+    for threads in THREADS:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "legacy.sqlite"
+            sqlite3.connect(path).execute(_SCHEMA)
+            _run("connect per request", threads, lambda sid: _legacy_write(path, sid), lambda: _legacy_read(path))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db = ConnectionManager(Path(tmp) / "managed.sqlite")
+            with db.write() as conn:
+                conn.execute(_SCHEMA)
+
+            def write(sid):
+                with db.write() as conn:
+                    conn.execute(_INSERT, (sid,) + _ROW)
+
+            def read():
+                with db.read() as conn:
+                    conn.execute(_EXPORT, ("s0",)).fetchall()
+
+            _run("ConnectionManager", threads, write, read)
+            db.close_all()
+
+
+if __name__ == "__main__":
+    main()
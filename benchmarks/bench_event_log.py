@@ -0,0 +1,63 @@
+# benchmarks/bench_event_log.py
+"""
+Event log vs a state blob per turn: stored bytes per session and the time
+to reconstruct a session's latest state, for several snapshot intervals.
+
+    SOFICCA_OPENAI_NLU_ENABLED=0 PYTHONPATH=. python benchmarks/bench_event_log.py
+"""
+
+import json
+import sqlite3
+import time
+
+from api import event_log, migrations
+from soficca_core.engine import generate_report
+
+TURNS = ["", "Carlos", "male", "Colombia", "hi", "I want help with performance", "sometimes", "low", "high", "no"]
+SESSION_TURNS = 60
+SESSIONS = 20
+
+
+def _texts():
+    return [TURNS[i] if i < len(TURNS) else ("wait" if i % 2 else "thanks") for i in range(SESSION_TURNS)]
+
+
+def _bytes(conn, table, columns):
+    expr = " + ".join(f"COALESCE(LENGTH({c}), 0)" for c in columns)
+    return conn.execute(f"SELECT SUM({expr}) FROM {table}").fetchone()[0] or 0
+
+
+def _run(snapshot_every):
+    event_log.SNAPSHOT_EVERY = snapshot_every
+    conn = sqlite3.connect(":memory:")
+    migrations.migrate(conn)
+    blob_bytes = 0
+    for s in range(SESSIONS):
+        state = None
+        for text in _texts():
+            payload = {"user": {}, "measurements": [], "context": {"chat_text": text, "chat_state": state, "nlu_record": True}}
+            res = generate_report(payload)
+            event_log.append_event(conn, f"s{s}", payload, res)
+            state = res["report"]["chat"]["state"]
+            blob_bytes += len(json.dumps(state, default=str))
+    log_bytes = _bytes(conn, "turn_events", ["input_json", "nlu_json", "state_checksum"]) + _bytes(
+        conn, "state_snapshots", ["state_json"]
+    )
+
+    t0 = time.perf_counter()
+    for s in range(SESSIONS):
+        event_log.reconstruct(conn, f"s{s}")
+    rebuild_ms = (time.perf_counter() - t0) / SESSIONS * 1e3
+    return blob_bytes / SESSIONS, log_bytes / SESSIONS, rebuild_ms
+
+
+def main():
+    print(f"{SESSIONS} sessions x {SESSION_TURNS} turns")
+    print(f"{'snapshot every':>14} {'blob B/sess':>12} {'log B/sess':>11} {'rebuild ms':>11}")
+    for n in (1, 5, 10, 25, SESSION_TURNS):
+        blob, log, ms = _run(n)
+        print(f"{n:>14} {blob:>12,.0f} {log:>11,.0f} {ms:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_exports.py
+"""
+Session export memory and time as a session grows: the previous
+fetchall + json.loads every column + one JSON document in memory vs the
+streaming export (api.exports: fetchmany, stored JSON spliced as-is, chunked
+output). Turns carry a stored state_json so no event-log replay is involved.
+Times are measured under tracemalloc, so compare them only with each other.
+
+    PYTHONPATH=. python benchmarks/bench_exports.py
+"""
+
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from api import exports, migrations
+from api.db import ConnectionManager
+
+SIZES = (1_000, 10_000, 50_000)
+
+_STATE = json.dumps({"turn": 7, "phase": "INTRO", "slots": {"name": "Carlos", "frequency": "sometimes"}, "meta": {"locale": "en"}})
+_TRACE = json.dumps({"stage": "question", "rules": ["r1", "r2", "r3"], "signals": {"a": 1, "b": 2}})
+_ASSISTANT = "Tell me, Carlos.\n\n" + "x" * 400
+
+
+def _legacy_export(db, session_id):
+    with db.read() as conn:
+        s = conn.execute("SELECT session_id, created_at, user_json FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        rows = conn.execute(
+            "SELECT id, created_at, user_text, assistant_text, phase, path, flags_json, reasons_json,"
+            " recommendations_json, trace_json, state_json FROM turns WHERE session_id = ? ORDER BY id",
+            (session_id,),
+        ).fetchall()
+    turns = [
+        {
+            "id": r["id"],
+            "created_at": r["created_at"],
+            "user_text": r["user_text"],
+            "assistant_text": r["assistant_text"],
+            "phase": r["phase"],
+            "path": r["path"],
+            "flags": json.loads(r["flags_json"] or "[]"),
+            "reasons": json.loads(r["reasons_json"] or "[]"),
+            "recommendations": json.loads(r["recommendations_json"] or "[]"),
+            "trace": json.loads(r["trace_json"] or "{}"),
+            "state": json.loads(r["state_json"]),
+        }
+        for r in rows
+    ]
+    body = json.dumps({"session_id": s["session_id"], "created_at": s["created_at"], "user": json.loads(s["user_json"]), "turns": turns, "turn_count": len(turns)})
+    return len(body)
+
+
+def _streaming_export(db, session_id):
+    with db.read() as conn:
+        s = dict(conn.execute("SELECT session_id, created_at, user_json FROM sessions WHERE session_id = ?", (session_id,)).fetchone())
+    return sum(len(chunk) for chunk in exports.session_json(db, s))
+
+
+def _measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    size = fn(*args)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def main():
+    for n in SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = ConnectionManager(Path(tmp) / "export.sqlite")
+            with db.write() as conn:
+                migrations.migrate(conn)
+                conn.execute("INSERT INTO sessions VALUES ('s', '2026-01-01T00:00:00+00:00', '{}')")
+                conn.executemany(
+                    "INSERT INTO turns(session_id, created_at, user_text, assistant_text, phase, path, flags_json,"
+                    " reasons_json, recommendations_json, trace_json, state_json) VALUES ('s', ?, ?, ?, 'INTRO', 'P', '[]', '[\"R\"]', '[]', ?, ?)",
+                    ((f"2026-01-01T00:00:{i:09d}", f"message {i}", _ASSISTANT, _TRACE, _STATE) for i in range(n)),
+                )
+            for label, fn in (("fetchall + loads", _legacy_export), ("streaming", _streaming_export)):
+                size, elapsed, peak = _measure(fn, db, "s")
+                print(f"{n:>7,} turns  {label:<17} {size / 1e6:7.1f} MB out  {elapsed * 1e3:8.1f} ms  peak {peak / 1e6:7.1f} MB")
+            db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_locales.py
+"""
+Startup cost as locales are added: engine import time and peak RSS in a
+fresh interpreter, with 1..N bundle files in SOFICCA_LOCALE_DIR (copies of
+en.json, every text tagged with the locale code so nothing is shared). For contrast, the last column is peak RSS after loading every
+bundle, i.e. what eager per-locale modules would cost.
+
+    python benchmarks/bench_locales.py
+"""
+
+import itertools
+import json
+import os
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import soficca_core
+
+EN = Path(soficca_core.__file__).with_name("locales") / "en.json"
+COUNTS = (1, 10, 50, 200)
+REPEATS = 5
+
+_PROBE = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+import soficca_core.engine as engine
+import_ms = (time.perf_counter() - t0) * 1e3
+engine.generate_report({"context": {"chat_text": ""}})
+rss_first_turn = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.argv[1] == "all":
+    from soficca_core import message_bundles
+    for locale in message_bundles.available_locales():
+        message_bundles.get_bundle(locale)
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"import_ms": import_ms, "rss_first_turn_kb": rss_first_turn, "rss_kb": rss}))
+"""
+
+
+def _tagged(value, code):
+    if isinstance(value, dict):
+        return {k: _tagged(v, code) for k, v in value.items()}
+    if isinstance(value, str) and not value.startswith("@"):
+        return f"[{code}] {value}"
+    return value
+
+
+def _codes():
+    for a, b in itertools.product(string.ascii_lowercase, repeat=2):
+        if a + b != "en":
+            yield a + b
+
+
+def _probe(locale_dir, mode):
+    env = dict(os.environ, SOFICCA_LOCALE_DIR=str(locale_dir), SOFICCA_OPENAI_NLU_ENABLED="0")
+    runs = []
+    for _ in range(REPEATS):
+        out = subprocess.run([sys.executable, "-c", _PROBE, mode], env=env, capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda r: r["import_ms"])
+    return best["import_ms"], min(r["rss_first_turn_kb"] for r in runs), min(r["rss_kb"] for r in runs)
+
+
+def main():
+    print(f"{'locales':>8} {'import ms':>10} {'RSS MB':>8} {'RSS MB, all loaded':>19}")
+    for count in COUNTS:
+        with tempfile.TemporaryDirectory() as tmp:
+            en = json.loads(EN.read_text(encoding="utf-8"))
+            shutil.copy(EN, Path(tmp) / "en.json")
+            for code in itertools.islice(_codes(), count - 1):
+                definition = {"locale": code}
+                definition.update({k: _tagged(v, code) for k, v in en.items() if k != "locale"})
+                (Path(tmp) / f"{code}.json").write_text(json.dumps(definition), encoding="utf-8")
+            import_ms, rss_kb, _ = _probe(tmp, "lazy")
+            _, _, rss_all_kb = _probe(tmp, "all")
+        print(f"{count:>8} {import_ms:>10.1f} {rss_kb / 1024:>8.1f} {rss_all_kb / 1024:>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# benchmarks/bench_messages.py
+"""
+Assistant message rendering cost: the renderer calls of a typical turn mix
+(intro, questions, repairs, clarifications, end messages), per turn.
+
+    python benchmarks/bench_messages.py
+"""
+
+import time
+
+from soficca_core import messages_en as m
+
+RUNS = 200_000
+QIDS = ["reason", "main_issue", "frequency", "desire", "stress", "morning_erection", "gender_identity", "country", "name"]
+
+
+def _turn(i, name):
+    q = QIDS[i % len(QIDS)]
+    phase = i % 6
+    if phase == 0:
+        return m.safe_space(name) + "\n\n" + m.ask_reason(name)
+    if phase == 1:
+        return m.repair_for_question(q, name=name)
+    if phase == 2:
+        return m.clarify_once_for_question(q, name=name)
+    if phase == 3:
+        return m.greet_back(name) + "\n\n" + m.ask_frequency()
+    if phase == 4:
+        return m.end_meds_options(name=name, needs_eval_parallel=bool(i & 8))
+    return m.end_support_plan(name=name)
+
+
+def main():
+    for label, name in (("with name", "Carlos"), ("without name", None)):
+        t0 = time.perf_counter()
+        for i in range(RUNS):
+            _turn(i, name)
+        ns = (time.perf_counter() - t0) / RUNS * 1e9
+        print(f"{label:<13} {ns:7.0f} ns/turn")
+
+
+if __name__ == "__main__":
+    main()
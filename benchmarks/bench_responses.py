@@ -0,0 +1,89 @@
+# benchmarks/bench_responses.py
+"""
+Bytes and encoding CPU per /v1/report turn: FastAPI's generic encoder on
+the full envelope vs api.responses (shaping + direct encoding, gzip when the
+body reaches SOFICCA_GZIP_MIN_BYTES) for each profile.
+
+Results are collected from CONVERSATIONS scripted conversations sent the way
+the API sends them (session state in context.chat_state), so the
+normalized_input echo carries the state as it does in production.
+
+    PYTHONPATH=. python benchmarks/bench_responses.py
+"""
+
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from api import responses
+from soficca_core.engine import generate_report
+
+CONVERSATIONS = 40
+REPEAT = 20
+
+_SCRIPT = [
+    "hi",
+    "my name is Sam",
+    "I'm 45",
+    "sometimes I have trouble keeping an erection",
+    "about 6 months",
+    "morning erections happen less often",
+    "no medication",
+    "I feel stressed at work",
+    "yes, I'd like to talk to a doctor",
+]
+
+
+def _results():
+    out = []
+    for c in range(CONVERSATIONS):
+        state = None
+        for text in _SCRIPT:
+            context = {"session_id": f"s{c}", "chat_text": text, "chat_state": state, "nlu_record": True}
+            res = generate_report({"context": context})
+            res.setdefault("meta", {})["session_id"] = f"s{c}"
+            res["report"]["chat"].pop("nlu_results", None)
+            state = res["report"]["chat"].get("state")
+            out.append(res)
+    return out
+
+
+def _fastapi(result):
+    # What the route does with a returned dict: jsonable_encoder, then JSONResponse.render.
+    return json.dumps(jsonable_encoder(result), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def _us_per_turn(fn, results):
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in range(REPEAT):
+            for r in results:
+                fn(r)
+        best = min(best, time.perf_counter() - t0)
+    return best / (REPEAT * len(results)) * 1e6
+
+
+def main():
+    results = _results()
+    n = len(results)
+    base_bytes = sum(len(_fastapi(r)) for r in results) / n
+    base_us = _us_per_turn(_fastapi, results)
+    print(f"{n} turns, encoder: {'orjson' if responses.orjson is not None else 'stdlib json'}")
+    print(f"{'fastapi full':<16} {base_bytes:7.0f} B {'':>16} {base_us:7.1f} us")
+
+    for profile in ("full", "chat", "minimal"):
+        bodies = [responses.render(r, profile).body for r in results]
+        wire = [responses.render(r, profile, "gzip").body for r in results]
+        raw_b, wire_b = sum(map(len, bodies)) / n, sum(map(len, wire)) / n
+        raw_us = _us_per_turn(lambda r: responses.render(r, profile), results)
+        gz_us = _us_per_turn(lambda r: responses.render(r, profile, "gzip"), results)
+        print(
+            f"{profile:<16} {raw_b:7.0f} B  gzip {wire_b:6.0f} B   {raw_us:7.1f} us  gzip {gz_us:6.1f} us"
+            f"   (saves {base_bytes - wire_b:5.0f} B, {base_us - gz_us:6.1f} us)"
+        )
+
+
+if __name__ == "__main__":
+    main()
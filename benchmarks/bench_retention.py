@@ -0,0 +1,101 @@
+# benchmarks/bench_retention.py
+"""
+Hot-path insert latency with api.retention idle vs archiving, and the
+database size before / after, over SESSIONS synthetic sessions of
+TURNS_PER_SESSION turns of which half are past the retention age.
+
+    PYTHONPATH=. python benchmarks/bench_retention.py
+"""
+
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from api import json_blobs, migrations, retention
+from api.db import ConnectionManager
+
+SESSIONS = 4000
+TURNS_PER_SESSION = 10
+INSERTS = 2000
+INSERT_INTERVAL_MS = 1  # live traffic: about one turn per millisecond
+
+_ASSISTANT = "Thanks for sharing that. " * 12
+_REASONS = '["NEEDS_MORE_CONTEXT", "SYMPTOM_DURATION_UNKNOWN"]'
+_RECOMMENDATIONS = '[{"id": "SEE_GP", "priority": "routine"}]'
+
+
+def _populate(db):
+    now = datetime.now(timezone.utc)
+    with db.write() as conn:
+        migrations.migrate(conn)
+        for s in range(SESSIONS):
+            sid = f"s{s}"
+            ts = (now - timedelta(days=365 if s % 2 else 1)).isoformat()
+            conn.execute("INSERT INTO sessions VALUES (?, ?, '{}')", (sid, ts))
+            for t in range(TURNS_PER_SESSION):
+                refs = json_blobs.put_columns(conn, {"flags": "[]", "reasons": _REASONS, "recommendations": _RECOMMENDATIONS})
+                cur = conn.execute(
+                    "INSERT INTO turns(session_id, created_at, user_text, assistant_text, phase, path, trace_json,"
+                    " flags_ref, reasons_ref, recommendations_ref) VALUES (?, ?, ?, ?, 'INTRO', 'P', '{}', ?, ?, ?)",
+                    (sid, ts, f"message {t}", _ASSISTANT, refs["flags_ref"], refs["reasons_ref"], refs["recommendations_ref"]),
+                )
+            conn.execute(
+                "INSERT INTO session_summary VALUES (?, ?, ?, ?, 'INTRO', 'P', ?)", (sid, ts, TURNS_PER_SESSION, cur.lastrowid, ts)
+            )
+
+
+def _insert_latencies(db, n):
+    out = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        with db.write() as conn:
+            refs = json_blobs.put_columns(conn, {"flags": "[]", "reasons": _REASONS, "recommendations": _RECOMMENDATIONS})
+            conn.execute(
+                "INSERT INTO turns(session_id, created_at, user_text, assistant_text, phase, path, trace_json,"
+                " flags_ref, reasons_ref, recommendations_ref) VALUES ('live', ?, 'hi', ?, 'INTRO', 'P', '{}', ?, ?, ?)",
+                (datetime.now(timezone.utc).isoformat(), _ASSISTANT, refs["flags_ref"], refs["reasons_ref"], refs["recommendations_ref"]),
+            )
+        out.append((time.perf_counter() - t0) * 1000)
+        time.sleep(INSERT_INTERVAL_MS / 1000)
+    return out
+
+
+def _report(label, ms):
+    ms = sorted(ms)
+    print(f"{label:<20} p50 {statistics.median(ms):6.2f} ms   p99 {ms[int(len(ms) * 0.99)]:6.2f} ms   max {ms[-1]:7.2f} ms")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ConnectionManager(Path(tmp) / "api.sqlite")
+        _populate(db)
+        db.connection().execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+        _report("retention idle", _insert_latencies(db, INSERTS))
+
+        result = {}
+        worker = threading.Thread(
+            target=lambda: result.update(retention.run_retention(db, days=30, archive_dir=Path(tmp) / "archive"))
+        )
+        t0 = time.perf_counter()
+        worker.start()
+        during = []
+        while worker.is_alive():
+            during += _insert_latencies(db, 50)
+        worker.join()
+        elapsed = time.perf_counter() - t0
+        _report("retention running", during)
+
+        print(
+            f"archived {result['sessions_archived']} sessions / {result['turns_archived']} turns in {elapsed:.1f} s"
+            f" ({result['archive_files']} files, {result['pages_freed']} pages freed) alongside {len(during)} live inserts"
+        )
+        print(f"database {result['db_bytes_before'] / 1e6:.1f} MB -> {result['db_bytes_after'] / 1e6:.1f} MB")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
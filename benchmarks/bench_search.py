@@ -0,0 +1,112 @@
+# benchmarks/bench_search.py
+"""
+Turn search (api.search) over TURNS synthetic turns: LIKE scan vs the FTS5
+index for phrase, word, filtered, prefix and no-match queries, plus the cost
+the index triggers add to turn inserts.
+
+    PYTHONPATH=. python benchmarks/bench_search.py
+"""
+
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from api import json_blobs, migrations, search
+from api.db import ConnectionManager
+
+TURNS = 500_000
+INSERT_BATCH = 64  # one turn-writer batch
+INSERT_BATCHES = 200
+
+_WORDS = (
+    "i feel tired stressed anxious lately work sleep partner sometimes often never always morning "
+    "desire low high help want talk about performance issue problem worried doctor medication"
+).split()
+_ASSISTANT = "Thanks for sharing that. How often does this happen, and for how long?"
+
+
+def _user_text(rng, i):
+    words = rng.choices(_WORDS, k=rng.randint(3, 14))
+    if i % 2000 == 0:
+        words.insert(rng.randint(0, len(words)), "chest pain")
+    return " ".join(words)
+
+
+def _rows(rng, start, n):
+    for i in range(start, start + n):
+        flags = '["RED_FLAG_ACUTE_CARDIORESP"]' if i % 4000 == 0 else "[]"
+        yield (f"s{i // 12}", f"2026-03-01T00:00:{i % 60:02d}+00:00", _user_text(rng, i), _ASSISTANT, flags)
+
+
+def _insert(conn, rows):
+    for sid, ts, user_text, assistant_text, flags in rows:
+        refs = json_blobs.put_columns(conn, {"flags": flags, "reasons": "[]", "recommendations": "[]"})
+        conn.execute(
+            "INSERT INTO turns(session_id, created_at, user_text, assistant_text, phase, path, trace_json,"
+            " flags_ref, reasons_ref, recommendations_ref) VALUES (?, ?, ?, ?, 'INTRO', 'PATH_MORE_QUESTIONS', '{}', ?, ?, ?)",
+            (sid, ts, user_text, assistant_text, refs["flags_ref"], refs["reasons_ref"], refs["recommendations_ref"]),
+        )
+
+
+def _timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, out
+
+
+def _insert_ms(db, rng, start):
+    t0 = time.perf_counter()
+    for b in range(INSERT_BATCHES):
+        with db.write() as conn:
+            _insert(conn, _rows(rng, start + b * INSERT_BATCH, INSERT_BATCH))
+    return (time.perf_counter() - t0) * 1000 / INSERT_BATCHES
+
+
+def main():
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ConnectionManager(Path(tmp) / "turns.sqlite")
+        with db.write() as conn:
+            migrations.migrate(conn)
+            _insert(conn, _rows(rng, 0, TURNS))
+        conn = db.connection()
+
+        queries = [
+            ("rare phrase", "%chest pain%", {"q": '"chest pain"'}),
+            ("common word", "%tired%", {"q": "tired"}),
+            ("phrase + flag", "%chest pain%", {"q": '"chest pain"', "flag": "RED_FLAG_ACUTE_CARDIORESP"}),
+            ("prefix", "%medicat%", {"q": "medicat*"}),
+            ("no match", "%shortness of breath%", {"q": '"shortness of breath"'}),
+        ]
+        print(f"{TURNS:,} turns, first page of 50")
+        for label, like, params in queries:
+            like_ms, _ = _timed(
+                lambda: conn.execute(
+                    "SELECT id FROM turns WHERE user_text LIKE ? OR assistant_text LIKE ? ORDER BY id DESC LIMIT 50", (like, like)
+                ).fetchall(),
+                repeat=2,
+            )
+            fts_ms, page = _timed(lambda: search.search(conn, limit=50, **params))
+            print(f"{label:<14} LIKE {like_ms:8.1f} ms   FTS {fts_ms:7.2f} ms   ({len(page['results'])} results)")
+
+        deep = {"q": "tired", "limit": 50}
+        for _ in range(100):
+            deep["before_id"] = search.search(conn, **deep)["next_before_id"]
+        deep_ms, _ = _timed(lambda: search.search(conn, **deep))
+        print(f"{'page 101':<14} FTS {deep_ms:7.2f} ms")
+
+        with_index = _insert_ms(db, rng, TURNS)
+        with db.write() as conn:
+            for trigger in ("turns_fts_insert", "turns_fts_delete", "turns_fts_update"):
+                conn.execute(f"DROP TRIGGER {trigger}")
+        without_index = _insert_ms(db, rng, TURNS + INSERT_BATCHES * INSERT_BATCH)
+        print(f"insert batch of {INSERT_BATCH}: {without_index:.2f} ms without index, {with_index:.2f} ms with index")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_session_store.py
+"""
+/v1/report request size and latency over a scripted conversation: the client
+posting the full chat_state every turn (no session_id; session turns may not
+carry a state, and these turns are not logged) vs the server keeping it
+(api.session_store), with the session hot in the LRU and with every turn a
+miss (state rebuilt from the event log).
+
+    PYTHONPATH=. python benchmarks/bench_session_store.py
+"""
+
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+TEXTS = ["", "Carlos", "erection problems", "sometimes", "yes", "no", "a lot of stress", "yes", "mexico", "meds"]
+ROUNDS = 20
+
+
+def _conversation(client, make_context, sid, before_turn=None):
+    sizes, latencies = [], []
+    state = None
+    for i, text in enumerate(TEXTS):
+        if before_turn:
+            before_turn(i)
+        body = json.dumps({"context": make_context(sid, text, state, i)})
+        t0 = time.perf_counter()
+        res = client.post("/v1/report", content=body, headers={"Content-Type": "application/json"})
+        latencies.append(time.perf_counter() - t0)
+        sizes.append(len(body))
+        state = res.json()["report"]["chat"]["state"]
+    return sizes, latencies
+
+
+def _client_state(sid, text, state, i):
+    return {"chat_text": text, "chat_state": state}
+
+
+def _server_state(sid, text, state, i):
+    return {"session_id": sid, "chat_text": text}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SOFICCA_DB_PATH"] = str(Path(tmp) / "bench.sqlite")
+        from fastapi.testclient import TestClient
+
+        import api.app as app_mod
+        from api.session_store import SessionStore
+
+        with TestClient(app_mod.app) as client:
+            cases = [
+                ("client chat_state", _client_state, None),
+                ("server, hot", _server_state, None),
+                ("server, miss", _server_state, 1),
+            ]
+            for label, make_context, capacity in cases:
+                if capacity:
+                    app_mod.sessions = SessionStore(app_mod._load_session_state, capacity=capacity)
+                sizes, latencies = [], []
+                for _ in range(ROUNDS):
+                    sid = client.post("/v1/session", json={}).json()["session_id"]
+                    before_turn = None
+                    if capacity:
+                        # A turn of another session evicts this one before every turn.
+                        other = client.post("/v1/session", json={}).json()["session_id"]
+
+                        def before_turn(i, other=other):
+                            client.post("/v1/report", json={"context": _server_state(other, "", None, i)})
+
+                    s, lat = _conversation(client, make_context, sid, before_turn)
+                    sizes += s
+                    latencies += lat
+                print(
+                    f"{label:<18} request {statistics.mean(sizes):>7,.0f} B avg / {max(sizes):>6,} B max"
+                    f"   p50 {statistics.median(latencies) * 1e3:6.2f} ms"
+                )
+            print("session store:", json.dumps(app_mod.sessions.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/bench_state_codec.py
+"""
+Binary state codec vs JSON: encoded size and encode/decode time per state.
+
+    python benchmarks/bench_state_codec.py
+"""
+
+import json
+import time
+
+from soficca_core.engine import generate_report
+from soficca_core.state_codec import decode_state, decode_state_token, encode_state, encode_state_token
+
+RUNS = 20_000
+
+TURNS = [
+    "",
+    "Carlos",
+    "male",
+    "Colombia",
+    "I want help with my sexual performance",
+]
+
+
+def _states():
+    out = []
+    for label, debug in (("public", False), ("debug", True)):
+        state = None
+        for text in TURNS:
+            res = generate_report({"user": {"name": "Carlos"}, "context": {"chat_text": text, "chat_state": state, "debug": debug}})
+            state = res["report"]["chat"]["state"]
+        out.append((label, state))
+    return out
+
+
+def _timeit(fn):
+    t0 = time.perf_counter()
+    for _ in range(RUNS):
+        fn()
+    return (time.perf_counter() - t0) / RUNS * 1e6
+
+
+def main():
+    for label, state in _states():
+        js = json.dumps(state)
+        raw = encode_state(state)
+        token = encode_state_token(state)
+        assert decode_state(raw) == state == json.loads(js)
+
+        print(f"[{label} state]")
+        print(f"  size      json: {len(js.encode()):6d} B   binary: {len(raw):6d} B   token: {len(token):6d} B")
+        print(f"  encode    json: {_timeit(lambda: json.dumps(state)):6.2f} us  binary: {_timeit(lambda: encode_state(state)):6.2f} us"
+              f"  token: {_timeit(lambda: encode_state_token(state)):6.2f} us")
+        print(f"  decode    json: {_timeit(lambda: json.loads(js)):6.2f} us  binary: {_timeit(lambda: decode_state(raw)):6.2f} us"
+              f"  token: {_timeit(lambda: decode_state_token(token)):6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_state_delta.py
+"""
+Full `chat.state` echo vs delta patches: response bytes and JSON encode /
+decode time per turn over a scripted conversation.
+
+    SOFICCA_OPENAI_NLU_ENABLED=0 python benchmarks/bench_state_delta.py
+"""
+
+import json
+import time
+
+from soficca_core.engine import generate_report
+from soficca_core.state_delta import apply_patch, state_checksum
+
+TURNS = ["", "Carlos", "male", "Colombia", "hi", "I want help with performance", "wait, sending files", "thanks"]
+RUNS = 2_000
+
+
+def _responses(delta, debug):
+    out = []
+    state = None
+    for text in TURNS:
+        context = {"chat_text": text, "chat_state": state, "debug": debug}
+        if delta:
+            context.update({"state_delta": True, "state_checksum": state_checksum(state) if state else None})
+        res = generate_report({"context": context})
+        chat = res["report"]["chat"]
+        state = apply_patch(state or {}, chat["state_patch"]) if delta else chat["state"]
+        out.append(res)
+    return out
+
+
+def _timeit(fn):
+    t0 = time.perf_counter()
+    for _ in range(RUNS):
+        fn()
+    return (time.perf_counter() - t0) / RUNS * 1e6
+
+
+def main():
+    for debug in (False, True):
+        full = _responses(False, debug)
+        delta = _responses(True, debug)
+        full_js = [json.dumps(r) for r in full]
+        delta_js = [json.dumps(r) for r in delta]
+
+        full_bytes = sum(len(j.encode()) for j in full_js) / len(TURNS)
+        delta_bytes = sum(len(j.encode()) for j in delta_js) / len(TURNS)
+        full_chat = sum(len(json.dumps(r["report"]["chat"]).encode()) for r in full) / len(TURNS)
+        delta_chat = sum(len(json.dumps(r["report"]["chat"]).encode()) for r in delta) / len(TURNS)
+        enc_full = _timeit(lambda: [json.dumps(r) for r in full]) / len(TURNS)
+        enc_delta = _timeit(lambda: [json.dumps(r) for r in delta]) / len(TURNS)
+        dec_full = _timeit(lambda: [json.loads(j) for j in full_js]) / len(TURNS)
+        dec_delta = _timeit(lambda: [json.loads(j) for j in delta_js]) / len(TURNS)
+
+        print(f"[debug={debug}] per turn")
+        print(f"  response bytes   full: {full_bytes:7.0f}   delta: {delta_bytes:7.0f}  (normalized_input echoes the request)")
+        print(f"  report.chat      full: {full_chat:7.0f}   delta: {delta_chat:7.0f}")
+        print(f"  json encode      full: {enc_full:7.2f} us delta: {enc_delta:7.2f} us")
+        print(f"  json decode      full: {dec_full:7.2f} us delta: {dec_delta:7.2f} us")
+
+
+if __name__ == "__main__":
+    main()
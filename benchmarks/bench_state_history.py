@@ -0,0 +1,57 @@
+# benchmarks/bench_state_history.py
+"""
+Memory held by N per-turn snapshots of one session: deep copies vs
+structurally shared frozen versions (StateHistory).
+
+    SOFICCA_OPENAI_NLU_ENABLED=0 python benchmarks/bench_state_history.py
+"""
+
+import copy
+import time
+import tracemalloc
+
+from soficca_core.engine import generate_report
+from soficca_core.state_history import StateHistory
+
+TURNS = ["", "Carlos", "male", "Colombia", "hi", "I want help with performance", "wait, sending files", "thanks"]
+N = 200
+
+
+def _states():
+    out = []
+    state = None
+    for i in range(N):
+        text = TURNS[i] if i < len(TURNS) else "hello"
+        res = generate_report({"context": {"chat_text": text, "chat_state": state, "debug": True}})
+        state = res["report"]["chat"]["state"]
+        out.append(state)
+    return out
+
+
+def _measure(label, keep):
+    states = _states()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    held = keep(states)
+    elapsed = time.perf_counter() - t0
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {size / 1024:8.1f} KiB  {elapsed / N * 1e6:7.1f} us/turn")
+    return held
+
+
+def main():
+    print(f"{N} snapshots of one session")
+    _measure("deepcopy per turn", lambda states: [copy.deepcopy(s) for s in states])
+
+    def frozen(states):
+        history = StateHistory()
+        for s in states:
+            history.record(s)
+        return history
+
+    _measure("StateHistory.record", frozen)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_turn_writer.py
+"""
+Request-path cost of logging a turn: a synchronous transaction per request
+vs api.turn_writer.TurnWriter (queue and return; a background thread batches
+rows into multi-row transactions). Reports per-request latency percentiles,
+total throughput including the final flush, and the writer's batch stats.
+
+    PYTHONPATH=. python benchmarks/bench_turn_writer.py
+"""
+
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from api.db import ConnectionManager
+from api.turn_writer import TurnWriter
+
+WRITES_PER_THREAD = 500
+THREADS = (1, 8)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    user_text TEXT NOT NULL,
+    assistant_text TEXT NOT NULL,
+    trace_json TEXT
+)
+"""
+_INSERT = "INSERT INTO turns(session_id, created_at, user_text, assistant_text, trace_json) VALUES (?, ?, ?, ?, ?)"
+_ROW = ("2026-01-01T00:00:00+00:00", "I want help with performance", "Tell me, Carlos.\n\n" + "x" * 400, '{"stage": "question"}')
+
+
+def _run(label, threads, log_turn, finish=lambda: None):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(i):
+        mine = []
+        for _ in range(WRITES_PER_THREAD):
+            t0 = time.perf_counter()
+            log_turn(f"s{i}")
+            mine.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(mine)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    finish()
+    elapsed = time.perf_counter() - t0
+
+    q = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:<14} {threads:>2} threads  p50 {q[49] * 1e6:>7,.0f} us  p99 {q[98] * 1e6:>7,.0f} us"
+        f"  {threads * WRITES_PER_THREAD / elapsed:>8,.0f} turns/s"
+    )
+
+
+def main():
+    for threads in THREADS:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = ConnectionManager(Path(tmp) / "sync.sqlite")
+            with db.write() as conn:
+                conn.execute(_SCHEMA)
+
+            def log_sync(sid):
+                with db.write() as conn:
+                    conn.execute(_INSERT, (sid,) + _ROW)
+
+            _run("synchronous", threads, log_sync)
+            db.close_all()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db = ConnectionManager(Path(tmp) / "behind.sqlite")
+            with db.write() as conn:
+                conn.execute(_SCHEMA)
+            writer = TurnWriter(db, queue_size=10_000)
+
+            def log_behind(sid):
+                writer.submit(lambda conn: conn.execute(_INSERT, (sid,) + _ROW))
+
+            _run("write-behind", threads, log_behind, finish=writer.flush)
+            s = writer.stats()
+            print(
+                f"{'':<14} {s['batches']:>6} batches, avg {s['written'] / s['batches']:.1f} rows,"
+                f" flush avg {s['flush_ms_avg']:.2f} ms / max {s['flush_ms_max']:.2f} ms"
+            )
+            writer.close()
+            db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,4 @@
 from soficca_core.chat_state import (
-    PHASE_INTRO,
-    PHASE_REASON,
-    PHASE_SYMPTOMS,
-    PHASE_CONTEXT,
-    PHASE_INTERPRETATION,
     PHASE_ACTION,
     PHASE_END,
     Q_REASON,
@@ -18,74 +13,33 @@ from soficca_core.chat_state import (
     Q_ROUTE_CHOICE,
 )
 
-from soficca_core import messages_en as messages
-
-
-def next_question_id(state):
-    slots = state.get("slots") or {}
-    phase = state.get("phase")
-
-    if phase == PHASE_INTRO:
-        if not slots.get("name"):
-            return Q_NAME
-        if not slots.get("gender_identity"):
-            return Q_GENDER_ID
-        if not slots.get("country"):
-            return Q_COUNTRY
-        return None
-
-    if phase == PHASE_REASON:
-        if not slots.get("reason"):
-            return Q_REASON
-        return None
-
-    if phase == PHASE_SYMPTOMS:
-        if not slots.get("main_issue"):
-            return Q_MAIN_ISSUE
-        if not slots.get("frequency"):
-            return Q_FREQUENCY
-        if not slots.get("desire"):
-            return Q_DESIRE
-        return None
-
-    if phase == PHASE_CONTEXT:
-        if not slots.get("stress"):
-            return Q_STRESS
-        if not slots.get("morning_erection"):
-            return Q_MORNING_ERECTION
-        return None
-
-    return None
-
-
-def ensure_phase_progress(state):
-    slots = state.get("slots") or {}
-    phase = state.get("phase")
-
-    if phase == PHASE_INTRO:
-        if slots.get("name") and slots.get("gender_identity") and slots.get("country"):
-            state["phase"] = PHASE_REASON
-        return state
-
-    if phase == PHASE_REASON:
-        if slots.get("reason"):
-            state["phase"] = PHASE_SYMPTOMS
-        return state
-
-    if phase == PHASE_SYMPTOMS:
-        if slots.get("main_issue") and slots.get("frequency") and slots.get("desire"):
-            state["phase"] = PHASE_CONTEXT
-        return state
-
-    if phase == PHASE_CONTEXT:
-        if slots.get("stress") and slots.get("morning_erection"):
-            state["phase"] = PHASE_INTERPRETATION
-        return state
+from soficca_core.message_bundles import get_bundle
+from soficca_core.flow_graph import get_flow
 
+
+def _resolve_flow(flow):
+    if flow is None or isinstance(flow, str):
+        return get_flow(flow)
+    return flow
+
+
+def next_question_id(state, flow=None):
+    flow = _resolve_flow(flow)
+    filled = flow.filled_mask(state.get("slots") or {})
+    return flow.next_missing(state.get("phase"), filled)
+
+
+def ensure_phase_progress(state, flow=None):
+    flow = _resolve_flow(flow)
+    filled = flow.filled_mask(state.get("slots") or {})
+    next_phase = flow.next_phase(state.get("phase"), filled)
+    if next_phase is not None:
+        state["phase"] = next_phase
     return state
 
 
-def render_question(state, question_id):
+def render_question(state, question_id, bundle=None):
+    messages = bundle or get_bundle()
     name = (state.get("slots") or {}).get("name") or (state.get("user") or {}).get("name")
 
     if question_id == Q_NAME:
@@ -122,18 +76,21 @@ def render_question(state, question_id):
     return messages.clarify_soft()
 
 
-def render_repair_question(state, question_id):
+def render_repair_question(state, question_id, bundle=None):
+    messages = bundle or get_bundle()
     name = (state.get("slots") or {}).get("name") or (state.get("user") or {}).get("name")
     return messages.repair_for_question(question_id, name=name)
 
 
-def render_interpretation_and_action(state):
+def render_interpretation_and_action(state, bundle=None):
+    messages = bundle or get_bundle()
     state["phase"] = PHASE_ACTION
     state["last_question_id"] = Q_ROUTE_CHOICE
     return messages.ask_route_choice()
 
 
-def render_meds_step_and_close(state):
+def render_meds_step_and_close(state, bundle=None):
+    messages = bundle or get_bundle()
     state["phase"] = PHASE_END
     state["last_question_id"] = None
     return messages.meds_intro()
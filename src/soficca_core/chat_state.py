@@ -1,3 +1,7 @@
+import sys
+
+from soficca_core.state_limits import ring_append
+
 PHASE_INTRO = "INTRO"
 PHASE_REASON = "REASON"
 PHASE_SYMPTOMS = "SYMPTOMS"
@@ -20,6 +24,10 @@ Q_GENDER_ID = "gender_identity"
 Q_COUNTRY = "country"  # for safety resources / localization
 Q_ROUTE_CHOICE = "route_choice"
 
+END_MEDS_OPTIONS = "END_MEDS_OPTIONS"
+END_SUPPORT_PLAN = "END_SUPPORT_PLAN"
+END_EVAL_FIRST = "END_EVAL_FIRST"
+
 
 def new_state(user_profile=None):
     return {
@@ -53,8 +61,7 @@ def set_slot(state, key, value):
     # Prevent silent creation of wrong keys (typos, unexpected ids)
     slots = state.get("slots") or {}
     if key not in slots:
-        meta = state.setdefault("meta", {})
-        meta.setdefault("unknown_slot_writes", []).append({"key": key, "value": value})
+        ring_append(state.setdefault("meta", {}), "unknown_slot_writes", {"key": key, "value": value})
         return state
 
     slots[key] = value
@@ -69,3 +76,214 @@ def get_slot(state, key):
 def is_done(state):
     return state.get("phase") == PHASE_END
 
+
+
+# -----------------------------
+# Compact in-memory representation
+# -----------------------------
+# Enum tables: append only, the position is the code.
+PHASES = (
+    PHASE_INTRO,
+    PHASE_REASON,
+    PHASE_SYMPTOMS,
+    PHASE_CONTEXT,
+    PHASE_INTERPRETATION,
+    PHASE_ACTION,
+    PHASE_END,
+)
+MODES = (MODE_NORMAL, MODE_SAFETY_LOCK)
+QUESTION_IDS = (
+    Q_REASON,
+    Q_MAIN_ISSUE,
+    Q_FREQUENCY,
+    Q_DESIRE,
+    Q_STRESS,
+    Q_MORNING_ERECTION,
+    Q_NAME,
+    Q_GENDER_ID,
+    Q_COUNTRY,
+    Q_ROUTE_CHOICE,
+)
+END_REASONS = (END_MEDS_OPTIONS, END_SUPPORT_PLAN, END_EVAL_FIRST)
+SLOT_NAMES = tuple(new_state()["slots"])
+
+_ENUM_FIELDS = (
+    ("mode", "_mode", MODES),
+    ("phase", "_phase", PHASES),
+    ("last_question_id", "_last_q", QUESTION_IDS),
+    ("end_reason", "_end_reason", END_REASONS),
+)
+_ENUM_CODES = {field: {v: i for i, v in enumerate(table)} for field, _, table in _ENUM_FIELDS}
+_ENUM_ATTR = {field: attr for field, attr, _ in _ENUM_FIELDS}
+_SLOT_INDEX = {name: i for i, name in enumerate(SLOT_NAMES)}
+
+_MISSING = object()  # key absent from the source dict
+_INTERN_MAX_LEN = 32
+
+
+def _intern(v):
+    if isinstance(v, str) and len(v) <= _INTERN_MAX_LEN:
+        return sys.intern(v)
+    return v
+
+
+class ChatState:
+    """
+    Compact, lossless stand-in for the chat state dict.
+
+    Phase, mode, question id and end reason are small integer codes, slots a
+    fixed-layout list in SLOT_NAMES order. Anything the fixed layout cannot
+    hold (unknown keys, or values of an unexpected type) is kept verbatim, so
+    `ChatState.from_dict(d).to_dict() == d` always holds. Nested containers
+    (user, meta, safety_flags) are shared with the source dict, not copied.
+
+    It is a representation for states at rest: api/session_store.py holds
+    its cached sessions as ChatState (~1.2 KB vs ~2.9 KB each, see
+    benchmarks/bench_chat_state.py). Turns run on the dict: generate_report
+    does not take a ChatState, so call to_dict() first. Dumping the public state from a ChatState is ~15% slower
+    than from the dict, so the turn path has nothing to gain from it.
+    """
+
+    __slots__ = ("_mode", "_phase", "_last_q", "_end_reason", "turn", "user", "meta",
+                 "safety_flags", "_slots", "_slot_extra", "_extra")
+
+    def __init__(self, data=None):
+        self._mode = self._phase = self._last_q = self._end_reason = _MISSING
+        self.turn = self.user = self.meta = self.safety_flags = _MISSING
+        self._slots = None  # None: no "slots" key at all
+        self._slot_extra = None
+        self._extra = None
+
+        for key, value in (new_state() if data is None else data).items():
+            if not self._absorb(key, value):
+                # Unknown key, or a known one whose value does not fit the layout.
+                if self._extra is None:
+                    self._extra = {}
+                self._extra[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data)
+
+    def _absorb(self, key, value):
+        attr = _ENUM_ATTR.get(key)
+        if attr is not None:
+            if isinstance(value, int):  # would read back as an enum code
+                return False
+            code = _ENUM_CODES[key].get(value) if isinstance(value, str) else None
+            setattr(self, attr, value if code is None else code)
+            return True
+        if key == "turn":
+            if type(value) is not int:
+                return False
+            self.turn = value
+            return True
+        if key == "slots":
+            if not isinstance(value, dict):
+                return False
+            self._slots = [_MISSING] * len(SLOT_NAMES)
+            for name, v in value.items():
+                i = _SLOT_INDEX.get(name)
+                if i is None:
+                    if self._slot_extra is None:
+                        self._slot_extra = {}
+                    self._slot_extra[name] = v
+                else:
+                    self._slots[i] = _intern(v)
+            return True
+        if key == "safety_flags":
+            if not isinstance(value, list):
+                return False
+            self.safety_flags = value
+            return True
+        if key in ("user", "meta"):
+            if not isinstance(value, dict):
+                return False
+            setattr(self, key, value)
+            return True
+        return False
+
+    # ---- enum fields ----
+    def _get_enum(self, attr, table):
+        v = getattr(self, attr)
+        if v is _MISSING:
+            return None
+        return table[v] if type(v) is int else v
+
+    def _set_enum(self, key, value):
+        if self._extra:
+            self._extra.pop(key, None)
+        if not self._absorb(key, value):
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    mode = property(lambda self: self._get_enum("_mode", MODES),
+                    lambda self, v: self._set_enum("mode", v))
+    phase = property(lambda self: self._get_enum("_phase", PHASES),
+                     lambda self, v: self._set_enum("phase", v))
+    last_question_id = property(lambda self: self._get_enum("_last_q", QUESTION_IDS),
+                                lambda self, v: self._set_enum("last_question_id", v))
+    end_reason = property(lambda self: self._get_enum("_end_reason", END_REASONS),
+                          lambda self, v: self._set_enum("end_reason", v))
+
+    # ---- slots ----
+    def get_slot(self, key):
+        i = _SLOT_INDEX.get(key)
+        if i is None or self._slots is None:
+            return (self._slot_extra or {}).get(key)
+        v = self._slots[i]
+        return None if v is _MISSING else v
+
+    def set_slot(self, key, value):
+        # Same policy as set_slot(): only keys already in the slot store are written.
+        i = _SLOT_INDEX.get(key)
+        if i is not None and self._slots is not None and self._slots[i] is not _MISSING:
+            self._slots[i] = _intern(value)
+        elif self._slot_extra and key in self._slot_extra:
+            self._slot_extra[key] = value
+        else:
+            if self.meta is _MISSING:
+                self.meta = {}
+            ring_append(self.meta, "unknown_slot_writes", {"key": key, "value": value})
+        return self
+
+    def slots_dict(self):
+        out = {name: v for name, v in zip(SLOT_NAMES, self._slots or ()) if v is not _MISSING}
+        if self._slot_extra:
+            out.update(self._slot_extra)
+        return out
+
+    # ---- dict codec ----
+    def to_dict(self):
+        out = {}
+        for key, attr, table in _ENUM_FIELDS:
+            v = getattr(self, attr)
+            if v is not _MISSING:
+                out[key] = table[v] if type(v) is int else v
+        for key in ("user", "turn", "safety_flags", "meta"):
+            v = getattr(self, key)
+            if v is not _MISSING:
+                out[key] = v
+        if self._slots is not None:
+            out["slots"] = self.slots_dict()
+        if self._extra:
+            out.update(self._extra)
+        return out
+
+    def to_public_dict(self):
+        """Same shape as the engine's public `chat.state` (no `user`)."""
+        d = self.to_dict()
+        return {
+            "mode": d.get("mode", MODE_NORMAL),
+            "phase": d.get("phase"),
+            "slots": d.get("slots", {}),
+            "last_question_id": d.get("last_question_id"),
+            "turn": d.get("turn", 0),
+            "end_reason": d.get("end_reason"),
+            "safety_flags": d.get("safety_flags", []),
+            "meta": d.get("meta", {}),
+        }
+
+    def __repr__(self):
+        return f"ChatState(phase={self.phase!r}, mode={self.mode!r}, turn={self.turn!r})"
@@ -1,7 +1,13 @@
 # src/soficca_core/engine.py
 import re
-from soficca_core.normalization import normalize
-from soficca_core.rules import apply_rules
+from soficca_core import telemetry
+from soficca_core.errors import make_error
+from soficca_core.ruleset import active_ruleset
+from soficca_core.ruleset_registry import UnknownRuleset, resolve_ruleset
+from soficca_core.state_codec import StateCodecError, coerce_state, encode_state_token
+from soficca_core.state_delta import make_patch, state_checksum
+from soficca_core.state_history import thaw
+from soficca_core.state_limits import bound_state
 from soficca_core.validation import validate_input
 
 from soficca_core.chat_state import (
@@ -22,12 +28,19 @@ from soficca_core.chat_flow import (
     render_meds_step_and_close,
 )
 
-from soficca_core.interpret_en import interpret
+from soficca_core.flow_graph import DEFAULT_FLOW, get_flow
+from soficca_core.nlu_tape import NluReplayError, NluTape
 from soficca_core.safety_en import detect_red_flags
-from soficca_core import messages_en as messages
+from soficca_core.message_bundles import DEFAULT_LOCALE, UnknownLocale, get_bundle
 
 ENGINE_VERSION = "0.2.1"
-RULESET_VERSION = "0.1.0"
+
+
+def __getattr__(name):
+    # RULESET_VERSION comes from the loaded ruleset artefact and can change on hot reload.
+    if name == "RULESET_VERSION":
+        return active_ruleset().version
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def uniq_keep_order(items):
@@ -45,10 +58,10 @@ def _nullish_to_none(v):
         return None
     return v
 
-def _empty_report():
+def _empty_report(ruleset_version=None):
     return {
         "engine_version": ENGINE_VERSION,
-        "ruleset_version": RULESET_VERSION,
+        "ruleset_version": ruleset_version or active_ruleset().version,
         "path": None,
         "scores": {},
         "flags": [],
@@ -76,6 +89,24 @@ def _chat_state_public(state):
     }
 
 
+def _attach_state(chat_payload, state, debug, context, base_state=None, tape=None):
+    with telemetry.timed("stage_seconds", stage="state"):
+        _attach_state_timed(chat_payload, state, debug, context, base_state, tape)
+
+
+def _attach_state_timed(chat_payload, state, debug, context, base_state, tape):
+    bound_state(state)
+    if tape is not None and context.get("nlu_record"):
+        chat_payload["nlu_results"] = tape.entries
+    out = state if debug else _chat_state_public(state)
+    if base_state is not None:
+        chat_payload["state_patch"] = make_patch(base_state, out)
+    elif context.get("state_format") == "binary":
+        chat_payload["state"] = encode_state_token(out)
+    else:
+        chat_payload["state"] = out
+
+
 def _update_trace_from_parse(report, parsed):
     try:
         t = (parsed or {}).get("_trace") or {}
@@ -131,12 +162,21 @@ def _looks_like_question(text: str) -> bool:
 
 
 def generate_report(input_data):
+    with telemetry.timed("stage_seconds", stage="total"):
+        return _generate_report(input_data)
+
+
+def _generate_report(input_data):
     errors = []
     normalized_input = {}
-    report = _empty_report()
+    # One ruleset reference per turn: a concurrent hot reload never mixes versions.
+    # The request may select another registered version below.
+    ruleset = active_ruleset()
+    report = _empty_report(ruleset.version)
 
     try:
-        errors, cleaned = validate_input(input_data)
+        with telemetry.timed("stage_seconds", stage="validate"):
+            errors, cleaned = validate_input(input_data)
         ok = len(errors) == 0
         if not ok:
             return {"ok": False, "errors": errors, "normalized_input": {}, "report": report}
@@ -149,10 +189,77 @@ def generate_report(input_data):
 
         user = normalized_input["user"]
         context = normalized_input["context"]
+
+        try:
+            ruleset = resolve_ruleset(context)
+        except UnknownRuleset:
+            field = "ruleset_version" if context.get("ruleset_version") else "tenant_id"
+            errors = [
+                make_error(
+                    "UNKNOWN_RULESET",
+                    "Requested ruleset is not registered",
+                    path=f"$.context.{field}",
+                    meta={field: context.get(field)},
+                )
+            ]
+            return {"ok": False, "errors": errors, "normalized_input": {}, "report": report}
+        report["ruleset_version"] = ruleset.version
+
+        try:
+            incoming_state = coerce_state(context.get("chat_state"))
+        except StateCodecError as e:
+            errors = [make_error("INVALID_STATE", "chat_state could not be decoded", path="$.context.chat_state", meta={"detail": str(e)})]
+            return {"ok": False, "errors": errors, "normalized_input": {}, "report": report}
+        # Turns run on the plain dict; a ChatState has to be sent as ChatState.to_dict().
+        if incoming_state is not None and not isinstance(incoming_state, dict):
+            errors = [make_error("INVALID_STATE", "chat_state must be an object or a state token", path="$.context.chat_state")]
+            return {"ok": False, "errors": errors, "normalized_input": {}, "report": report}
+
+        # Delta mode: the client holds the previous state and gets a patch back.
+        base_state = None
+        if context.get("state_delta"):
+            expected = context.get("state_checksum")
+            if expected and state_checksum(incoming_state or {}) != expected:
+                errors = [
+                    make_error(
+                        "STATE_CHECKSUM_MISMATCH",
+                        "chat_state does not match state_checksum; resend the full state",
+                        path="$.context.state_checksum",
+                    )
+                ]
+                return {"ok": False, "errors": errors, "normalized_input": {}, "report": report}
+            base_state = incoming_state or {}
+
+        # The turn works on its own copy: the caller's state (possibly a frozen
+        # StateHistory version) is never modified.
+        incoming_state = thaw(incoming_state)
+
+        # Flow: requested in context, else the one the session started with.
+        incoming_meta = (incoming_state or {}).get("meta") or {}
+        flow_name = context.get("flow") or incoming_meta.get("flow") or DEFAULT_FLOW
+        try:
+            flow = get_flow(flow_name)
+        except KeyError:
+            errors = [
+                make_error("UNKNOWN_FLOW", "Requested flow is not registered", path="$.context.flow", meta={"flow": flow_name})
+            ]
+            return {"ok": False, "errors": errors, "normalized_input": {}, "report": report}
+
+        # Locale: same resolution as the flow; bundles load on first use.
+        locale = context.get("locale") or incoming_meta.get("locale") or DEFAULT_LOCALE
+        try:
+            messages = get_bundle(locale)
+        except UnknownLocale:
+            errors = [
+                make_error("UNKNOWN_LOCALE", "No message bundle for the requested locale", path="$.context.locale", meta={"locale": locale})
+            ]
+            return {"ok": False, "errors": errors, "normalized_input": {}, "report": report}
         chat_text = context.get("chat_text", "")
         debug = bool(context.get("debug", False))
+        # Every NLU call of the turn goes through the tape (record / replay).
+        tape = NluTape(context.get("nlu_results"))
 
-        state = context.get("chat_state") or new_state(user_profile=user)
+        state = bound_state(incoming_state) or new_state(user_profile=user)
         state["turn"] = int(state.get("turn", 0)) + 1
 
         meta = state.setdefault("meta", {})
@@ -161,13 +268,23 @@ def generate_report(input_data):
         meta.setdefault("awaiting_files", False)
         meta.setdefault("unknown_slot_writes", [])
         meta.setdefault("repair_counts", {})
+        # Kept only when it differs from the default, so asking for the default switches back.
+        if flow.name != DEFAULT_FLOW:
+            meta["flow"] = flow.name
+        else:
+            meta.pop("flow", None)
+        if locale != DEFAULT_LOCALE:
+            meta["locale"] = locale
+        else:
+            meta.pop("locale", None)
 
         assistant_message = None
 
-        global_intent = interpret(chat_text, "global", state=state)
+        global_intent = tape.interpret(chat_text, "global", state=state)
         _update_trace_from_parse(report, global_intent)
 
-        red_flags_now = detect_red_flags(chat_text)
+        with telemetry.timed("stage_seconds", stage="safety"):
+            red_flags_now = detect_red_flags(chat_text)
         if red_flags_now:
             state["mode"] = MODE_SAFETY_LOCK
             existing = state.get("safety_flags") or []
@@ -178,7 +295,7 @@ def generate_report(input_data):
             last_q = state.get("last_question_id")
             parsed = None
             if last_q == Q_COUNTRY:
-                parsed = interpret(chat_text, Q_COUNTRY, state=state)
+                parsed = tape.interpret(chat_text, Q_COUNTRY, state=state)
                 # normalize nullish strings from NLU
                 if isinstance(parsed, dict):
                     parsed["value"] = _nullish_to_none(parsed.get("value"))
@@ -216,8 +333,8 @@ def generate_report(input_data):
                     state["phase"] = PHASE_END
                     done = True
 
-            signals = normalize(state.get("slots", {}))
-            decision = apply_rules(signals)
+            signals = ruleset.normalize(state.get("slots", {}))
+            decision = ruleset.apply(signals)
 
             report["flags"] = uniq_keep_order((decision.get("flags", []) or []) + (state.get("safety_flags") or []))
             report["reasons"] = (decision.get("reasons", []) or []) + ["Red flag signals detected; escalation required."]
@@ -254,7 +371,7 @@ def generate_report(input_data):
                 "done": done,
                 "intent": global_intent.get("type"),
             }
-            chat_payload["state"] = state if debug else _chat_state_public(state)
+            _attach_state(chat_payload, state, debug, context, base_state, tape)
             report["chat"] = chat_payload
 
             return {"ok": True, "errors": [], "normalized_input": normalized_input, "report": report}
@@ -276,13 +393,13 @@ def generate_report(input_data):
         if global_intent.get("type") in ("meta_pause", "file_handoff"):
             meta["awaiting_files"] = True
             if last_q:
-                assistant_message = messages.meta_ack_waiting_files() + "\n\n" + render_question(state, last_q)
+                assistant_message = messages.meta_ack_waiting_files() + "\n\n" + render_question(state, last_q, messages)
             else:
-                state = ensure_phase_progress(state)
-                qid = next_question_id(state)
+                state = ensure_phase_progress(state, flow)
+                qid = next_question_id(state, flow)
                 if qid:
                     state["last_question_id"] = qid
-                    assistant_message = messages.meta_ack_waiting_files() + "\n\n" + render_question(state, qid)
+                    assistant_message = messages.meta_ack_waiting_files() + "\n\n" + render_question(state, qid, messages)
                 else:
                     assistant_message = messages.meta_ack_waiting_files()
 
@@ -291,7 +408,7 @@ def generate_report(input_data):
             name = _get_name_from_state(state)
 
             if last_q:
-                parsed = interpret(chat_text, last_q, state=state)
+                parsed = tape.interpret(chat_text, last_q, state=state)
                 # normalize nullish strings from NLU
                 if isinstance(parsed, dict):
                     parsed["value"] = _nullish_to_none(parsed.get("value"))
@@ -302,30 +419,30 @@ def generate_report(input_data):
                     set_slot(state, last_q, parsed.get("value"))
                     state["last_question_id"] = None
                     name = _get_name_from_state(state)
-                    state = ensure_phase_progress(state)
+                    state = ensure_phase_progress(state, flow)
 
-                    qid = next_question_id(state)
+                    qid = next_question_id(state, flow)
                     if qid:
                         state["last_question_id"] = qid
-                        assistant_message = messages.greet_back(name) + "\n\n" + render_question(state, qid)
+                        assistant_message = messages.greet_back(name) + "\n\n" + render_question(state, qid, messages)
                     else:
                         assistant_message = messages.greet_back(name)
                 else:
-                    assistant_message = messages.greet_back(name) + "\n\n" + render_question(state, last_q)
+                    assistant_message = messages.greet_back(name) + "\n\n" + render_question(state, last_q, messages)
             else:
                 assistant_message = messages.greet_back(name)
 
         if assistant_message is None:
-            state = ensure_phase_progress(state)
+            state = ensure_phase_progress(state, flow)
 
         if assistant_message is None and state.get("phase") == PHASE_INTERPRETATION:
-            assistant_message = render_interpretation_and_action(state)
+            assistant_message = render_interpretation_and_action(state, messages)
 
         if assistant_message is None:
             last_q = state.get("last_question_id")
 
             if last_q:
-                parsed = interpret(chat_text, last_q, state=state)
+                parsed = tape.interpret(chat_text, last_q, state=state)
                 # normalize nullish strings from NLU
                 if isinstance(parsed, dict):
                     parsed["value"] = _nullish_to_none(parsed.get("value"))
@@ -340,22 +457,22 @@ def generate_report(input_data):
                         _increment_repair_count(state, last_q)
                         assistant_message = messages.clarify_once_for_question(last_q, name=name)
                     else:
-                        assistant_message = render_repair_question(state, last_q)
+                        assistant_message = render_repair_question(state, last_q, messages)
 
 
                 if parsed.get("type") == "user_question" and _looks_like_question((parsed.get("value") or chat_text)):
-                    assistant_message = messages.answer_user_question_brief() + "\n\n" + render_question(state, last_q)
+                    assistant_message = messages.answer_user_question_brief() + "\n\n" + render_question(state, last_q, messages)
 
                 elif parsed.get("type") == "emotional":
-                    assistant_message = messages.emotional_validation() + "\n\n" + render_question(state, last_q)
+                    assistant_message = messages.emotional_validation() + "\n\n" + render_question(state, last_q, messages)
 
                 elif parsed.get("type") == "answer" and parsed.get("value") is not None:
                     if last_q == Q_ROUTE_CHOICE:
                         choice = parsed.get("value")
                         name = _get_name_from_state(state)
 
-                        _signals = normalize(state.get("slots", {}))
-                        _decision = apply_rules(_signals)
+                        _signals = ruleset.normalize(state.get("slots", {}))
+                        _decision = ruleset.apply(_signals)
                         needs_eval_parallel = "needs_eval_parallel" in (_decision.get("flags", []) or [])
 
                         state["phase"] = PHASE_END
@@ -378,27 +495,27 @@ def generate_report(input_data):
                         _increment_repair_count(state, last_q)
                         assistant_message = messages.clarify_once_for_question(last_q, name=name)
                     else:
-                        assistant_message = render_repair_question(state, last_q)
+                        assistant_message = render_repair_question(state, last_q, messages)
 
             if assistant_message is None and state.get("phase") != PHASE_END:
                 if global_intent.get("type") == "meds_intent":
                     set_slot(state, "wants_meds", True)
-                    assistant_message = render_meds_step_and_close(state)
+                    assistant_message = render_meds_step_and_close(state, messages)
 
             if assistant_message is None and state.get("phase") != PHASE_END:
-                state = ensure_phase_progress(state)
+                state = ensure_phase_progress(state, flow)
                 if state.get("phase") == PHASE_INTERPRETATION:
-                    assistant_message = render_interpretation_and_action(state)
+                    assistant_message = render_interpretation_and_action(state, messages)
                 else:
-                    qid = next_question_id(state)
+                    qid = next_question_id(state, flow)
                     if qid:
                         state["last_question_id"] = qid
-                        assistant_message = render_question(state, qid)
+                        assistant_message = render_question(state, qid, messages)
                     else:
                         assistant_message = messages.clarify_soft()
 
-        signals = normalize(state.get("slots", {}))
-        decision = apply_rules(signals)
+        signals = ruleset.normalize(state.get("slots", {}))
+        decision = ruleset.apply(signals)
 
         report["flags"] = uniq_keep_order(decision.get("flags", []))
         report["recommendations"] = decision.get("recommendations", [])
@@ -440,11 +557,15 @@ def generate_report(input_data):
             "done": state.get("phase") == PHASE_END,
             "intent": global_intent.get("type"),
         }
-        chat_payload["state"] = state if debug else _chat_state_public(state)
+        _attach_state(chat_payload, state, debug, context, base_state, tape)
         report["chat"] = chat_payload
 
         return {"ok": True, "errors": [], "normalized_input": normalized_input, "report": report}
 
+    except NluReplayError as e:
+        errors = [make_error("NLU_REPLAY_MISMATCH", "nlu_results do not match the turn", path="$.context.nlu_results", meta={"detail": str(e)})]
+        return {"ok": False, "errors": errors, "normalized_input": {}, "report": _empty_report(ruleset.version)}
+
     except Exception as e:
         errors = [
             {
@@ -454,4 +575,4 @@ def generate_report(input_data):
                 "meta": {"type": type(e).__name__},
             }
         ]
-        return {"ok": False, "errors": errors, "normalized_input": {}, "report": _empty_report()}
\ No newline at end of file
+        return {"ok": False, "errors": errors, "normalized_input": {}, "report": _empty_report(ruleset.version)}
\ No newline at end of file
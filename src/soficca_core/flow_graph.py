@@ -0,0 +1,133 @@
+# src/soficca_core/flow_graph.py
+"""
+Conversation flows as data.
+
+A flow is an ordered list of (phase, required slots, next phase). Slots are
+asked in the listed order; a phase advances once all its slots are filled.
+Question ids are the slot names.
+
+Flows are compiled to integer bitmasks: each slot gets one bit (in order of
+first appearance), each phase a mask of its required bits. With the mask of
+filled slots, "next missing slot" is the lowest set bit of
+`required & ~filled` and "phase complete" is `required & ~filled == 0`.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from soficca_core.chat_state import (
+    PHASE_INTRO,
+    PHASE_REASON,
+    PHASE_SYMPTOMS,
+    PHASE_CONTEXT,
+    PHASE_INTERPRETATION,
+    Q_REASON,
+    Q_MAIN_ISSUE,
+    Q_FREQUENCY,
+    Q_DESIRE,
+    Q_STRESS,
+    Q_MORNING_ERECTION,
+    Q_NAME,
+    Q_GENDER_ID,
+    Q_COUNTRY,
+    new_state,
+)
+
+DEFAULT_FLOW = "default"
+
+FlowSpec = Sequence[Tuple[str, Sequence[str], str]]
+
+DEFAULT_FLOW_SPEC: FlowSpec = (
+    (PHASE_INTRO, (Q_NAME, Q_GENDER_ID, Q_COUNTRY), PHASE_REASON),
+    (PHASE_REASON, (Q_REASON,), PHASE_SYMPTOMS),
+    (PHASE_SYMPTOMS, (Q_MAIN_ISSUE, Q_FREQUENCY, Q_DESIRE), PHASE_CONTEXT),
+    (PHASE_CONTEXT, (Q_STRESS, Q_MORNING_ERECTION), PHASE_INTERPRETATION),
+)
+
+
+class CompiledFlow:
+    __slots__ = ("name", "slots", "_bits", "_phase_mask", "_phase_next")
+
+    def __init__(self, name, slots, phase_mask, phase_next):
+        self.name = name
+        self.slots = slots  # bit i -> slot name
+        self._bits = tuple((slot, 1 << i) for i, slot in enumerate(slots))
+        self._phase_mask = phase_mask
+        self._phase_next = phase_next
+
+    def filled_mask(self, slots: Dict) -> int:
+        mask = 0
+        for slot, bit in self._bits:
+            if slots.get(slot):
+                mask |= bit
+        return mask
+
+    def next_missing(self, phase: Optional[str], filled: int) -> Optional[str]:
+        missing = self._phase_mask.get(phase, 0) & ~filled
+        if not missing:
+            return None
+        return self.slots[(missing & -missing).bit_length() - 1]
+
+    def next_phase(self, phase: Optional[str], filled: int) -> Optional[str]:
+        required = self._phase_mask.get(phase)
+        if required is None or required & ~filled:
+            return None
+        return self._phase_next[phase]
+
+    def __repr__(self) -> str:
+        return f"CompiledFlow(name={self.name!r}, slots={self.slots!r})"
+
+
+def compile_flow(name: str, spec: FlowSpec) -> CompiledFlow:
+    slots = []
+    index = {}
+    phase_mask = {}
+    phase_next = {}
+
+    for phase, required, next_phase in spec:
+        if phase in phase_mask:
+            raise ValueError(f"flow {name!r}: phase {phase!r} listed twice")
+        mask = 0
+        last_bit = -1
+        for slot in required:
+            if slot not in index:
+                index[slot] = len(slots)
+                slots.append(slot)
+            bit = index[slot]
+            # Asking order is bit order, so a phase may not reorder earlier slots.
+            if bit <= last_bit:
+                raise ValueError(f"flow {name!r}: phase {phase!r} asks {slot!r} out of order")
+            last_bit = bit
+            mask |= 1 << bit
+        phase_mask[phase] = mask
+        phase_next[phase] = next_phase
+
+    return CompiledFlow(name, tuple(slots), phase_mask, phase_next)
+
+
+_lock = threading.Lock()
+_flows: Dict[str, CompiledFlow] = {DEFAULT_FLOW: compile_flow(DEFAULT_FLOW, DEFAULT_FLOW_SPEC)}
+
+
+def register_flow(name: str, spec: FlowSpec) -> CompiledFlow:
+    flow = compile_flow(name, spec)
+    # set_slot only writes slots the state already has; a flow asking for any
+    # other slot could never fill it and would ask forever.
+    known = new_state()["slots"]
+    unknown = [slot for slot in flow.slots if slot not in known]
+    if unknown:
+        raise ValueError(f"flow {name!r}: unknown slots {unknown!r}; add them to chat_state.new_state() first")
+    with _lock:
+        _flows[name] = flow
+    return flow
+
+
+def get_flow(name: Optional[str] = None) -> CompiledFlow:
+    """Return a compiled flow by name (KeyError if unknown)."""
+    return _flows[name or DEFAULT_FLOW]
+
+
+def flow_names() -> Iterable[str]:
+    return sorted(_flows)
@@ -5,6 +5,7 @@ from typing import Any, Dict, Optional
 import re
 from difflib import SequenceMatcher
 
+from soficca_core import telemetry
 from soficca_core.nlu_specs import QUESTION_SPECS
 
 from soficca_core.nlu_openai import call_openai_nlu, pick_model_for_confidence
@@ -203,6 +204,7 @@ def interpret(
 
             accept, next_force = pick_model_for_confidence(confidence=conf, used_model="nano")
             if (not accept) and next_force == "mini":
+                telemetry.count("nlu_escalations", model=(data.get("_meta") or {}).get("model") or "nano")
                 data = call_openai_nlu(
                     text,
                     last_question_id=question_id,
@@ -0,0 +1,229 @@
+# src/soficca_core/message_bundles.py
+"""
+Per-locale assistant message bundles, loaded from data files on first use.
+
+A bundle is `locales/<locale>.json`:
+
+    {
+      "locale": "en",
+      "fragments": {"meds_options": "..."},          # shared text, "{@meds_options}"
+      "messages": {
+        "ask_frequency": "...",                     # constant
+        "safe_space": {"anon": "...", "named": "Hi {name}. ..."}
+      },
+      "repair": {"frequency": "...", "name": "@ask_name"},   # "@id" = messages[id]
+      "clarify_once": {"frequency": "..."}
+    }
+
+A "named" template holds exactly one placeholder ({name} or {country}) and is
+pre-split around it at compile time; it is used when the value is truthy,
+"anon" otherwise. Compiled bundles are cached per process, never mutated,
+and shared across threads. Nothing is read at import time, so startup cost
+does not grow with the number of locales.
+
+Set SOFICCA_LOCALE_DIR to load bundles from another directory.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+DEFAULT_LOCALE = "en"
+LOCALE_DIR = Path(os.getenv("SOFICCA_LOCALE_DIR") or Path(__file__).with_name("locales"))
+
+_LOCALE_RE = re.compile(r"^[A-Za-z]{2,3}([_-][A-Za-z0-9]{2,8})*$")
+_FRAGMENT_RE = re.compile(r"\{@(\w+)\}")
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+
+class UnknownLocale(KeyError):
+    pass
+
+
+# -----------------------------
+# Compilation
+# -----------------------------
+def _compile_text(text: str, fragments: Dict[str, str], where: str) -> str:
+    def sub(m):
+        if m.group(1) not in fragments:
+            raise ValueError(f"{where}: unknown fragment {m.group(1)!r}")
+        return fragments[m.group(1)]
+
+    return _FRAGMENT_RE.sub(sub, text)
+
+
+def _split_named(template: str, where: str) -> Tuple[str, str]:
+    found = _PLACEHOLDER_RE.findall(template)
+    if len(found) != 1:
+        raise ValueError(f"{where}: a named template needs exactly one placeholder, found {found!r}")
+    head, _, tail = template.partition("{" + found[0] + "}")
+    return head, tail
+
+
+def _constant(key: str):
+    def method(self):
+        return self._text[key]
+
+    method.__name__ = key
+    return method
+
+
+def _repair_constant(question_id: str):
+    def method(self):
+        return self._repair[question_id]
+
+    method.__name__ = f"repair_{question_id}"
+    return method
+
+
+class MessageBundle:
+    """Compiled, read-only messages of one locale. Method names mirror messages_en."""
+
+    __slots__ = ("locale", "_text", "_named", "_repair", "_clarify_once")
+
+    def __init__(self, definition: Dict[str, Any], *, source: str = "<dict>"):
+        intern = sys.intern
+        fragments = {k: str(v) for k, v in (definition.get("fragments") or {}).items()}
+        self.locale = str(definition.get("locale") or "")
+        self._text: Dict[str, str] = {}
+        self._named: Dict[str, Tuple[str, str]] = {}
+
+        for key, value in (definition.get("messages") or {}).items():
+            where = f"{source}: messages.{key}"
+            if isinstance(value, dict):
+                self._text[key] = intern(_compile_text(value["anon"], fragments, where))
+                named = _compile_text(value["named"], fragments, where)
+                self._named[key] = tuple(intern(part) for part in _split_named(named, where))
+            else:
+                self._text[key] = intern(_compile_text(value, fragments, where))
+
+        self._repair = self._lookup_table(definition.get("repair") or {}, fragments, f"{source}: repair")
+        self._clarify_once = self._lookup_table(definition.get("clarify_once") or {}, fragments, f"{source}: clarify_once")
+
+    def _lookup_table(self, table: Dict[str, str], fragments: Dict[str, str], where: str) -> Dict[str, str]:
+        out = {}
+        for question_id, value in table.items():
+            if value.startswith("@"):
+                out[question_id] = self._text[value[1:]]
+            else:
+                out[question_id] = sys.intern(_compile_text(value, fragments, f"{where}.{question_id}"))
+        return out
+
+    def _render(self, key: str, value: Any) -> str:
+        if value:
+            head, tail = self._named[key]
+            return f"{head}{value}{tail}"
+        return self._text[key]
+
+    # Name-dependent messages
+    def safe_space(self, name):
+        return self._render("safe_space", name)
+
+    def ask_reason(self, name):
+        return self._render("ask_reason", name)
+
+    def greet_back(self, name=None):
+        return self._render("greet_back", name)
+
+    def end_thanks(self, name=None):
+        return self._render("end_thanks", name)
+
+    def safety_escalation_with_country(self, country: str | None = None):
+        return self._render("safety_escalation_with_country", country)
+
+    def repair_reason(self, name=None):
+        return self._render("repair_reason", name)
+
+    def end_meds_options(self, name=None, needs_eval_parallel=False):
+        return self._render("end_meds_options_eval_parallel" if needs_eval_parallel else "end_meds_options", name)
+
+    def end_support_plan(self, name=None):
+        return self._render("end_support_plan", name)
+
+    def end_eval_first(self, name=None):
+        return self._render("end_eval_first", name)
+
+    # Constant messages
+    ask_main_issue = _constant("ask_main_issue")
+    ask_frequency = _constant("ask_frequency")
+    ask_desire = _constant("ask_desire")
+    ask_stress = _constant("ask_stress")
+    ask_morning_erection = _constant("ask_morning_erection")
+    ask_name = _constant("ask_name")
+    ask_gender_identity = _constant("ask_gender_identity")
+    ask_country_general = _constant("ask_country_general")
+    ask_route_choice = _constant("ask_route_choice")
+    greet = _constant("greet")
+    clarify_soft = _constant("clarify_soft")
+    answer_user_question_brief = _constant("answer_user_question_brief")
+    emotional_validation = _constant("emotional_validation")
+    meta_ack_waiting_files = _constant("meta_ack_waiting_files")
+    meta_ack_waiting_then_ask_country = _constant("meta_ack_waiting_then_ask_country")
+    meds_intro = _constant("meds_intro")
+    safety_need_country = _constant("safety_need_country")
+
+    repair_main_issue = _repair_constant("main_issue")
+    repair_frequency = _repair_constant("frequency")
+    repair_desire = _repair_constant("desire")
+    repair_stress = _repair_constant("stress")
+    repair_morning_erection = _repair_constant("morning_erection")
+    repair_gender_identity = _repair_constant("gender_identity")
+    repair_route_choice = _repair_constant("route_choice")
+
+    # Per-question dispatch
+    def repair_for_question(self, question_id, name=None):
+        if question_id == "reason":
+            return self.repair_reason(name=name)
+        if not isinstance(question_id, str):
+            return self._text["clarify_soft"]
+        return self._repair.get(question_id) or self._text["clarify_soft"]
+
+    def clarify_once_for_question(self, question_id, name=None):
+        # 1 gentle clarification before structured repair to prevent loops
+        if not isinstance(question_id, str):
+            return self._text["clarify_soft"]
+        return self._clarify_once.get(question_id) or self._text["clarify_soft"]
+
+    def __repr__(self) -> str:
+        return f"MessageBundle(locale={self.locale!r}, messages={len(self._text)})"
+
+
+# -----------------------------
+# Lazy per-process cache
+# -----------------------------
+_lock = threading.Lock()
+_bundles: Dict[str, MessageBundle] = {}
+
+
+def available_locales() -> List[str]:
+    """Locales with a bundle file (nothing is loaded)."""
+    return sorted(p.stem for p in LOCALE_DIR.glob("*.json"))
+
+
+def get_bundle(locale: str | None = None) -> MessageBundle:
+    """Compiled bundle for `locale` (UnknownLocale if there is no bundle file)."""
+    locale = locale or DEFAULT_LOCALE
+    if not isinstance(locale, str):
+        raise UnknownLocale(locale)
+    bundle = _bundles.get(locale)
+    if bundle is not None:
+        return bundle
+
+    if not _LOCALE_RE.match(locale):
+        raise UnknownLocale(locale)
+    path = LOCALE_DIR / f"{locale}.json"
+    with _lock:
+        bundle = _bundles.get(locale)
+        if bundle is None:
+            try:
+                definition = json.loads(path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                raise UnknownLocale(locale) from None
+            bundle = _bundles[locale] = MessageBundle(definition, source=str(path))
+    return bundle
@@ -3,8 +3,11 @@ from __future__ import annotations
 
 import json
 import os
+from time import perf_counter
 from typing import Any, Dict, Optional, Tuple
 
+from soficca_core import telemetry
+
 try:
     from openai import OpenAI
 except Exception:  # pragma: no cover
@@ -124,38 +127,44 @@ def call_openai_nlu(
     client = _get_client()
     model = DEFAULT_MODEL_MINI if force_model == "mini" else DEFAULT_MODEL_NANO
 
-    response = client.responses.create(
-        model=model,
-        input=[
-            {"role": "system", "content": _instructions()},
-            {
-                "role": "user",
-                "content": json.dumps(
-                    {
-                        "USER_MESSAGE": user_text,
-                        "last_question_id": last_question_id,
-                        "question_text": question_text,
-                        "allowed_values": allowed_values,
-                        "slot_snapshot": slot_snapshot or {},
-                        "mode": mode,
-                    },
-                    ensure_ascii=False,
-                ),
+    t0 = perf_counter()
+    try:
+        response = client.responses.create(
+            model=model,
+            input=[
+                {"role": "system", "content": _instructions()},
+                {
+                    "role": "user",
+                    "content": json.dumps(
+                        {
+                            "USER_MESSAGE": user_text,
+                            "last_question_id": last_question_id,
+                            "question_text": question_text,
+                            "allowed_values": allowed_values,
+                            "slot_snapshot": slot_snapshot or {},
+                            "mode": mode,
+                        },
+                        ensure_ascii=False,
+                    ),
+                },
+            ],
+            max_output_tokens=MAX_OUTPUT_TOKENS,
+            text={
+                "format": {
+                    "type": "json_schema",
+                    "name": "soficca_nlu",
+                    "strict": True,
+                    "schema": _nlu_schema(),
+                }
             },
-        ],
-        max_output_tokens=MAX_OUTPUT_TOKENS,
-        text={
-            "format": {
-                "type": "json_schema",
-                "name": "soficca_nlu",
-                "strict": True,
-                "schema": _nlu_schema(),
-            }
-        },
-    )
-
-    raw = response.output_text
-    data = json.loads(raw)
+        )
+
+        raw = response.output_text
+        data = json.loads(raw)
+    except Exception:
+        telemetry.observe("nlu_call_seconds", perf_counter() - t0, model=model, outcome="error")
+        raise
+    telemetry.observe("nlu_call_seconds", perf_counter() - t0, model=model, outcome="ok")
 
     usage_obj = getattr(response, "usage", None)
     if hasattr(usage_obj, "model_dump"):
@@ -0,0 +1,62 @@
+# src/soficca_core/nlu_tape.py
+"""
+Record / replay of the NLU results a turn actually used.
+
+The engine routes every `interpret()` call of a turn through an NluTape.
+With `context.nlu_record` the recorded entries are returned in
+`chat.nlu_results`; passing them back as `context.nlu_results` replays the
+turn without calling the NLU (OpenAI or deterministic), which makes stored
+sessions reproducible.
+
+Entries are consumed in call order. A replay never calls the NLU: a call
+with no entry left, or whose question id does not match the next entry,
+raises NluReplayError (the turn would not be the one that was recorded).
+
+`context.nlu_results` is internal: the API strips it from client requests
+and only the event log's replay (api/event_log.py) passes it.
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, List, Optional
+
+from soficca_core import telemetry
+from soficca_core.interpret_en import _store_last_nlu, interpret
+
+
+class NluReplayError(ValueError):
+    pass
+
+
+class NluTape:
+    __slots__ = ("entries", "_replay", "_pos")
+
+    def __init__(self, replay: Optional[List[Dict[str, Any]]] = None):
+        self.entries: List[Dict[str, Any]] = []
+        # None records; a list (even an empty one) replays.
+        self._replay = replay
+        self._pos = 0
+
+    def interpret(self, user_text: str, question_id: str, *, state: Optional[dict] = None) -> Dict[str, Any]:
+        with telemetry.timed("stage_seconds", stage="nlu"):
+            return self._interpret(user_text, question_id, state)
+
+    def _interpret(self, user_text: str, question_id: str, state: Optional[dict]) -> Dict[str, Any]:
+        if self._replay is not None:
+            if self._pos >= len(self._replay):
+                raise NluReplayError(f"no recorded NLU result for call {self._pos + 1} ({question_id})")
+            entry = self._replay[self._pos]
+            if not isinstance(entry, dict) or entry.get("question_id") != question_id:
+                recorded = entry.get("question_id") if isinstance(entry, dict) else None
+                raise NluReplayError(f"NLU call {self._pos + 1} is for {question_id}, the recording has {recorded}")
+            self._pos += 1
+            out = copy.deepcopy(entry.get("result") or {})
+            _store_last_nlu(state, out, question_id, "global" if question_id == "global" else "question")
+            self.entries.append({"question_id": question_id, "result": copy.deepcopy(out)})
+            return out
+
+        out = interpret(user_text, question_id, state=state)
+        # The engine may edit the result afterwards; the tape keeps what the NLU returned.
+        self.entries.append({"question_id": question_id, "result": copy.deepcopy(out)})
+        return out
@@ -0,0 +1,318 @@
+# src/soficca_core/ruleset.py
+"""
+Declarative rulesets.
+
+A ruleset is a JSON artefact that carries its own version, the slot -> signal
+normalization and an ordered list of rules (conditions over signals -> path,
+flags, reasons, recommendations). See rulesets/default.json.
+
+Signals are tri-state (true / false / null), so a ruleset is compiled once into
+a table holding the decision for every combination of the signals its rules
+read. Evaluating a turn is then one tuple build and one dict lookup.
+
+The active ruleset is swapped atomically: each turn takes one reference via
+`active_ruleset()` and keeps using it, so a reload never mixes versions
+inside a turn.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from soficca_core import telemetry
+
+DEFAULT_RULESET_PATH = Path(__file__).with_name("rulesets") / "default.json"
+
+_SIGNAL_DOMAIN = (True, False, None)
+_MAX_TABLE_SIGNALS = 10  # 3**10 decisions; beyond that the table stops being cheap
+
+
+def _signal_value(v: Any) -> Optional[bool]:
+    # Rules only ever test `is True` / `is False`; anything else reads as unknown.
+    if v is True or v is False:
+        return v
+    return None
+
+
+class CompiledRuleset:
+    __slots__ = ("version", "default_path", "source", "definition", "_signals", "_keys", "_table")
+
+    def __init__(self, version, default_path, signals, keys, table, source=None, definition=None):
+        self.version = version
+        self.default_path = default_path
+        self.source = source
+        self.definition = definition  # the artefact it was compiled from, so replays can persist it
+        self._signals = signals
+        self._keys = keys
+        self._table = table
+
+    def normalize(self, slots: Dict[str, Any]) -> Dict[str, Optional[bool]]:
+        out = {}
+        for name, slot, values, casefold, accept_bool in self._signals:
+            v = slots.get(slot)
+            if isinstance(v, str):
+                out[name] = values.get(v.strip().lower() if casefold else v)
+            elif accept_bool and (v is True or v is False):
+                out[name] = v
+            else:
+                out[name] = None
+        return out
+
+    def apply(self, signals: Dict[str, Any]) -> Dict[str, Any]:
+        with telemetry.timed("stage_seconds", stage="rules"):
+            key = tuple(_signal_value(signals.get(k)) for k in self._keys)
+            path, flags, reasons, recommendations = self._table[key]
+        # Fresh lists: callers append to and hand these out in reports.
+        return {
+            "path": path,
+            "flags": list(flags),
+            "reasons": list(reasons),
+            "recommendations": list(recommendations),
+        }
+
+    def __repr__(self) -> str:
+        return f"CompiledRuleset(version={self.version!r}, source={self.source!r})"
+
+
+# -----------------------------
+# Compilation
+# -----------------------------
+class DecisionPool:
+    """
+    Interning table for compiled decisions. Rulesets compiled against the same
+    pool share decision tuples (the usual case across versions); strings are
+    interned with sys.intern and die with their last reference. The pool's
+    owner decides its lifetime: without one each compile gets its own, and
+    the registry prunes its pool to the versions it still holds.
+    """
+
+    def __init__(self):
+        self._items: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def intern(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return sys.intern(value)
+        if isinstance(value, tuple):
+            value = tuple(self.intern(v) for v in value)
+            with self._lock:
+                return self._items.setdefault(value, value)
+        return value
+
+    def retain(self, rulesets) -> None:
+        """Drops every decision not used by one of `rulesets`."""
+        live = {}
+        for rs in rulesets:
+            for decision in rs._table.values():
+                live[decision] = decision
+                for part in decision:
+                    if isinstance(part, tuple):
+                        live[part] = part
+        with self._lock:
+            self._items = {k: v for k, v in self._items.items() if k in live}
+
+
+def _as_str_list(value: Any, where: str) -> Tuple[str, ...]:
+    if value is None:
+        return ()
+    if not isinstance(value, list) or not all(isinstance(x, str) for x in value):
+        raise ValueError(f"{where} must be a list of strings")
+    return tuple(value)
+
+
+def _compile_signals(signals: Any) -> Tuple[Tuple[str, str, Dict[str, Optional[bool]], bool, bool], ...]:
+    if not isinstance(signals, dict) or not signals:
+        raise ValueError("ruleset.signals must be a non-empty object")
+
+    out = []
+    for name, spec in signals.items():
+        where = f"signals.{name}"
+        if not isinstance(spec, dict) or not isinstance(spec.get("slot"), str):
+            raise ValueError(f"{where} must be an object with a 'slot'")
+        values = spec.get("values") or {}
+        if not isinstance(values, dict):
+            raise ValueError(f"{where}.values must be an object")
+        casefold = bool(spec.get("casefold", False))
+        for raw, mapped in values.items():
+            if not raw.strip():
+                raise ValueError(f"{where}.values keys must be non-empty")
+            if not (mapped is None or isinstance(mapped, bool)):
+                raise ValueError(f"{where}.values.{raw} must be true, false or null")
+        if casefold:
+            values = {k.strip().lower(): v for k, v in values.items()}
+        out.append((sys.intern(name), sys.intern(spec["slot"]), dict(values), casefold, bool(spec.get("accept_bool", False))))
+    return tuple(out)
+
+
+def _compile_rules(rules: Any, signal_names) -> List[Dict[str, Any]]:
+    if not isinstance(rules, list):
+        raise ValueError("ruleset.rules must be a list")
+
+    out = []
+    for i, rule in enumerate(rules):
+        where = f"rules[{i}]"
+        if not isinstance(rule, dict):
+            raise ValueError(f"{where} must be an object")
+        when = rule.get("when") or {}
+        if not isinstance(when, dict):
+            raise ValueError(f"{where}.when must be an object")
+
+        conditions = {}
+        for signal, expected in when.items():
+            if signal not in signal_names:
+                raise ValueError(f"{where}.when references unknown signal {signal!r}")
+            allowed = expected if isinstance(expected, list) else [expected]
+            for a in allowed:
+                if not (a is None or isinstance(a, bool)):
+                    raise ValueError(f"{where}.when.{signal} must be true, false, null or a list of those")
+            conditions[signal] = tuple(allowed)
+
+        path = rule.get("path")
+        if path is not None and not isinstance(path, str):
+            raise ValueError(f"{where}.path must be a string")
+
+        out.append(
+            {
+                "when": conditions,
+                "path": path,
+                "flags": _as_str_list(rule.get("flags"), f"{where}.flags"),
+                "reasons": _as_str_list(rule.get("reasons"), f"{where}.reasons"),
+                "recommendations": _as_str_list(rule.get("recommendations"), f"{where}.recommendations"),
+            }
+        )
+    return out
+
+
+def _evaluate_rules(rules: List[Dict[str, Any]], default_path: str, signals: Dict[str, Optional[bool]]):
+    # Reference semantics: rules run in order; the last matching rule with a
+    # path wins, everything else accumulates (flags de-duplicated).
+    path = default_path
+    flags: List[str] = []
+    reasons: List[str] = []
+    recommendations: List[str] = []
+    for rule in rules:
+        if not all(any(signals.get(s) is a for a in allowed) for s, allowed in rule["when"].items()):
+            continue
+        if rule["path"] is not None:
+            path = rule["path"]
+        flags.extend(f for f in rule["flags"] if f not in flags)
+        reasons.extend(rule["reasons"])
+        recommendations.extend(rule["recommendations"])
+    return path, tuple(flags), tuple(reasons), tuple(recommendations)
+
+
+def compile_ruleset(definition: Dict[str, Any], *, source: Optional[str] = None, pool: Optional[DecisionPool] = None) -> CompiledRuleset:
+    if not isinstance(definition, dict):
+        raise ValueError("ruleset must be a JSON object")
+
+    version = definition.get("ruleset_version")
+    if not isinstance(version, str) or not version:
+        raise ValueError("ruleset.ruleset_version must be a non-empty string")
+    default_path = definition.get("default_path") or "PATH_MORE_QUESTIONS"
+
+    signals = _compile_signals(definition.get("signals"))
+    signal_names = [s[0] for s in signals]
+    rules = _compile_rules(definition.get("rules"), set(signal_names))
+
+    # Only the signals some rule reads take part in the lookup key.
+    used = {s for rule in rules for s in rule["when"]}
+    keys = tuple(name for name in signal_names if name in used)
+    if len(keys) > _MAX_TABLE_SIGNALS:
+        raise ValueError(f"ruleset reads {len(keys)} signals; at most {_MAX_TABLE_SIGNALS} are supported")
+
+    pool = pool if pool is not None else DecisionPool()
+    table = {}
+    for combo in itertools.product(_SIGNAL_DOMAIN, repeat=len(keys)):
+        table[combo] = pool.intern(_evaluate_rules(rules, default_path, dict(zip(keys, combo))))
+
+    return CompiledRuleset(version, default_path, signals, keys, table, source=source, definition=definition)
+
+
+def load_ruleset(path, *, pool: Optional[DecisionPool] = None) -> CompiledRuleset:
+    path = Path(path)
+    with path.open("r", encoding="utf-8") as f:
+        definition = json.load(f)
+    return compile_ruleset(definition, source=str(path), pool=pool)
+
+
+# -----------------------------
+# Active ruleset (hot-swappable)
+# -----------------------------
+_swap_lock = threading.Lock()
+_active: Optional[CompiledRuleset] = None
+_active_mtime: Optional[float] = None
+# Rulesets swapped out by activate(), by version: turns logged with them must still replay.
+_retired: Dict[str, CompiledRuleset] = {}
+
+
+def _configured_path() -> Path:
+    return Path(os.getenv("SOFICCA_RULESET_PATH") or DEFAULT_RULESET_PATH)
+
+
+def active_ruleset() -> CompiledRuleset:
+    rs = _active
+    if rs is None:
+        with _swap_lock:
+            if _active is None:
+                _activate_locked(load_ruleset(_configured_path()))
+            rs = _active
+    return rs
+
+
+def _activate_locked(ruleset: CompiledRuleset) -> None:
+    global _active, _active_mtime
+    mtime = None
+    if ruleset.source:
+        try:
+            mtime = os.stat(ruleset.source).st_mtime
+        except OSError:
+            mtime = None
+    _active_mtime = mtime
+    _active = ruleset
+
+
+def activate(ruleset: CompiledRuleset) -> CompiledRuleset:
+    """Make `ruleset` the active one. Turns already running keep their reference."""
+    with _swap_lock:
+        previous = _active
+        if previous is not None and previous.version != ruleset.version:
+            _retired[previous.version] = previous
+        _retired.pop(ruleset.version, None)
+        _activate_locked(ruleset)
+    return previous
+
+
+def retired_ruleset(version: str) -> Optional[CompiledRuleset]:
+    """A ruleset that was active earlier in this process, or None."""
+    return _retired.get(version)
+
+
+def reload_ruleset(path=None) -> CompiledRuleset:
+    """Load, compile and activate a ruleset. On error the active one is kept."""
+    ruleset = load_ruleset(path or _configured_path())
+    activate(ruleset)
+    return ruleset
+
+
+def reload_if_changed() -> bool:
+    """Reload the active ruleset if its source file changed on disk."""
+    rs = active_ruleset()
+    if not rs.source:
+        return False
+    try:
+        mtime = os.stat(rs.source).st_mtime
+    except OSError:
+        return False
+    if mtime == _active_mtime:
+        return False
+    reload_ruleset(rs.source)
+    return True
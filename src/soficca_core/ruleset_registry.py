@@ -0,0 +1,162 @@
+# src/soficca_core/ruleset_registry.py
+"""
+Registry of ruleset versions served side by side (e.g. one per partner clinic).
+
+A request picks its ruleset through `context`:
+
+    {"context": {"ruleset_version": "0.2.0", ...}}   # explicit version
+    {"context": {"tenant_id": "clinic-a", ...}}      # version bound to the tenant
+
+Without either, the engine's active ruleset is used; a version that was
+active earlier in the process (ruleset.activate) still resolves, so turns
+logged with it replay after a hot swap. Artefacts are registered
+by path and compiled on first use; at most `capacity` compiled versions are
+kept, least recently used first out. Compiled versions share interned strings
+and decision tuples through the registry's DecisionPool, which is pruned to
+the versions still cached whenever one is evicted.
+
+Configuration:
+    SOFICCA_RULESET_DIR         directory of *.json artefacts to register
+    SOFICCA_RULESET_CACHE_SIZE  compiled versions kept in memory (default 8)
+    SOFICCA_TENANT_RULESETS     "tenant=version,tenant=version"
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from soficca_core.ruleset import CompiledRuleset, DecisionPool, active_ruleset, compile_ruleset, load_ruleset, retired_ruleset
+
+
+class UnknownRuleset(KeyError):
+    pass
+
+
+class RulesetRegistry:
+    def __init__(self, capacity: int = 8):
+        self.capacity = max(1, int(capacity))
+        self._sources: Dict[str, Any] = {}  # version -> Path or definition dict
+        self._tenants: Dict[str, str] = {}
+        self._compiled: "OrderedDict[str, CompiledRuleset]" = OrderedDict()
+        self._pool = DecisionPool()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "compiles": 0, "evictions": 0}
+
+    # ---- registration ----
+    def register(self, version: str, source: Any) -> None:
+        """Register an artefact path (or an already parsed definition) under `version`."""
+        with self._lock:
+            self._sources[version] = source if isinstance(source, dict) else Path(source)
+            if self._compiled.pop(version, None) is not None:
+                self._pool.retain(self._compiled.values())
+
+    def unregister(self, version: str) -> None:
+        """Forget `version` and any tenant bound to it."""
+        with self._lock:
+            self._sources.pop(version, None)
+            self._tenants = {t: v for t, v in self._tenants.items() if v != version}
+            if self._compiled.pop(version, None) is not None:
+                self._pool.retain(self._compiled.values())
+
+    def unbind_tenant(self, tenant_id: str) -> None:
+        with self._lock:
+            self._tenants.pop(tenant_id, None)
+
+    def register_dir(self, directory) -> int:
+        count = 0
+        for path in sorted(Path(directory).glob("*.json")):
+            with path.open("r", encoding="utf-8") as f:
+                version = (json.load(f) or {}).get("ruleset_version")
+            if isinstance(version, str) and version:
+                self.register(version, path)
+                count += 1
+        return count
+
+    def bind_tenant(self, tenant_id: str, version: str) -> None:
+        with self._lock:
+            self._tenants[tenant_id] = version
+
+    def versions(self):
+        with self._lock:
+            return sorted(self._sources)
+
+    # ---- lookup ----
+    def get(self, version: str) -> CompiledRuleset:
+        active = active_ruleset()
+        if version == active.version:
+            return active
+
+        with self._lock:
+            compiled = self._compiled.get(version)
+            if compiled is not None:
+                self._compiled.move_to_end(version)
+                self.stats["hits"] += 1
+                return compiled
+            self.stats["misses"] += 1
+            source = self._sources.get(version)
+        if source is None:
+            # Versions hot-swapped out stay available, e.g. for replaying turns logged with them.
+            retired = retired_ruleset(version)
+            if retired is None:
+                raise UnknownRuleset(version)
+            return retired
+
+        # Compile outside the lock; a concurrent miss on the same version just
+        # compiles twice and the second result wins.
+        if isinstance(source, dict):
+            compiled = compile_ruleset(source, source=f"<registered {version}>", pool=self._pool)
+        else:
+            compiled = load_ruleset(source, pool=self._pool)
+        if compiled.version != version:
+            raise ValueError(f"artefact registered as {version!r} declares version {compiled.version!r}")
+
+        with self._lock:
+            self.stats["compiles"] += 1
+            self._compiled[version] = compiled
+            self._compiled.move_to_end(version)
+            evicted = False
+            while len(self._compiled) > self.capacity:
+                self._compiled.popitem(last=False)
+                self.stats["evictions"] += 1
+                evicted = True
+            if evicted:
+                self._pool.retain(self._compiled.values())
+        return compiled
+
+    def resolve(self, context: Optional[Dict[str, Any]] = None) -> CompiledRuleset:
+        context = context or {}
+        version = context.get("ruleset_version")
+        if not version:
+            tenant_id = context.get("tenant_id")
+            if tenant_id:
+                with self._lock:
+                    version = self._tenants.get(str(tenant_id))
+                if version is None:
+                    raise UnknownRuleset(f"tenant:{tenant_id}")
+        if not version:
+            return active_ruleset()
+        return self.get(str(version))
+
+
+def _from_env() -> RulesetRegistry:
+    registry = RulesetRegistry(capacity=int(os.getenv("SOFICCA_RULESET_CACHE_SIZE", "8")))
+    directory = os.getenv("SOFICCA_RULESET_DIR")
+    if directory:
+        registry.register_dir(directory)
+    for pair in (os.getenv("SOFICCA_TENANT_RULESETS") or "").split(","):
+        tenant_id, _, version = pair.partition("=")
+        if tenant_id.strip() and version.strip():
+            registry.bind_tenant(tenant_id.strip(), version.strip())
+    return registry
+
+
+REGISTRY = _from_env()
+
+
+def resolve_ruleset(context: Optional[Dict[str, Any]] = None) -> CompiledRuleset:
+    return REGISTRY.resolve(context)
@@ -0,0 +1,297 @@
+# src/soficca_core/state_codec.py
+"""
+Compact, versioned binary encoding of the chat state (standard library only).
+
+Layout (version 1):
+
+    b"SC" | version:u8 | string table | root value
+
+    string table = varint count, then (varint byte length, utf-8 bytes)*
+    value        = tag:u8 followed by
+                   NONE / FALSE / TRUE   -
+                   INT                   zigzag varint (counters, turn, repair counts)
+                   FLOAT                 8-byte IEEE 754, big endian
+                   KNOWN                 varint index into _KNOWN_V1 (phases, modes,
+                                         question ids, state keys, enum slot values)
+                   STR                   varint index into the string table (free text)
+                   LIST                  varint length, values
+                   DICT                  varint length, (key value, value)*
+
+Any JSON-compatible state round-trips, key order included. Transport over
+JSON uses a text token: "scb1." + urlsafe base64 without padding.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import struct
+from typing import Any, Dict, List, Tuple
+
+from soficca_core.chat_state import (
+    END_EVAL_FIRST,
+    END_MEDS_OPTIONS,
+    END_SUPPORT_PLAN,
+    MODE_NORMAL,
+    MODE_SAFETY_LOCK,
+    PHASE_ACTION,
+    PHASE_CONTEXT,
+    PHASE_END,
+    PHASE_INTERPRETATION,
+    PHASE_INTRO,
+    PHASE_REASON,
+    PHASE_SYMPTOMS,
+    Q_COUNTRY,
+    Q_DESIRE,
+    Q_FREQUENCY,
+    Q_GENDER_ID,
+    Q_MAIN_ISSUE,
+    Q_MORNING_ERECTION,
+    Q_NAME,
+    Q_REASON,
+    Q_ROUTE_CHOICE,
+    Q_STRESS,
+)
+
+MAGIC = b"SC"
+VERSION = 1
+TOKEN_PREFIX = "scb1."
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _KNOWN, _STR, _LIST, _DICT = range(9)
+
+# Append only: an entry's position is its wire code in version 1. Values the
+# engine defines are referenced from chat_state, never retyped; a new mode,
+# phase, question id, end reason or state key must be appended here
+# (tests/test_state_codec.py fails until it is).
+_KNOWN_V1: Tuple[str, ...] = (
+    # top-level keys
+    "mode", "phase", "user", "meta", "slots", "last_question_id", "turn", "end_reason", "safety_flags",
+    # modes, phases
+    MODE_NORMAL, MODE_SAFETY_LOCK,
+    PHASE_INTRO, PHASE_REASON, PHASE_SYMPTOMS, PHASE_CONTEXT, PHASE_INTERPRETATION, PHASE_ACTION, PHASE_END,
+    # slots / question ids
+    Q_REASON, Q_MAIN_ISSUE, Q_FREQUENCY, Q_DESIRE, Q_STRESS, Q_MORNING_ERECTION, "wants_meds",
+    Q_COUNTRY, Q_NAME, Q_GENDER_ID, Q_ROUTE_CHOICE,
+    # enum slot values
+    "male", "female", "non_binary", "prefer_not_say",
+    "erection_lost", "short_duration", "early_ejaculation", "something_else",
+    "always", "sometimes", "present", "reduced", "low", "moderate", "high", "normal", "rare",
+    "meds", "support",
+    # end reasons
+    END_MEDS_OPTIONS, END_SUPPORT_PLAN, END_EVAL_FIRST,
+    # meta keys
+    "safe_space_shown", "welcomed", "awaiting_files", "unknown_slot_writes", "repair_counts",
+    "last_nlu", "flow", "key", "value",
+    # last_nlu
+    "question_id", "stage", "nlu_used", "confidence", "nlu_meta", "nlu_error", "type",
+    "global", "question",
+    "deterministic", "deterministic_fast", "no_user_text", "openai_error_fallback", "openai",
+    "answer", "ambiguous", "unknown", "user_question", "emotional", "greeting", "gratitude",
+    "meta_pause", "file_handoff", "meds_intent",
+    # safety flags
+    "RED_FLAG_SELF_HARM", "RED_FLAG_ACUTE_CARDIORESP", "RED_FLAG_NEURO",
+    "RED_FLAG_PRIAPISM", "RED_FLAG_SEVERE_PAIN_BLEEDING",
+    "default",
+    "locale",
+)
+_KNOWN_CODES: Dict[str, int] = {s: i for i, s in enumerate(_KNOWN_V1)}
+
+_DOUBLE = struct.Struct(">d")
+
+
+class StateCodecError(ValueError):
+    pass
+
+
+# -----------------------------
+# Encoding
+# -----------------------------
+def _write_varint(out: bytearray, n: int) -> None:
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _encode_value(value: Any, out: bytearray, strings: Dict[str, int]) -> None:
+    if value is None:
+        out.append(_NONE)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, int):
+        out.append(_INT)
+        _write_varint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))
+    elif isinstance(value, float):
+        out.append(_FLOAT)
+        out += _DOUBLE.pack(value)
+    elif isinstance(value, str):
+        code = _KNOWN_CODES.get(value)
+        if code is not None:
+            out.append(_KNOWN)
+            _write_varint(out, code)
+        else:
+            idx = strings.get(value)
+            if idx is None:
+                idx = strings[value] = len(strings)
+            out.append(_STR)
+            _write_varint(out, idx)
+    elif isinstance(value, (list, tuple)):
+        out.append(_LIST)
+        _write_varint(out, len(value))
+        for item in value:
+            _encode_value(item, out, strings)
+    elif isinstance(value, dict):
+        out.append(_DICT)
+        _write_varint(out, len(value))
+        for k, v in value.items():
+            _encode_value(str(k), out, strings)
+            _encode_value(v, out, strings)
+    else:
+        # Same escape hatch as the JSON path (json.dumps(..., default=str)).
+        _encode_value(str(value), out, strings)
+
+
+def encode_state(state: Any) -> bytes:
+    strings: Dict[str, int] = {}
+    body = bytearray()
+    _encode_value(state, body, strings)
+
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    _write_varint(out, len(strings))
+    for s in strings:  # insertion order == index order
+        raw = s.encode("utf-8")
+        _write_varint(out, len(raw))
+        out += raw
+    out += body
+    return bytes(out)
+
+
+# -----------------------------
+# Decoding
+# -----------------------------
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    n = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise StateCodecError("truncated varint")
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return n, pos
+        shift += 7
+
+
+def _decode_value(data: bytes, pos: int, strings: List[str]) -> Tuple[Any, int]:
+    if pos >= len(data):
+        raise StateCodecError("truncated value")
+    tag = data[pos]
+    pos += 1
+    if tag == _NONE:
+        return None, pos
+    if tag == _TRUE:
+        return True, pos
+    if tag == _FALSE:
+        return False, pos
+    if tag == _INT:
+        z, pos = _read_varint(data, pos)
+        return (z >> 1) if not z & 1 else -((z + 1) >> 1), pos
+    if tag == _FLOAT:
+        if pos + 8 > len(data):
+            raise StateCodecError("truncated float")
+        return _DOUBLE.unpack_from(data, pos)[0], pos + 8
+    if tag == _KNOWN or tag == _STR:
+        idx, pos = _read_varint(data, pos)
+        table = _KNOWN_V1 if tag == _KNOWN else strings
+        if idx >= len(table):
+            raise StateCodecError("string index out of range")
+        return table[idx], pos
+    if tag == _LIST:
+        n, pos = _read_varint(data, pos)
+        items = []
+        for _ in range(n):
+            item, pos = _decode_value(data, pos, strings)
+            items.append(item)
+        return items, pos
+    if tag == _DICT:
+        n, pos = _read_varint(data, pos)
+        d = {}
+        for _ in range(n):
+            k, pos = _decode_value(data, pos, strings)
+            if not isinstance(k, str):
+                raise StateCodecError("dict key is not a string")
+            v, pos = _decode_value(data, pos, strings)
+            d[k] = v
+        return d, pos
+    raise StateCodecError(f"unknown tag {tag}")
+
+
+def decode_state(data: bytes) -> Any:
+    if data[:2] != MAGIC:
+        raise StateCodecError("not a binary chat state")
+    if len(data) < 3 or data[2] != VERSION:
+        raise StateCodecError(f"unsupported state codec version {data[2] if len(data) > 2 else None}")
+
+    count, pos = _read_varint(data, 3)
+    strings = []
+    for _ in range(count):
+        n, pos = _read_varint(data, pos)
+        if pos + n > len(data):
+            raise StateCodecError("truncated string table")
+        try:
+            strings.append(data[pos:pos + n].decode("utf-8"))
+        except UnicodeDecodeError as e:
+            raise StateCodecError("invalid utf-8 in string table") from e
+        pos += n
+
+    try:
+        value, pos = _decode_value(data, pos, strings)
+    except RecursionError as e:
+        raise StateCodecError("state nested too deeply") from e
+    if pos != len(data):
+        raise StateCodecError("trailing bytes after state")
+    return value
+
+
+# -----------------------------
+# Text transport
+# -----------------------------
+def encode_state_token(state: Any) -> str:
+    return TOKEN_PREFIX + base64.urlsafe_b64encode(encode_state(state)).rstrip(b"=").decode("ascii")
+
+
+def is_state_token(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(TOKEN_PREFIX)
+
+
+def decode_state_token(token: str) -> Any:
+    payload = token[len(TOKEN_PREFIX):]
+    try:
+        raw = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+    except ValueError as e:
+        raise StateCodecError(f"invalid state token: {e}") from e
+    return decode_state(raw)
+
+
+def coerce_state(value: Any) -> Any:
+    """Accept a state as dict, binary token or raw bytes; return the dict form."""
+    if isinstance(value, (bytes, bytearray)):
+        return decode_state(bytes(value))
+    if is_state_token(value):
+        return decode_state_token(value)
+    return value
+
+
+def loads_state(text: Any) -> Any:
+    """Load a stored state that may be JSON text or a binary token (or JSON of one)."""
+    if text is None:
+        return None
+    if isinstance(text, (bytes, bytearray)) and bytes(text[:2]) == MAGIC:
+        return decode_state(bytes(text))
+    if is_state_token(text):
+        return decode_state_token(text)
+    return coerce_state(json.loads(text))
@@ -0,0 +1,99 @@
+# src/soficca_core/state_delta.py
+"""
+State deltas: ship what changed in `chat.state` instead of the whole state.
+
+A patch is
+
+    {
+      "base_version": 4,          # turn of the state the patch applies to
+      "version": 5,               # turn of the resulting state
+      "ops": [["set", ["slots", "frequency"], "sometimes"],
+              ["set", ["turn"], 5],
+              ["del", ["meta", "flow"]]],
+      "checksum": "1f0c…"         # state_checksum() of the resulting state
+    }
+
+Dicts are diffed key by key; lists and scalars are replaced whole. After
+applying a patch the client compares checksums and falls back to a full
+state request if they differ.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+from typing import Any, Dict, List
+
+
+class StateDeltaError(ValueError):
+    pass
+
+
+def state_checksum(state: Any) -> str:
+    """sha256 over canonical JSON (sorted keys, compact separators), first 16 hex chars."""
+    canonical = json.dumps(state, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _diff(old: Any, new: Any, path: List[str], ops: List[list]) -> None:
+    if isinstance(old, dict) and isinstance(new, dict):
+        for k, v in new.items():
+            if k not in old:
+                ops.append(["set", path + [k], v])
+            else:
+                _diff(old[k], v, path + [k], ops)
+        for k in old:
+            if k not in new:
+                ops.append(["del", path + [k]])
+        return
+    if type(old) is not type(new) or old != new:
+        ops.append(["set", path, new])
+
+
+def diff_state(old: Any, new: Any) -> List[list]:
+    ops: List[list] = []
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return [["set", [], new]]
+    _diff(old, new, [], ops)
+    return ops
+
+
+def make_patch(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    # Values are deep-copied so later mutation of `new` cannot leak into the patch.
+    return {
+        "base_version": (old or {}).get("turn", 0),
+        "version": new.get("turn", 0),
+        "ops": copy.deepcopy(diff_state(old or {}, new)),
+        "checksum": state_checksum(new),
+    }
+
+
+def apply_patch(state: Dict[str, Any], patch: Dict[str, Any], *, verify: bool = True) -> Dict[str, Any]:
+    """Return a new state with `patch` applied; `state` itself is not modified."""
+    if (state or {}).get("turn", 0) != patch.get("base_version"):
+        raise StateDeltaError("patch base_version does not match state turn")
+
+    out = copy.deepcopy(state or {})
+    for op in patch.get("ops") or []:
+        kind, path = op[0], op[1]
+        if not path:
+            if kind != "set":
+                raise StateDeltaError("cannot delete the root")
+            out = copy.deepcopy(op[2])
+            continue
+        parent = out
+        for k in path[:-1]:
+            parent = parent.setdefault(k, {})
+            if not isinstance(parent, dict):
+                raise StateDeltaError(f"patch path {path!r} crosses a non-object")
+        if kind == "set":
+            parent[path[-1]] = copy.deepcopy(op[2])
+        elif kind == "del":
+            parent.pop(path[-1], None)
+        else:
+            raise StateDeltaError(f"unknown patch op {kind!r}")
+
+    if verify and state_checksum(out) != patch.get("checksum"):
+        raise StateDeltaError("checksum mismatch after applying patch")
+    return out
@@ -0,0 +1,122 @@
+# src/soficca_core/state_history.py
+"""
+Persistent (structurally shared) chat state versions.
+
+`freeze(state, prev)` turns a state into an immutable version: dicts become
+FrozenDict, lists become tuples, and every subtree that is unchanged since
+`prev` is reused by identity instead of copied. A history of N turns
+therefore costs the changed subtrees per turn, not N full states.
+
+`thaw(version)` returns a plain, mutable deep copy for the engine to work on.
+
+    history = StateHistory()
+    history.record(report["chat"]["state"])   # once per turn
+    history.rewind(3)                         # state as of turn 3, no replay
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+
+class FrozenDict(dict):
+    """Read-only dict. Still a dict, so json.dumps and `==` work as usual."""
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenDict is immutable; thaw() it first")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __repr__(self) -> str:
+        return f"FrozenDict({dict.__repr__(self)})"
+
+
+def freeze(value: Any, prev: Any = None) -> Any:
+    """Immutable version of `value`, sharing unchanged subtrees with `prev`."""
+    if isinstance(value, dict):
+        prev_d = prev if isinstance(prev, FrozenDict) else None
+        items = {}
+        shared = prev_d is not None and len(prev_d) == len(value)
+        for k, v in value.items():
+            old = prev_d.get(k) if prev_d is not None else None
+            new = freeze(v, old)
+            if shared and (new is not old or k not in prev_d):
+                shared = False
+            items[k] = new
+        # Same keys in the same order, every child reused: reuse the whole dict.
+        if shared and list(prev_d) == list(items):
+            return prev_d
+        return FrozenDict(items)
+
+    if isinstance(value, (list, tuple)):
+        prev_t = prev if isinstance(prev, tuple) else None
+        if prev_t is not None and len(prev_t) == len(value):
+            items = tuple(freeze(v, p) for v, p in zip(value, prev_t))
+            if all(a is b for a, b in zip(items, prev_t)):
+                return prev_t
+            return items
+        return tuple(freeze(v) for v in value)
+
+    if prev is not None and type(prev) is type(value) and prev == value:
+        return prev
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Plain mutable deep copy (dicts and lists) of a frozen or plain state."""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
+
+
+class StateHistory:
+    """Per-session list of frozen state versions keyed by turn."""
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity
+        self._versions: List[FrozenDict] = []
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def record(self, state: Dict[str, Any]) -> FrozenDict:
+        version = freeze(state, self._versions[-1] if self._versions else None)
+        self._versions.append(version)
+        if self.capacity is not None and len(self._versions) > self.capacity:
+            del self._versions[: len(self._versions) - self.capacity]
+        return version
+
+    def latest(self) -> Optional[FrozenDict]:
+        return self._versions[-1] if self._versions else None
+
+    def turns(self) -> List[int]:
+        return [v.get("turn", 0) for v in self._versions]
+
+    def at(self, turn: int) -> FrozenDict:
+        """Version recorded for `turn` (KeyError if not held)."""
+        for version in reversed(self._versions):
+            if version.get("turn", 0) == turn:
+                return version
+        raise KeyError(turn)
+
+    def rewind(self, turn: int) -> Dict[str, Any]:
+        """Drop versions after `turn` and return a mutable copy of the state at `turn`."""
+        version = self.at(turn)
+        while self._versions[-1] is not version:
+            self._versions.pop()
+        return thaw(version)
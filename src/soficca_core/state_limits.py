@@ -0,0 +1,229 @@
+# src/soficca_core/state_limits.py
+"""
+Bounded-state policy.
+
+The chat state round-trips through clients and storage on every turn, so
+nothing in it may grow without bound:
+
+- diagnostic lists (meta.unknown_slot_writes) are ring buffers
+- free-text slot and user profile values are capped in length; ids (mode,
+  phase, question ids, end reason, flow, locale, flags) at ID_MAX
+- safety_flags and meta.repair_counts are capped in entries
+- the whole state has a byte budget (compact JSON), enforced when a turn
+  starts and before it is returned. Over budget, diagnostic data is shed
+  first, then slots the engine does not know, then the user profile. What
+  is left is the capped core (under 10 KB with the defaults), so any budget
+  above that is a hard bound; `state_budget_exceeded` counts the turns
+  where the budget is set below it.
+
+Violations never raise. They are counted per session in `meta.limits` and
+per process in `limit_counters()`.
+
+Configuration:
+    SOFICCA_STATE_RING_SIZE   entries kept in diagnostic lists (default 20)
+    SOFICCA_SLOT_TEXT_MAX     max characters per string slot value (default 500)
+    SOFICCA_STATE_MAX_BYTES   byte budget for the whole state (default 16384)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict
+
+RING_SIZE = int(os.getenv("SOFICCA_STATE_RING_SIZE", "20"))
+SLOT_TEXT_MAX = int(os.getenv("SOFICCA_SLOT_TEXT_MAX", "500"))
+STATE_MAX_BYTES = int(os.getenv("SOFICCA_STATE_MAX_BYTES", "16384"))
+
+ID_MAX = 64  # mode, phase, question ids, end reason, flow, locale, flag names
+SAFETY_FLAGS_MAX = 16
+REPAIR_KEYS_MAX = 32
+
+RING_KEYS = ("unknown_slot_writes",)
+_ID_KEYS = ("mode", "phase", "last_question_id", "end_reason")
+_META_ID_KEYS = ("flow", "locale")
+_META_FLAGS = ("safe_space_shown", "welcomed", "awaiting_files")
+
+# Keys the engine reads; anything else in meta / at the top level is shed
+# before giving up on the byte budget.
+_KNOWN_META = {"safe_space_shown", "welcomed", "awaiting_files", "unknown_slot_writes", "repair_counts", "last_nlu", "flow", "locale", "limits"}
+_KNOWN_TOP = {"mode", "phase", "user", "meta", "slots", "last_question_id", "turn", "end_reason", "safety_flags"}
+
+_counters_lock = threading.Lock()
+_counters: Counter = Counter()
+
+
+def limit_counters() -> Dict[str, int]:
+    with _counters_lock:
+        return dict(_counters)
+
+
+def _count(meta: Any, name: str, n: int = 1) -> None:
+    with _counters_lock:
+        _counters[name] += n
+    if isinstance(meta, dict):
+        limits = meta.get("limits")
+        if not isinstance(limits, dict):
+            limits = meta["limits"] = {}
+        limits[name] = int(limits.get(name, 0) or 0) + n
+
+
+def _cap_text(value: Any) -> Any:
+    if isinstance(value, str) and len(value) > SLOT_TEXT_MAX:
+        return value[:SLOT_TEXT_MAX]
+    return value
+
+
+def _cap_id(value: Any) -> Any:
+    if isinstance(value, str) and len(value) > ID_MAX:
+        return value[:ID_MAX]
+    return value
+
+
+def _cap_json(value: Any) -> Any:
+    """Strings capped at SLOT_TEXT_MAX; containers over that size as JSON become None."""
+    if isinstance(value, (list, dict)) and len(json.dumps(value, default=str)) > SLOT_TEXT_MAX:
+        return None
+    return _cap_text(value)
+
+
+def ring_append(meta: Dict[str, Any], key: str, item: Any) -> None:
+    """Append to the ring buffer `meta[key]`, dropping the oldest entries past RING_SIZE."""
+    ring = meta.get(key)
+    if not isinstance(ring, list):
+        ring = meta[key] = []
+    if isinstance(item, dict):
+        item = {k: _cap_text(v) for k, v in item.items()}
+    ring.append(item)
+    overflow = len(ring) - RING_SIZE
+    if overflow > 0:
+        del ring[:overflow]
+        _count(meta, f"{key}_dropped", overflow)
+
+
+def _state_bytes(state: Dict[str, Any]) -> int:
+    return len(json.dumps(state, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def _shed_steps(state: Dict[str, Any]):
+    meta = state.get("meta") if isinstance(state.get("meta"), dict) else {}
+    last_nlu = meta.get("last_nlu")
+    if isinstance(last_nlu, dict) and last_nlu.get("nlu_meta"):
+        yield lambda: last_nlu.__setitem__("nlu_meta", None)
+    if "last_nlu" in meta:
+        yield lambda: meta.pop("last_nlu", None)
+    for key in RING_KEYS:
+        if meta.get(key):
+            yield lambda key=key: meta.__setitem__(key, [])
+    for key in [k for k in meta if k not in _KNOWN_META]:
+        yield lambda key=key: meta.pop(key, None)
+    for key in [k for k in state if k not in _KNOWN_TOP]:
+        yield lambda key=key: state.pop(key, None)
+    # Still over: what the engine needs is kept, everything else goes.
+    from soficca_core.chat_state import SLOT_NAMES
+
+    slots = state.get("slots")
+    if isinstance(slots, dict):
+        for key in [k for k in slots if k not in SLOT_NAMES]:
+            yield lambda key=key: slots.pop(key, None)
+    if state.get("user"):
+        yield lambda: state.__setitem__("user", {})
+
+
+def _cap_fields(state: Dict[str, Any], meta: Any) -> None:
+    for key in _ID_KEYS:
+        v = state.get(key)
+        if _cap_id(v) is not v:
+            state[key] = _cap_id(v)
+            _count(meta, "id_truncated")
+
+    flags = state.get("safety_flags")
+    if flags is not None:
+        capped = [_cap_id(f) for f in flags if isinstance(f, str)] if isinstance(flags, list) else []
+        capped = list(dict.fromkeys(capped))[:SAFETY_FLAGS_MAX]  # the earliest flags are kept
+        if capped != flags:
+            state["safety_flags"] = capped
+            _count(meta, "safety_flags_capped")
+
+    user = state.get("user")
+    if user is not None:
+        capped = {k: _cap_json(v) for k, v in user.items()} if isinstance(user, dict) else {}
+        if capped != user:
+            state["user"] = capped
+            _count(meta, "user_text_truncated")
+
+    if not isinstance(meta, dict):
+        return
+    for key in _META_ID_KEYS:
+        v = meta.get(key)
+        if _cap_id(v) is not v:
+            meta[key] = _cap_id(v)
+            _count(meta, "id_truncated")
+    for key in _META_FLAGS:
+        if key in meta and not isinstance(meta[key], bool):
+            meta[key] = bool(meta[key])
+    repairs = meta.get("repair_counts")
+    if repairs is not None:
+        capped = _cap_counts(repairs)
+        if capped != repairs:
+            meta["repair_counts"] = capped
+            _count(meta, "repair_counts_capped")
+
+
+def _cap_counts(counts: Any) -> Dict[str, int]:
+    """At most REPAIR_KEYS_MAX int entries with id-sized keys."""
+    capped: Dict[str, int] = {}
+    if isinstance(counts, dict):
+        for k, v in counts.items():
+            if len(capped) == REPAIR_KEYS_MAX:
+                break
+            if isinstance(k, str) and len(k) <= ID_MAX and isinstance(v, int):
+                capped[k] = v
+    return capped
+
+
+def _enforce(state: Dict[str, Any]) -> None:
+    meta = state.get("meta")
+    if isinstance(meta, dict):
+        # First, so this turn's counts are never the ones cut off.
+        limits = meta.get("limits")
+        if limits is not None and _cap_counts(limits) != limits:
+            meta["limits"] = _cap_counts(limits)
+        for key in RING_KEYS:
+            ring = meta.get(key)
+            if isinstance(ring, list) and len(ring) > RING_SIZE:
+                overflow = len(ring) - RING_SIZE
+                del ring[:overflow]
+                _count(meta, f"{key}_dropped", overflow)
+
+    slots = state.get("slots")
+    if isinstance(slots, dict):
+        for k, v in slots.items():
+            capped = _cap_json(v)
+            if capped is not v:
+                slots[k] = capped
+                _count(meta, "slot_text_truncated")
+    _cap_fields(state, meta)
+
+    if _state_bytes(state) <= STATE_MAX_BYTES:
+        return
+    for step in _shed_steps(state):
+        step()
+        _count(meta, "state_budget_shed")
+        if _state_bytes(state) <= STATE_MAX_BYTES:
+            return
+    _count(meta, "state_budget_exceeded")
+
+
+def bound_state(state: Any) -> Any:
+    """Apply the bounded-state policy to `state` in place. Never raises."""
+    if not isinstance(state, dict):
+        return state
+    try:
+        _enforce(state)
+    except Exception:
+        with _counters_lock:
+            _counters["bound_state_errors"] += 1
+    return state
@@ -0,0 +1,61 @@
+# src/soficca_core/telemetry.py
+"""
+Timing and event hooks for the engine.
+
+The engine reports what it does (stage durations, NLU calls, model
+escalations) through this module and leaves it to the embedding application
+what to do with it: the API installs api.metrics as the observer. With no
+observer installed (the default, and in tests) a hook costs one None check.
+
+Events:
+    stage_seconds{stage}            validate, nlu, safety, rules, state, total
+    nlu_call_seconds{model,outcome} one OpenAI request; outcome ok | error
+    nlu_escalations{model}          low confidence on `model`, retried on the larger one
+
+An observer is any object with `observe(name, value, labels)` and
+`count(name, n, labels)`; it is called on the engine's thread and must be
+thread-safe and cheap.
+"""
+
+from __future__ import annotations
+
+from time import perf_counter
+from typing import Any, Dict, Optional
+
+_observer: Optional[Any] = None
+
+
+def set_observer(observer: Optional[Any]) -> None:
+    global _observer
+    _observer = observer
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    if _observer is not None:
+        _observer.observe(name, value, labels)
+
+
+def count(name: str, n: int = 1, **labels: str) -> None:
+    if _observer is not None:
+        _observer.count(name, n, labels)
+
+
+class timed:
+    """`with timed("stage_seconds", stage="rules"):` observes the block's duration in seconds."""
+
+    __slots__ = ("name", "labels", "_t0")
+
+    def __init__(self, name: str, **labels: str):
+        self.name = name
+        self.labels: Dict[str, str] = labels
+        self._t0 = 0.0
+
+    def __enter__(self) -> "timed":
+        if _observer is not None:
+            self._t0 = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        observer = _observer
+        if observer is not None and self._t0:
+            observer.observe(self.name, perf_counter() - self._t0, self.labels)
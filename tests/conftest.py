@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# api.db reads its path at import: keep the API tests off the demo database.
+os.environ["SOFICCA_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="soficca-tests-"), "api.sqlite")
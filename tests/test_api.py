@@ -0,0 +1,117 @@
+import copy
+import json
+import threading
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+
+from api import app as api_app
+from soficca_core import ruleset
+from soficca_core.ruleset_registry import REGISTRY
+
+# Not entered as a context manager: the lifespan would close the shared turn writer.
+client = TestClient(api_app.app)
+
+OPENING = ["", "Carlos", "male", "Colombia"]
+
+
+def _session(texts=OPENING):
+    sid = client.post("/v1/session", json={}).json()["session_id"]
+    for text in texts:
+        r = client.post("/v1/report", json={"context": {"session_id": sid, "chat_text": text}})
+        assert r.status_code == 200, r.text
+    return sid
+
+
+def _state(sid):
+    r = client.get(f"/v1/session/{sid}/state")
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_demo_first_turn_restarts_and_chat_state_is_rejected():
+    sid = _session(["", "Carlos"])
+    # What the demo sends when it starts a conversation over on an existing session.
+    r = client.post("/v1/report", json={"context": {"session_id": sid, "chat_text": "", "restart": True}})
+    assert r.status_code == 200
+    assert r.json()["report"]["chat"]["state"]["turn"] == 1
+
+    r = client.post("/v1/report", json={"context": {"session_id": sid, "chat_text": "", "chat_state": None}})
+    assert r.status_code == 422
+    assert _state(sid)["turn"] == 3
+
+
+def test_session_replays_after_a_ruleset_hot_swap_and_restart(monkeypatch):
+    base = ruleset.active_ruleset()
+    sid = _session()
+    swapped = copy.deepcopy(base.definition)
+    swapped["ruleset_version"] = base.version + "-test"
+    registered = set(REGISTRY.versions())
+    monkeypatch.setattr(ruleset, "_retired", {})
+    ruleset.activate(ruleset.compile_ruleset(swapped))
+    try:
+        api_app.sessions.discard(sid)
+        r = client.post("/v1/report", json={"context": {"session_id": sid, "chat_text": "sometimes"}})
+        assert r.status_code == 200, r.text
+
+        # A restart forgets the retired version; the replay registers it from the database.
+        ruleset._retired.clear()
+        api_app.sessions.discard(sid)
+        r = client.post("/v1/report", json={"context": {"session_id": sid, "chat_text": "yes"}})
+        assert r.status_code == 200, r.text
+        assert base.version in REGISTRY.versions()
+        assert client.get(f"/v1/session/{sid}/export.json").status_code == 200
+    finally:
+        ruleset.activate(base)
+        for version in set(REGISTRY.versions()) - registered:
+            REGISTRY.unregister(version)
+
+
+def test_export_stays_valid_json_when_a_replay_fails():
+    sid = _session()
+    assert api_app.turn_writer.flush()
+    with api_app.db.write() as conn:
+        conn.execute("UPDATE turn_events SET state_checksum = 'corrupt' WHERE session_id = ? AND seq = 2", (sid,))
+
+    doc = json.loads(client.get(f"/v1/session/{sid}/export.json").text)
+    assert doc["turn_count"] == len(OPENING)
+    turns = doc["turns"]
+    assert turns[0]["state"] is not None and "state_error" not in turns[0]
+    assert all(t["state"] is None and "checksum" in t["state_error"] for t in turns[1:])
+
+    lines = client.get(f"/v1/session/{sid}/export.ndjson").text.splitlines()
+    assert [("state_error" in json.loads(line)) for line in lines] == [False, True, True, True]
+
+
+@contextmanager
+def _stalled_writer():
+    # Holds the turn writer inside a transaction, as a long busy retry would.
+    started, release = threading.Event(), threading.Event()
+
+    def job(conn):
+        started.set()
+        release.wait(5)
+
+    api_app.turn_writer.submit(job)
+    assert started.wait(5)
+    try:
+        yield
+    finally:
+        release.set()
+
+
+def test_turns_and_reads_answer_503_while_the_turn_log_is_behind(monkeypatch):
+    sid = _session()
+    turn = _state(sid)["turn"]
+    api_app.sessions.discard(sid)  # the next turn restores the state, which flushes first
+    monkeypatch.setattr(api_app.turn_writer, "flush_timeout", 0.05)
+    with _stalled_writer():
+        assert client.get(f"/v1/session/{sid}/state").status_code == 503
+        r = client.post("/v1/report", json={"context": {"session_id": sid, "chat_text": "sometimes"}})
+        assert r.status_code == 503
+    assert api_app.turn_writer.flush(timeout=5)
+    assert _state(sid)["turn"] == turn
+
+    r = client.post("/v1/report", json={"context": {"session_id": sid, "chat_text": "sometimes"}})
+    assert r.status_code == 200
+    assert _state(sid)["turn"] == turn + 1
@@ -0,0 +1,63 @@
+import pytest
+
+from soficca_core.chat_flow import ensure_phase_progress, next_question_id
+from soficca_core.chat_state import new_state, set_slot
+from soficca_core.engine import generate_report
+from soficca_core.flow_graph import compile_flow, register_flow
+
+
+def test_default_flow_asks_slots_in_order_and_advances_phase():
+    state = new_state()
+    assert next_question_id(state) == "name"
+
+    set_slot(state, "name", "Carlos")
+    set_slot(state, "country", "Colombia")
+    assert next_question_id(state) == "gender_identity"
+    assert ensure_phase_progress(state)["phase"] == "INTRO"
+
+    set_slot(state, "gender_identity", "male")
+    assert next_question_id(state) is None
+    assert ensure_phase_progress(state)["phase"] == "REASON"
+    assert next_question_id(state) == "reason"
+
+
+def test_flow_rejects_out_of_order_slots():
+    spec = (
+        ("INTRO", ("name", "country"), "REASON"),
+        ("REASON", ("country", "name"), "INTERPRETATION"),
+    )
+    with pytest.raises(ValueError):
+        compile_flow("bad", spec)
+
+
+def test_named_flow_is_chosen_per_request_and_kept_in_state():
+    register_flow(
+        "intro-only-test",
+        (
+            ("INTRO", ("name",), "REASON"),
+            ("REASON", ("reason",), "INTERPRETATION"),
+        ),
+    )
+    state = new_state()
+    set_slot(state, "name", "Ana")
+
+    res = generate_report({"context": {"chat_text": "", "chat_state": state, "flow": "intro-only-test"}})
+    assert res["ok"] is True
+    chat = res["report"]["chat"]
+    assert chat["phase"] == "REASON"
+    assert chat["last_question_id"] == "reason"
+    assert chat["state"]["meta"]["flow"] == "intro-only-test"
+
+    res = generate_report({"context": {"chat_text": "", "flow": "missing-flow"}})
+    assert res["ok"] is False
+    assert res["errors"][0]["code"] == "UNKNOWN_FLOW"
+
+    res = generate_report({"context": {"chat_text": "", "chat_state": chat["state"], "flow": "default"}})
+    assert "flow" not in res["report"]["chat"]["state"]["meta"]
+    res = generate_report({"context": {"chat_text": "", "chat_state": res["report"]["chat"]["state"]}})
+    assert "flow" not in res["report"]["chat"]["state"]["meta"]
+
+
+def test_register_flow_rejects_slots_the_state_does_not_have():
+    with pytest.raises(ValueError, match="unknown slots"):
+        register_flow("typo-test", (("INTRO", ("nmae",), "REASON"),))
@@ -0,0 +1,52 @@
+from soficca_core.chat_state import ChatState, new_state
+from soficca_core.engine import generate_report
+
+
+def test_chat_state_round_trips_new_and_public_states():
+    state = new_state(user_profile={"name": "Ana"})
+    assert ChatState.from_dict(state).to_dict() == state
+
+    res = generate_report({"context": {"chat_text": "", "chat_state": None}})
+    public = res["report"]["chat"]["state"]
+    compact = ChatState.from_dict(public)
+    assert compact.to_dict() == public
+    assert compact.to_public_dict() == public
+
+
+def test_chat_state_keeps_unexpected_keys_and_values():
+    odd = {
+        "phase": "SOMEWHERE_NEW",
+        "mode": 1,
+        "slots": {"name": "Ana", "custom_slot": "x"},
+        "turn": "3",
+        "extra_key": {"nested": [1, 2]},
+    }
+    compact = ChatState.from_dict(odd)
+    assert compact.to_dict() == odd
+    assert compact.phase == "SOMEWHERE_NEW"
+    assert compact.get_slot("custom_slot") == "x"
+
+
+def test_chat_state_setters_and_unknown_slot_policy():
+    compact = ChatState()
+    compact.phase = "END"
+    compact.end_reason = "END_EVAL_FIRST"
+    compact.set_slot("frequency", "sometimes")
+    compact.set_slot("not_a_slot", 1)
+
+    d = compact.to_dict()
+    assert d["phase"] == "END"
+    assert d["end_reason"] == "END_EVAL_FIRST"
+    assert d["slots"]["frequency"] == "sometimes"
+    assert "not_a_slot" not in d["slots"]
+    assert d["meta"]["unknown_slot_writes"] == [{"key": "not_a_slot", "value": 1}]
+
+
+def test_engine_runs_on_the_dict_form_of_a_chat_state():
+    res = generate_report({"context": {"chat_text": "", "chat_state": ChatState().to_dict()}})
+    assert res["ok"] is True
+    assert res["report"]["chat"]["last_question_id"] == "name"
+
+    res = generate_report({"context": {"chat_text": "", "chat_state": ChatState()}})
+    assert res["ok"] is False
+    assert res["errors"][0]["code"] == "INVALID_STATE"
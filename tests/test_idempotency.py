@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from api.idempotency import KeyReused, ResponseCache
+
+
+def _counting(result="r"):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return result
+
+    return compute, calls
+
+
+def _wait_for_waiters(cache, key, n):
+    # Duplicates block on the pending entry's event; wait until `n` of them do.
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        entry = cache._entries.get(("s", key))
+        if entry is not None and len(entry.done._cond._waiters) >= n:
+            return
+        time.sleep(0.001)
+    raise AssertionError("duplicates never waited")
+
+
+def test_completed_request_is_replayed_without_recomputing():
+    cache = ResponseCache()
+    compute, calls = _counting()
+    assert cache.run("s", "k", "fp", compute) == ("r", "miss")
+    assert cache.run("s", "k", "fp", compute) == ("r", "hit")
+    assert cache.run("other", "k", "fp", compute) == ("r", "miss")  # keys are scoped
+    assert len(calls) == 2
+
+
+def test_key_reused_for_a_different_request_is_rejected():
+    cache = ResponseCache()
+    cache.run("s", "k", "fp", lambda: "r")
+    with pytest.raises(KeyReused):
+        cache.run("s", "k", "other fp", lambda: "r")
+    assert cache.stats()["mismatches"] == 1
+
+
+def test_concurrent_duplicates_are_coalesced_into_one_computation():
+    cache = ResponseCache()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "r"
+
+    outcomes = []
+    threads = [threading.Thread(target=lambda: outcomes.append(cache.run("s", "k", "fp", slow))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    _wait_for_waiters(cache, "k", 3)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(calls) == 1
+    assert sorted(o for _, o in outcomes) == ["coalesced"] * 3 + ["miss"]
+
+
+def test_failed_request_stores_nothing_and_is_retried():
+    cache = ResponseCache()
+
+    def fail():
+        raise RuntimeError("503")
+
+    with pytest.raises(RuntimeError):
+        cache.run("s", "k", "fp", fail)
+    assert cache.run("s", "k", "fp", lambda: "r") == ("r", "miss")
+    assert cache.stats()["failures"] == 1
+
+
+def test_requests_in_flight_are_never_expired_or_evicted():
+    cache = ResponseCache(ttl_s=0, capacity=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    leader = threading.Thread(target=cache.run, args=("s", "pending", "fp", slow))
+    leader.start()
+    started.wait(5)
+    # Completed entries around it expire (ttl 0) and are evicted (capacity 1); the pending one stays.
+    for i in range(3):
+        cache.run("s", f"done-{i}", "fp", lambda: "r")
+    waiter = []
+    t = threading.Thread(target=lambda: waiter.append(cache.run("s", "pending", "fp", lambda: "recomputed")))
+    t.start()
+    _wait_for_waiters(cache, "pending", 1)
+    release.set()
+    leader.join(5)
+    t.join(5)
+    assert waiter == [("slow", "coalesced")]
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from soficca_core import message_bundles
+from soficca_core.engine import generate_report
+
+
+@pytest.fixture
+def xx_locale(tmp_path, monkeypatch):
+    en = (message_bundles.LOCALE_DIR / "en.json").read_text(encoding="utf-8")
+    (tmp_path / "en.json").write_text(en, encoding="utf-8")
+    definition = json.loads(en)
+    definition["locale"] = "xx"
+    definition["messages"]["greet"] = "Hola. Soy Pen²."
+    definition["messages"]["ask_name"] = "¿Cómo te llamo?"
+    definition["clarify_once"]["name"] = "¿Qué nombre uso?"
+    (tmp_path / "xx.json").write_text(json.dumps(definition), encoding="utf-8")
+    monkeypatch.setattr(message_bundles, "LOCALE_DIR", tmp_path)
+    monkeypatch.setattr(message_bundles, "_bundles", dict(message_bundles._bundles))
+    return "xx"
+
+
+def test_locale_is_selected_per_request_and_kept_in_state(xx_locale):
+    res = generate_report({"context": {"chat_text": "", "locale": xx_locale}})
+    assert res["report"]["chat"]["assistant_message"] == "Hola. Soy Pen².\n\n¿Cómo te llamo?"
+    state = res["report"]["chat"]["state"]
+    assert state["meta"]["locale"] == xx_locale
+
+    # Later turns keep the session's locale; other requests are unaffected.
+    res = generate_report({"context": {"chat_text": "", "chat_state": state}})
+    assert res["report"]["chat"]["assistant_message"] == "¿Qué nombre uso?"
+
+    # Asking for the default locale switches the session back, for good.
+    res = generate_report({"context": {"chat_text": "", "chat_state": res["report"]["chat"]["state"], "locale": "en"}})
+    state = res["report"]["chat"]["state"]
+    assert "locale" not in state["meta"]
+    res = generate_report({"context": {"chat_text": "", "chat_state": state}})
+    assert res["report"]["chat"]["assistant_message"] == "Before we start — what name would you like me to use?"
+
+    res = generate_report({"context": {"chat_text": ""}})
+    assert res["report"]["chat"]["assistant_message"] == "Hi. I’m Pen².\n\nBefore we start — what name would you like me to use?"
+    assert message_bundles.get_bundle(xx_locale) is message_bundles.get_bundle(xx_locale)
+
+
+def test_unknown_locale_is_an_error():
+    for locale in ("zz", "../en", ["en"]):
+        res = generate_report({"context": {"chat_text": "", "locale": locale}})
+        assert res["ok"] is False
+        assert res["errors"][0]["code"] == "UNKNOWN_LOCALE"
+
+
+def test_named_templates_need_exactly_one_placeholder():
+    with pytest.raises(ValueError):
+        message_bundles.MessageBundle({"messages": {"greet_back": {"anon": "Hi", "named": "Hi {name} {name}"}}})
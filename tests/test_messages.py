@@ -0,0 +1,18 @@
+from soficca_core import messages_en as m
+
+
+def test_constant_messages_are_shared_and_named_ones_render():
+    assert m.ask_frequency() is m.ask_frequency()
+    assert m.repair_for_question("name") is m.ask_name()
+    assert m.safe_space("Ana").startswith("Hi Ana. I'm Pen².\n\n")
+    assert m.safe_space(None).startswith("Hi. I'm Pen².\n\n")
+    assert m.ask_reason("Ana").startswith("Tell me, Ana.\n\n")
+    assert m.end_eval_first(name="Ana").startswith("Thanks, Ana.\n\n")
+    assert m.safety_escalation_with_country("Chile").count("in Chile or a healthcare professional") == 1
+
+
+def test_unknown_question_ids_fall_back_to_soft_clarification():
+    for qid in ("other", None, 3, ["reason"]):
+        assert m.repair_for_question(qid) == m.clarify_soft()
+        assert m.clarify_once_for_question(qid) == m.clarify_soft()
+    assert m.repair_for_question("reason", name="Ana").startswith("Got it.\n\nIn one sentence, Ana, ")
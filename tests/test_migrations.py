@@ -0,0 +1,80 @@
+import sqlite3
+
+import pytest
+
+from api import migrations
+
+
+def _v1_db():
+    # A database as the first versioned build left it, with turns already logged.
+    conn = sqlite3.connect(":memory:")
+    migrations._m001_base(conn)
+    conn.execute("PRAGMA user_version = 1")
+    turns = [
+        ("s1", "hi there", "A", "PATH_X", '{"nlu_used": "rules"}'),
+        ("s1", "chest pain", "B", "PATH_ESCALATE_HUMAN", "{}"),
+        ("s1", "ok", "END", "PATH_ESCALATE_HUMAN", "{}"),
+        ("s2", "hello", "A", None, "{}"),
+    ]
+    for session_id, text, phase, path, trace in turns:
+        conn.execute(
+            "INSERT INTO turns(session_id, created_at, user_text, assistant_text, phase, path, flags_json, trace_json)"
+            " VALUES (?, '2026-01-01T00:00:00+00:00', ?, 'reply', ?, ?, '[]', ?)",
+            (session_id, text, phase, path, trace),
+        )
+    return conn
+
+
+def test_old_database_migrates_to_the_latest_version():
+    conn = _v1_db()
+    assert migrations.migrate(conn) == migrations.LATEST
+    assert migrations.schema_version(conn) == migrations.LATEST
+    assert conn.execute("SELECT COUNT(*) FROM turns").fetchone()[0] == 4
+
+    counters = dict(((m, k), n) for m, k, n in conn.execute("SELECT metric, key, n FROM analytics_counters"))
+    assert counters[("turns", "all")] == 4
+    assert counters[("sessions", "started")] == 2
+    assert counters[("escalation", "sessions")] == 1
+    assert counters[("transition", "B>END")] == 1
+    assert counters[("end_reason", "unknown")] == 1
+    reached = set(conn.execute("SELECT session_id, mark FROM analytics_reached"))
+    assert {("s1", "escalated"), ("s1", "END"), ("s2", "started")} <= reached
+    assert ("s2", "escalated") not in reached
+
+    # Existing turns are searchable and new ones are indexed by the triggers.
+    assert conn.execute("SELECT rowid FROM turns_fts WHERE turns_fts MATCH 'chest'").fetchall() == [(2,)]
+    conn.execute(
+        "INSERT INTO turns(session_id, created_at, user_text, assistant_text) VALUES ('s3', 'now', 'dizzy', 'reply')"
+    )
+    assert conn.execute("SELECT COUNT(*) FROM turns_fts WHERE turns_fts MATCH 'dizzy'").fetchone()[0] == 1
+    for table in ("turn_events", "state_snapshots", "json_blobs", "ruleset_artefacts"):
+        conn.execute(f"SELECT * FROM {table}")
+
+
+def test_migrating_twice_is_a_no_op():
+    conn = sqlite3.connect(":memory:")
+    migrations.migrate(conn)
+    schema = conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall()
+    assert migrations.migrate(conn) == migrations.LATEST
+    assert conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall() == schema
+
+
+def test_newer_database_is_refused():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"PRAGMA user_version = {migrations.LATEST + 1}")
+    with pytest.raises(RuntimeError):
+        migrations.migrate(conn)
+
+
+def test_cli_takes_the_database_path_from_db(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(SystemExit):
+        migrations.main(["--help"])
+    assert list(tmp_path.iterdir()) == []
+
+    path = tmp_path / "api.sqlite"
+    assert migrations.main(["--db", str(path)]) == 0
+    assert f"schema version 0 -> {migrations.LATEST}" in capsys.readouterr().out
+    conn = sqlite3.connect(path)
+    assert migrations.schema_version(conn) == migrations.LATEST
+    conn.close()
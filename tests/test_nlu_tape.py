@@ -0,0 +1,36 @@
+from soficca_core import nlu_tape
+from soficca_core.engine import generate_report
+
+TURNS = ["", "Carlos", "male", "Colombia", "I want help with performance", "sometimes"]
+
+
+def test_recorded_nlu_results_replay_the_turn_without_calling_the_nlu(monkeypatch):
+    recorded = []
+    state = None
+    for text in TURNS:
+        res = generate_report({"context": {"chat_text": text, "chat_state": state, "nlu_record": True}})
+        recorded.append((text, state, res))
+        state = res["report"]["chat"]["state"]
+
+    def no_nlu(*args, **kwargs):
+        raise AssertionError("replay must not call the NLU")
+
+    monkeypatch.setattr(nlu_tape, "interpret", no_nlu)
+    for text, state, res in recorded:
+        nlu_results = res["report"]["chat"]["nlu_results"]
+        assert nlu_results and nlu_results[0]["question_id"] == "global"
+        replay = generate_report({"context": {"chat_text": text, "chat_state": state, "nlu_results": nlu_results}})
+        assert "nlu_results" not in replay["report"]["chat"]
+        assert replay["report"]["chat"]["state"] == res["report"]["chat"]["state"]
+        assert replay["report"]["chat"]["assistant_message"] == res["report"]["chat"]["assistant_message"]
+
+
+def test_replay_fails_instead_of_calling_the_nlu_when_the_recording_does_not_match(monkeypatch):
+    def no_nlu(*args, **kwargs):
+        raise AssertionError("replay must not call the NLU")
+
+    monkeypatch.setattr(nlu_tape, "interpret", no_nlu)
+    for recording in ([], [{"question_id": "name", "result": {}}]):
+        res = generate_report({"context": {"chat_text": "hi", "nlu_results": recording}})
+        assert not res["ok"]
+        assert res["errors"][0]["code"] == "NLU_REPLAY_MISMATCH"
@@ -0,0 +1,175 @@
+import itertools
+import json
+
+import pytest
+
+from soficca_core import ruleset, ruleset_registry
+from soficca_core.engine import generate_report
+from soficca_core.normalization import normalize
+from soficca_core.rules import apply_rules
+
+
+def _legacy_apply_rules(signals):
+    # The hand-written rules that rulesets/default.json replaces.
+    decision = {"path": "PATH_MORE_QUESTIONS", "flags": [], "reasons": [], "recommendations": []}
+    intermittent = signals.get("intermittent_pattern")
+    user_requests_meds = signals.get("user_requests_meds")
+    morning_reduced = signals.get("morning_erection_reduced") is True
+
+    if intermittent is True:
+        decision["path"] = "PATH_MEDS_OK"
+        decision["reasons"].append("Symptoms appear intermittent.")
+        decision["recommendations"].append("Medication support can be considered.")
+        if user_requests_meds is True:
+            decision["reasons"].append("You asked for medication support.")
+            decision["recommendations"].append("Show medication options (authorization as needed).")
+        if morning_reduced:
+            decision["flags"] += ["physiology_signal", "needs_eval_parallel"]
+            decision["reasons"].append("Reduced morning erections can be a physiological signal worth evaluating.")
+            decision["recommendations"].append("Recommend clinician evaluation in parallel.")
+    elif intermittent is False:
+        if user_requests_meds is True:
+            decision["path"] = "PATH_MEDS_OK"
+            decision["flags"].append("needs_eval_parallel")
+            decision["reasons"] += [
+                "You asked for medication support.",
+                "Because the pattern seems persistent, it's best paired with clinician review.",
+            ]
+            decision["recommendations"] += [
+                "Show medication options (authorization as needed).",
+                "Recommend clinician evaluation in parallel.",
+            ]
+        else:
+            decision["path"] = "PATH_EVAL_FIRST"
+            decision["flags"].append("persistent_pattern")
+            decision["reasons"].append("Symptoms seem consistent rather than intermittent.")
+            decision["recommendations"].append("Consider clinician evaluation before a medication-first approach.")
+        if morning_reduced and "physiology_signal" not in decision["flags"]:
+            decision["flags"].append("physiology_signal")
+            decision["reasons"].append("Reduced morning erections can be a physiological signal worth evaluating.")
+    return decision
+
+
+def test_default_ruleset_matches_legacy_rules_for_every_signal_combination():
+    names = ["intermittent_pattern", "user_requests_meds", "morning_erection_reduced", "stress_high"]
+    for combo in itertools.product((True, False, None), repeat=len(names)):
+        signals = dict(zip(names, combo))
+        assert apply_rules(signals) == _legacy_apply_rules(signals)
+
+
+def test_default_ruleset_normalizes_slots():
+    signals = normalize(
+        {
+            "frequency": "sometimes",
+            "desire": "low",
+            "stress": "moderate",
+            "morning_erection": "rare",
+            "wants_meds": " Yes ",
+        }
+    )
+    assert signals == {
+        "intermittent_pattern": True,
+        "desire_preserved": False,
+        "stress_high": None,
+        "morning_erection_reduced": True,
+        "user_requests_meds": True,
+    }
+    assert normalize({"frequency": "   ", "wants_meds": False})["user_requests_meds"] is False
+    assert normalize({"frequency": " sometimes"})["intermittent_pattern"] is None
+
+
+def test_apply_returns_fresh_lists():
+    signals = {"intermittent_pattern": False}
+    apply_rules(signals)["flags"].append("mutated")
+    assert "mutated" not in apply_rules(signals)["flags"]
+
+
+def test_compile_rejects_unknown_signal():
+    definition = {
+        "ruleset_version": "bad",
+        "signals": {"a": {"slot": "frequency", "values": {"x": True}}},
+        "rules": [{"when": {"b": True}, "path": "PATH_X"}],
+    }
+    with pytest.raises(ValueError):
+        ruleset.compile_ruleset(definition)
+
+
+def test_hot_swap_changes_ruleset_version_in_reports(tmp_path):
+    definition = json.loads(ruleset.DEFAULT_RULESET_PATH.read_text(encoding="utf-8"))
+    definition["ruleset_version"] = "9.9.9-test"
+    path = tmp_path / "candidate.json"
+    path.write_text(json.dumps(definition), encoding="utf-8")
+
+    previous = ruleset.active_ruleset()
+    try:
+        ruleset.reload_ruleset(path)
+        res = generate_report({"context": {"chat_text": ""}})
+        assert res["report"]["ruleset_version"] == "9.9.9-test"
+    finally:
+        ruleset.activate(previous)
+
+    res = generate_report({"context": {"chat_text": ""}})
+    assert res["report"]["ruleset_version"] == previous.version
+
+
+def _definition(version, reason):
+    definition = json.loads(ruleset.DEFAULT_RULESET_PATH.read_text(encoding="utf-8"))
+    definition["ruleset_version"] = version
+    definition["rules"][0]["reasons"] = [reason]
+    return definition
+
+
+@pytest.fixture
+def registry():
+    """The process-wide registry; versions and tenants registered by the test are removed afterwards."""
+    registry = ruleset_registry.REGISTRY
+    versions, tenants = set(registry.versions()), dict(registry._tenants)
+    yield registry
+    for version in set(registry.versions()) - versions:
+        registry.unregister(version)
+    for tenant_id in set(registry._tenants) - set(tenants):
+        registry.unbind_tenant(tenant_id)
+
+
+def test_registry_selects_ruleset_per_request_and_stamps_version(registry):
+    registry.register("7.0.0-test", _definition("7.0.0-test", "Intermittent (v7)."))
+    registry.bind_tenant("clinic-test", "7.0.0-test")
+
+    payload = {"context": {"chat_text": "", "tenant_id": "clinic-test"}}
+    assert generate_report(payload)["report"]["ruleset_version"] == "7.0.0-test"
+
+    res = generate_report({"context": {"chat_text": "", "ruleset_version": "does-not-exist"}})
+    assert res["ok"] is False
+    assert res["errors"][0]["code"] == "UNKNOWN_RULESET"
+
+
+def test_registry_lru_evicts_and_shares_strings():
+    registry = ruleset_registry.RulesetRegistry(capacity=1)
+    registry.register("a-test", _definition("a-test", "Shared reason."))
+    registry.register("b-test", _definition("b-test", "Shared reason."))
+
+    a = registry.get("a-test")
+    b = registry.get("b-test")
+    assert registry.stats["evictions"] == 1
+
+    signals = {"intermittent_pattern": True}
+    assert a.apply(signals)["reasons"][0] is b.apply(signals)["reasons"][0]
+
+    registry.get("a-test")
+    assert registry.stats["compiles"] == 3
+
+
+def test_registry_pool_forgets_evicted_versions():
+    registry = ruleset_registry.RulesetRegistry(capacity=1)
+    registry.register("a-test", _definition("a-test", "Only in a."))
+    registry.register("b-test", _definition("b-test", "Only in b."))
+
+    def pooled_reasons():
+        return {r for decision in registry._pool._items for part in decision if isinstance(part, tuple) for r in part}
+
+    registry.get("a-test")
+    assert "Only in a." in pooled_reasons()
+    b = registry.get("b-test")
+
+    assert "Only in a." not in pooled_reasons()
+    assert b.apply({"intermittent_pattern": True})["reasons"] == ["Only in b."]
@@ -0,0 +1,72 @@
+from api.session_store import SessionStore
+from soficca_core.engine import generate_report
+
+
+def _state(text=""):
+    return generate_report({"context": {"chat_text": text, "chat_state": None}})["report"]["chat"]["state"]
+
+
+def _store(states, capacity=2):
+    loads = []
+
+    def loader(session_id):
+        loads.append(session_id)
+        return states.get(session_id)
+
+    return SessionStore(loader, capacity=capacity), loads
+
+
+def test_miss_restores_from_the_loader_then_hits_the_cache():
+    state = _state()
+    store, loads = _store({"a": state})
+    assert store.get("a") == state
+    assert store.get("a") == state
+    assert store.get("new") is None  # a session with no turns
+    assert store.get("new") is None
+    assert loads == ["a", "new"]
+    assert (store.stats()["hits"], store.stats()["misses"]) == (2, 2)
+
+
+def test_states_round_trip_through_the_compact_form():
+    state = _state()
+    store, _ = _store({})
+    store.put("a", state)
+    got = store.get("a")
+    assert got == state
+    got["phase"] = "changed"  # callers get a copy, not the cached state
+    assert store.get("a") == state
+
+
+def test_least_recently_used_session_is_evicted():
+    store, loads = _store({s: _state() for s in "abc"})
+    store.get("a")
+    store.get("b")
+    store.get("a")  # b is now the least recently used
+    store.get("c")
+    assert store.stats()["evictions"] == 1
+    store.get("a")
+    store.get("b")
+    assert loads == ["a", "b", "c", "b"]
+
+
+def test_pinned_sessions_are_not_evicted():
+    store, loads = _store({s: _state() for s in "abcd"})
+    store.pin("a")
+    for s in "abcd":
+        store.get(s)
+    store.get("a")
+    assert loads == ["a", "b", "c", "d"]
+    store.unpin("a")
+    store.get("b")
+    assert loads[-1] == "b"
+
+
+def test_discard_restarts_from_the_loader():
+    first, second = _state(), _state("Carlos")
+    states = {"a": first}
+    store, loads = _store(states)
+    assert store.get("a") == first
+    states["a"] = second  # e.g. a reset rewrote the log
+    store.discard("a")
+    assert store.get("a") == second
+    assert loads == ["a", "a"]
@@ -0,0 +1,71 @@
+import pytest
+
+from soficca_core import state_codec
+from soficca_core.chat_state import END_REASONS, MODES, PHASES, QUESTION_IDS, SLOT_NAMES, new_state
+from soficca_core.engine import generate_report
+from soficca_core.state_codec import (
+    StateCodecError,
+    decode_state,
+    decode_state_token,
+    encode_state,
+    encode_state_token,
+    loads_state,
+)
+
+
+def test_codec_round_trips_states_with_free_text_and_counters():
+    state = {
+        "mode": "NORMAL",
+        "phase": "SYMPTOMS",
+        "slots": {"name": "José", "reason": "it's complicated", "frequency": "sometimes", "wants_meds": None},
+        "turn": 300,
+        "meta": {"repair_counts": {"frequency": 2}, "score": -1.5, "unknown_slot_writes": [{"key": "x", "value": -7}]},
+        "safety_flags": [],
+    }
+    raw = encode_state(state)
+    assert decode_state(raw) == state
+    assert list(decode_state(raw)) == list(state)
+    assert decode_state_token(encode_state_token(state)) == state
+
+
+def test_loads_state_accepts_json_and_binary():
+    state = {"phase": "INTRO", "turn": 1}
+    assert loads_state('{"phase": "INTRO", "turn": 1}') == state
+    assert loads_state(encode_state_token(state)) == state
+    assert loads_state(encode_state(state)) == state
+
+
+def test_decode_rejects_garbage():
+    with pytest.raises(StateCodecError):
+        decode_state(b"SC\x01\x00\x09")
+    with pytest.raises(StateCodecError):
+        decode_state(b"XX\x01")
+
+
+def test_engine_accepts_and_returns_binary_state():
+    res1 = generate_report({"context": {"chat_text": "", "state_format": "binary"}})
+    token = res1["report"]["chat"]["state"]
+    assert isinstance(token, str) and token.startswith("scb1.")
+
+    res2 = generate_report({"context": {"chat_text": "", "chat_state": token}})
+    assert res2["ok"] is True
+    assert res2["report"]["chat"]["state"]["turn"] == 2
+
+    res3 = generate_report({"context": {"chat_text": "", "chat_state": "scb1.!!"}})
+    assert res3["ok"] is False
+    assert res3["errors"][0]["code"] == "INVALID_STATE"
+
+
+def test_codec_table_covers_every_chat_state_enum():
+    state = new_state()
+    values = [*MODES, *PHASES, *QUESTION_IDS, *END_REASONS, *SLOT_NAMES, *state, "end_reason", "safety_flags", *state["meta"]]
+    missing = [v for v in values if v not in state_codec._KNOWN_CODES]
+    assert missing == [], f"append {missing} to state_codec._KNOWN_V1"
+
+
+def test_codec_table_codes_are_frozen():
+    # Wire codes of version 1; a reordered table would misread existing tokens.
+    codes = state_codec._KNOWN_CODES
+    assert [codes[v] for v in ("mode", "NORMAL", "INTRO", "END", "reason", "route_choice", "END_EVAL_FIRST", "locale")] == [
+        0, 9, 11, 17, 18, 28, 50, 90
+    ]
@@ -0,0 +1,55 @@
+import pytest
+
+from soficca_core.engine import generate_report
+from soficca_core.state_delta import StateDeltaError, apply_patch, diff_state, state_checksum
+
+TURNS = ["", "Carlos", "male", "hi", "wait, I'll send files"]
+
+
+def test_delta_mode_reconstructs_the_full_state():
+    full_state = None
+    client_state = {}
+    for text in TURNS:
+        full = generate_report({"context": {"chat_text": text, "chat_state": full_state}})
+        full_state = full["report"]["chat"]["state"]
+
+        delta = generate_report(
+            {
+                "context": {
+                    "chat_text": text,
+                    "chat_state": client_state or None,
+                    "state_delta": True,
+                    "state_checksum": state_checksum(client_state) if client_state else None,
+                }
+            }
+        )
+        chat = delta["report"]["chat"]
+        assert "state" not in chat
+        client_state = apply_patch(client_state, chat["state_patch"])
+        assert client_state == full_state
+
+
+def test_delta_mode_detects_divergence():
+    res = generate_report({"context": {"chat_text": "", "state_delta": True}})
+    state = apply_patch({}, res["report"]["chat"]["state_patch"])
+
+    tampered = dict(state, phase="END")
+    res = generate_report(
+        {"context": {"chat_text": "", "chat_state": tampered, "state_delta": True, "state_checksum": state_checksum(state)}}
+    )
+    assert res["ok"] is False
+    assert res["errors"][0]["code"] == "STATE_CHECKSUM_MISMATCH"
+
+    patch = {"base_version": state["turn"], "version": 2, "ops": [["set", ["turn"], 2]], "checksum": "0"}
+    with pytest.raises(StateDeltaError):
+        apply_patch(state, patch)
+
+
+def test_diff_only_lists_changed_paths():
+    old = {"turn": 1, "slots": {"name": None, "country": None}, "meta": {"flow": "x"}}
+    new = {"turn": 2, "slots": {"name": "Ana", "country": None}, "meta": {}}
+    assert diff_state(old, new) == [
+        ["set", ["turn"], 2],
+        ["set", ["slots", "name"], "Ana"],
+        ["del", ["meta", "flow"]],
+    ]
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from soficca_core.engine import generate_report
+from soficca_core.state_history import FrozenDict, StateHistory, freeze, thaw
+
+TURNS = ["", "Carlos", "male", "Colombia", "hi", "I want help with performance"]
+
+
+def test_freeze_shares_unchanged_subtrees():
+    a = freeze({"slots": {"name": "Ana", "country": None}, "meta": {"repair_counts": {}}, "turn": 1})
+    b = freeze({"slots": {"name": "Ana", "country": "Chile"}, "meta": {"repair_counts": {}}, "turn": 2}, a)
+
+    assert b["meta"] is a["meta"]
+    assert b["slots"] is not a["slots"]
+    assert freeze(thaw(b), b) is b
+    with pytest.raises(TypeError):
+        b["turn"] = 3
+    assert json.loads(json.dumps(b)) == thaw(b)
+
+
+def test_engine_does_not_mutate_caller_state_and_history_rewinds():
+    history = StateHistory()
+    state = None
+    for text in TURNS:
+        res = generate_report({"context": {"chat_text": text, "chat_state": state, "debug": True}})
+        state = history.record(res["report"]["chat"]["state"])
+        assert isinstance(state, FrozenDict)
+
+    assert history.turns() == list(range(1, len(TURNS) + 1))
+    assert history.at(4)["user"] is history.at(5)["user"]
+
+    snapshot = json.dumps(state, sort_keys=True)
+    generate_report({"context": {"chat_text": "sometimes", "chat_state": state, "debug": True}})
+    assert json.dumps(state, sort_keys=True) == snapshot
+
+    rewound = history.rewind(3)
+    assert rewound["turn"] == 3 and len(history) == 3
+    assert rewound["slots"]["country"] is None
+    rewound["slots"]["country"] = "Peru"  # thawed copies are mutable
+    assert history.latest()["slots"]["country"] is None
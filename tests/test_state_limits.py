@@ -0,0 +1,69 @@
+from soficca_core import state_limits
+from soficca_core.chat_state import ChatState, new_state, set_slot
+from soficca_core.engine import generate_report
+
+
+def test_unknown_slot_writes_is_a_ring_buffer():
+    state = new_state()
+    for i in range(state_limits.RING_SIZE + 5):
+        set_slot(state, f"bogus_{i}", "x" * (state_limits.SLOT_TEXT_MAX + 10))
+
+    ring = state["meta"]["unknown_slot_writes"]
+    assert len(ring) == state_limits.RING_SIZE
+    assert ring[0]["key"] == "bogus_5"
+    assert len(ring[-1]["value"]) == state_limits.SLOT_TEXT_MAX
+    assert state["meta"]["limits"]["unknown_slot_writes_dropped"] == 5
+
+    cs = ChatState.from_dict(new_state())
+    for i in range(state_limits.RING_SIZE + 1):
+        cs.set_slot(f"bogus_{i}", i)
+    assert len(cs.meta["unknown_slot_writes"]) == state_limits.RING_SIZE
+
+
+def test_engine_bounds_oversized_input_state_without_failing():
+    state = generate_report({"context": {"chat_text": ""}})["report"]["chat"]["state"]
+    state["slots"]["name"] = "n" * (state_limits.SLOT_TEXT_MAX * 3)
+    state["meta"]["unknown_slot_writes"] = [{"key": "k", "value": i} for i in range(1000)]
+    state["meta"]["junk"] = "j" * (state_limits.STATE_MAX_BYTES * 2)
+
+    before = state_limits.limit_counters().get("state_budget_shed", 0)
+    res = generate_report({"context": {"chat_text": "hello", "chat_state": state, "debug": True}})
+    assert res["ok"] is True
+
+    out = res["report"]["chat"]["state"]
+    limits = out["meta"]["limits"]
+    assert limits["slot_text_truncated"] == 1
+    assert limits["unknown_slot_writes_dropped"] == 1000 - state_limits.RING_SIZE
+    assert limits["state_budget_shed"] >= 1
+    assert "junk" not in out["meta"]
+    assert len(out["slots"]["name"]) <= state_limits.SLOT_TEXT_MAX
+    assert state_limits._state_bytes(out) <= state_limits.STATE_MAX_BYTES
+    assert state_limits.limit_counters()["state_budget_shed"] > before
+
+
+def test_bound_state_never_raises():
+    assert state_limits.bound_state(None) is None
+    assert state_limits.bound_state({"meta": "not a dict", "slots": ["x"]}) == {"meta": "not a dict", "slots": ["x"]}
+
+
+def test_budget_is_a_bound_for_any_field():
+    big = "x" * (state_limits.STATE_MAX_BYTES // 4)
+    state = new_state()
+    for slot in list(state["slots"]):
+        state["slots"][slot] = big
+    state["slots"].update({f"extra_{i}": big for i in range(20)})
+    state["user"] = {f"k{i}": big for i in range(20)}
+    state["safety_flags"] = [f"{big}{i}" for i in range(100)]
+    state["last_question_id"] = big
+    state["meta"]["repair_counts"] = {f"q{i}": i for i in range(1000)}
+    state["meta"]["locale"] = big
+
+    before = state_limits.limit_counters().get("state_budget_exceeded", 0)
+    state_limits.bound_state(state)
+
+    assert state_limits._state_bytes(state) <= state_limits.STATE_MAX_BYTES
+    assert state_limits.limit_counters().get("state_budget_exceeded", 0) == before
+    assert len(state["safety_flags"]) <= state_limits.SAFETY_FLAGS_MAX
+    assert len(state["meta"]["repair_counts"]) <= state_limits.REPAIR_KEYS_MAX
+    assert len(state["last_question_id"]) == state_limits.ID_MAX
+    assert "extra_0" not in state["slots"]
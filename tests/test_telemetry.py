@@ -0,0 +1,38 @@
+from soficca_core import telemetry
+from soficca_core.engine import generate_report
+
+
+class Recorder:
+    def __init__(self):
+        self.observed = []
+        self.counted = []
+
+    def observe(self, name, value, labels):
+        self.observed.append((name, value, dict(labels)))
+
+    def count(self, name, n, labels):
+        self.counted.append((name, n, dict(labels)))
+
+
+def test_generate_report_reports_stage_timings_to_the_observer():
+    recorder = Recorder()
+    telemetry.set_observer(recorder)
+    try:
+        res = generate_report({"context": {"chat_text": "hello"}})
+    finally:
+        telemetry.set_observer(None)
+
+    assert res["ok"] is True
+    stages = [labels["stage"] for name, _, labels in recorder.observed if name == "stage_seconds"]
+    assert {"validate", "nlu", "safety", "state", "total"} <= set(stages)
+    assert stages[-1] == "total"
+    assert all(value >= 0 for _, value, _ in recorder.observed)
+
+
+def test_without_an_observer_hooks_are_silent():
+    recorder = Recorder()
+    telemetry.set_observer(recorder)
+    telemetry.set_observer(None)
+    generate_report({"context": {"chat_text": "hello"}})
+    telemetry.count("nlu_escalations", model="m")
+    assert recorder.observed == [] and recorder.counted == []
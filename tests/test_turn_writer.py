@@ -0,0 +1,163 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from api.db import ConnectionManager
+from api.turn_writer import TurnWriter
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = ConnectionManager(tmp_path / "t.sqlite")
+    with db.write() as conn:
+        conn.execute("CREATE TABLE t (i INTEGER)")
+    yield db
+    db.close_all()
+
+
+@pytest.fixture
+def writers():
+    made = []
+
+    def make(db, **kwargs):
+        w = TurnWriter(db, **kwargs)
+        made.append(w)
+        return w
+
+    yield make
+    for w in made:
+        w.close()
+
+
+class FlakyDB:
+    """Fails the first `fails` transactions as a whole, like a database that stays busy."""
+
+    def __init__(self, db, fails):
+        self.db, self.fails = db, fails
+
+    def write(self):
+        if self.fails:
+            self.fails -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self.db.write()
+
+
+def _insert(i):
+    return lambda conn: conn.execute("INSERT INTO t VALUES (?)", (i,))
+
+
+def _rows(db):
+    with db.read() as conn:
+        return [i for (i,) in conn.execute("SELECT i FROM t ORDER BY rowid")]
+
+
+def _stalled(w):
+    # Occupies the writer thread until the returned event is set.
+    started, release = threading.Event(), threading.Event()
+
+    def job(conn):
+        started.set()
+        release.wait(5)
+
+    w.submit(job)
+    assert started.wait(5)
+    return release
+
+
+def test_jobs_submitted_together_commit_in_one_batch(db, writers):
+    w = writers(db, flush_interval_ms=5000)
+    for i in range(5):
+        assert w.submit(_insert(i))
+    assert w.flush()  # ends the batch instead of waiting out the interval
+    s = w.stats()
+    assert (s["batches"], s["last_batch_size"], s["written"]) == (1, 5, 5)
+    assert _rows(db) == [0, 1, 2, 3, 4]
+
+
+def test_a_failing_job_does_not_lose_its_batch(db, writers):
+    w = writers(db, flush_interval_ms=5000)
+
+    def bad(conn):
+        conn.execute("INSERT INTO t VALUES (99)")
+        raise ValueError("bad row")
+
+    w.submit(_insert(1))
+    w.submit(bad)
+    w.submit(_insert(2))
+    assert w.flush()
+    assert _rows(db) == [1, 2]
+    assert (w.stats()["written"], w.stats()["errors"]) == (2, 1)
+
+
+def test_busy_transaction_is_retried(db, writers):
+    w = writers(FlakyDB(db, 2), retry_backoff_ms=1)
+    w.submit(_insert(1))
+    assert w.flush()
+    s = w.stats()
+    assert (s["retries"], s["failed_batches"], s["written"]) == (2, 0, 1)
+    assert s["last_error"] == "OperationalError: database is locked"
+    assert _rows(db) == [1]
+
+
+def test_batch_is_counted_as_failed_once_retries_run_out(db, writers):
+    w = writers(FlakyDB(db, 100), write_retries=2, retry_backoff_ms=1)
+    w.submit(_insert(1))
+    assert w.flush()
+    s = w.stats()
+    assert (s["retries"], s["failed_batches"], s["written"], s["errors"]) == (2, 1, 0, 1)
+    assert _rows(db) == []
+
+
+def test_drop_policy_drops_jobs_when_the_queue_is_full(db, writers):
+    w = writers(db, queue_size=1, flush_interval_ms=0, policy="drop")
+    release = _stalled(w)
+    assert w.submit(_insert(1))
+    assert not w.submit(_insert(2))
+    release.set()
+    assert w.flush()
+    assert _rows(db) == [1]
+    assert w.stats()["dropped"] == 1
+
+
+def test_block_policy_rejects_after_the_queue_timeout(db, writers):
+    w = writers(db, queue_size=1, flush_interval_ms=0, policy="block", queue_timeout_ms=50)
+    release = _stalled(w)
+    assert w.submit(_insert(1))
+    t0 = time.monotonic()
+    assert not w.submit(_insert(2))
+    assert time.monotonic() - t0 >= 0.04
+    release.set()
+    assert w.flush()
+    assert _rows(db) == [1]
+    assert w.stats()["rejected"] == 1
+
+
+def test_inline_policy_keeps_submission_order(db, writers):
+    w = writers(db, queue_size=1, flush_size=1, flush_interval_ms=0, policy="inline")
+
+    def slow(i):
+        def job(conn):
+            time.sleep(0.01)
+            conn.execute("INSERT INTO t VALUES (?)", (i,))
+
+        return job
+
+    for i in range(6):
+        w.submit(slow(i))
+    assert w.flush()
+    assert _rows(db) == list(range(6))
+    assert w.stats()["inline"] > 0
+
+
+def test_flush_gives_up_after_its_timeout_even_with_a_full_queue(db, writers):
+    w = writers(db, queue_size=1, flush_interval_ms=0)
+    release = _stalled(w)
+    assert w.submit(_insert(1))  # the queue is now full
+    t0 = time.monotonic()
+    assert not w.flush(timeout=0.05)
+    assert time.monotonic() - t0 < 1
+    release.set()
+    assert w.flush()
+    assert _rows(db) == [1]